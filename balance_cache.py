@@ -0,0 +1,189 @@
+import json
+import time
+import random
+import asyncio
+import logging
+
+# Websocket support is optional; without it the cache is only filled by RPC reads
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+LAMPORTS_PER_SOL = 10**9
+
+
+class BalanceCache:
+    """
+    SOL balances keyed by wallet public key, kept fresh by a push feed
+
+    Entries are written by account-change notifications (see
+    AccountSubscriptionFeed), by RPC reads and optimistically by the bot's own
+    trades. Reads are served only while a feed is connected (``live``);
+    otherwise callers fall back to their RPC path as before.
+    """
+
+    def __init__(self):
+        self.entries = {}  # pubkey -> {"lamports", "slot", "updated"}
+        self.live = False
+
+    def get(self, pubkey):
+        """
+        Get a cached balance
+
+        Returns:
+            float: Balance in SOL, or None when not tracked or the feed is down
+        """
+        if not self.live:
+            return None
+        entry = self.entries.get(pubkey)
+        if entry is None:
+            return None
+        return entry["lamports"] / LAMPORTS_PER_SOL
+
+    def set(self, pubkey, lamports, slot=None):
+        """Store an authoritative balance, ignoring updates older than the cached slot"""
+        entry = self.entries.get(pubkey)
+        if entry and slot is not None and entry["slot"] is not None and slot < entry["slot"]:
+            return
+        self.entries[pubkey] = {"lamports": int(lamports), "slot": slot, "updated": time.time()}
+
+    def adjust(self, pubkey, sol_delta):
+        """Optimistically apply the bot's own trade until the next notification arrives"""
+        entry = self.entries.get(pubkey)
+        if entry is None:
+            return
+        entry["lamports"] = max(0, entry["lamports"] + int(sol_delta * LAMPORTS_PER_SOL))
+        entry["updated"] = time.time()
+
+    def invalidate(self, pubkey=None):
+        """Drop one entry, or every entry when no pubkey is given"""
+        if pubkey is None:
+            self.entries = {}
+        else:
+            self.entries.pop(pubkey, None)
+
+
+class AccountSubscriptionFeed:
+    """
+    Push balance updates into a BalanceCache with ``accountSubscribe``
+
+    One websocket carries a subscription per watched wallet. ``on_connect`` is
+    awaited after every (re)connect so the caller can resync balances that
+    changed while the socket was down.
+    """
+
+    def __init__(self, ws_url, cache, on_connect=None, commitment="confirmed"):
+        self.ws_url = ws_url
+        self.cache = cache
+        self.on_connect = on_connect
+        self.commitment = commitment
+        self.pubkeys = set()
+        self.ws = None
+        self.subscriptions = {}  # subscription id -> pubkey
+        self.pending = {}        # request id -> pubkey
+        self.next_id = 1
+
+    async def watch(self, pubkey):
+        """Start tracking a wallet (subscribes immediately when connected)"""
+        if pubkey in self.pubkeys:
+            return
+        self.pubkeys.add(pubkey)
+        if self.ws is not None:
+            await self._subscribe(pubkey)
+
+    async def _subscribe(self, pubkey):
+        request_id = self.next_id
+        self.next_id += 1
+        self.pending[request_id] = pubkey
+        await self.ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "accountSubscribe",
+            "params": [pubkey, {"encoding": "base64", "commitment": self.commitment}]
+        }))
+
+    async def run(self):
+        """Keep the subscription socket open until cancelled"""
+        if websockets is None:
+            logger.warning("websockets package not installed, balance subscriptions disabled")
+            return
+
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+                    self.ws = ws
+                    self.subscriptions = {}
+                    self.pending = {}
+                    for pubkey in list(self.pubkeys):
+                        await self._subscribe(pubkey)
+
+                    if self.on_connect is not None:
+                        await self.on_connect()
+                    self.cache.live = True
+                    logger.info(f"📡 Subscribed to {len(self.pubkeys)} wallet balances")
+                    backoff = 1.0
+
+                    async for raw in ws:
+                        self._handle(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Balance subscription error: {e} - reconnecting in {backoff:.0f}s")
+            finally:
+                self.ws = None
+                self.cache.live = False
+
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, 60.0)
+
+    def _handle(self, message):
+        # Subscription confirmation: map the subscription id back to the wallet
+        if "id" in message and message["id"] in self.pending:
+            pubkey = self.pending.pop(message["id"])
+            if "result" in message:
+                self.subscriptions[message["result"]] = pubkey
+            return
+
+        if message.get("method") != "accountNotification":
+            return
+        params = message.get("params", {})
+        pubkey = self.subscriptions.get(params.get("subscription"))
+        result = params.get("result", {})
+        if pubkey is None or not result:
+            return
+        value = result.get("value") or {}
+        self.cache.set(pubkey, value.get("lamports", 0), result.get("context", {}).get("slot"))
+
+
+class LocalBalanceFeed:
+    """
+    In-process stand-in for AccountSubscriptionFeed, for tests and offline runs
+
+    Balances change only when ``push()`` is called.
+    """
+
+    def __init__(self, cache, on_connect=None):
+        self.cache = cache
+        self.on_connect = on_connect
+        self.pubkeys = set()
+
+    async def watch(self, pubkey):
+        self.pubkeys.add(pubkey)
+
+    async def run(self):
+        if self.on_connect is not None:
+            await self.on_connect()
+        self.cache.live = True
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.cache.live = False
+
+    def push(self, pubkey, lamports, slot=None):
+        """Simulate an account-change notification"""
+        if pubkey in self.pubkeys:
+            self.cache.set(pubkey, lamports, slot)
@@ -0,0 +1,173 @@
+import numpy as np
+
+# Social link fields, in the column order used by CandidateBatch.socials
+from metadata_cache import SOCIAL_FIELDS
+from token_values import token_number
+
+# Default ranking score weights (config.BUY_SCORE_WEIGHTS overrides them).
+# Liquidity and volume are log-scaled so a single huge pool does not drown
+# out everything else; momentum is the 24h price change (in units of 100%)
+# clipped to [-1, 3]; each known social link adds a fixed bonus; the sum
+# decays towards zero as the token ages (halved after ``age_decay_hours``);
+# the source bonus favours feeds that see listings first.
+DEFAULT_SCORE_WEIGHTS = {
+    "liquidity": 1.0,
+    "volume": 0.5,
+    "momentum": 0.3,
+    "socials": 0.5,
+    "age_decay_hours": 24.0,
+    "sources": {
+        "pump.fun": 1.0,
+        "raydium": 1.0,
+        "dexscreener": 0.5,
+        "birdeye": 0.25
+    }
+}
+
+
+def _column(tokens, key):
+    """One numeric field of every token as a float array (NaN when unknown)"""
+    def value(token):
+        v = token_number(token, key)
+        return v if v is not None else np.nan
+    return np.fromiter((value(token) for token in tokens), dtype=float, count=len(tokens))
+
+
+class CandidateBatch:
+    """
+    Columnar view of one discovery cycle's tokens
+
+    Each field is a NumPy array with one entry per token, so filters and the
+    ranking score are computed for the whole batch at once.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.addresses = np.array([token.get("address") or "" for token in self.tokens], dtype=object)
+        self.liquidity = _column(self.tokens, "liquidity")
+        self.volume_24h = _column(self.tokens, "volume_24h")
+        self.price_change_24h = _column(self.tokens, "price_change_24h")
+        self.age_hours = _column(self.tokens, "age_hours")
+        self.sources = np.array([token.get("source") for token in self.tokens], dtype=object)
+        self.socials = np.column_stack([
+            np.fromiter((bool(token.get(field)) for token in self.tokens), dtype=bool, count=len(self.tokens))
+            for field in SOCIAL_FIELDS
+        ])
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def scores(self, weights=None):
+        """
+        Ranking score per token (higher is better); the buy scheduler queues tokens by it
+
+        Args:
+            weights: Overrides for DEFAULT_SCORE_WEIGHTS
+        """
+        weights = {**DEFAULT_SCORE_WEIGHTS, **(weights or {})}
+        liquidity = np.log1p(np.clip(np.nan_to_num(self.liquidity, nan=0.0), 0, None))
+        volume = np.log1p(np.clip(np.nan_to_num(self.volume_24h, nan=0.0), 0, None))
+        momentum = np.clip(np.nan_to_num(self.price_change_24h, nan=0.0) / 100, -1, 3)
+        socials = self.socials.sum(axis=1)
+        age = np.clip(np.nan_to_num(self.age_hours, nan=0.0), 0, None)
+        freshness = 1 / (1 + age / weights["age_decay_hours"])
+        sources = weights["sources"]
+        source_bonus = np.fromiter((sources.get(source, 0.0) for source in self.sources), dtype=float, count=len(self.tokens))
+        edge = (
+            weights["liquidity"] * liquidity
+            + weights["volume"] * volume
+            + weights["momentum"] * momentum
+            + weights["socials"] * socials
+        )
+        return edge * freshness + source_bonus
+
+
+class ProfileMatrix:
+    """Thresholds of several UserProfiles as arrays, one row per admin"""
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self.min_liquidity = np.array([profile.min_liquidity for profile in self.profiles], dtype=float)
+        self.max_age_hours = np.array([profile.max_age_hours or np.inf for profile in self.profiles], dtype=float)
+        self.required_socials = np.array(
+            [[field in profile.required_socials for field in SOCIAL_FIELDS] for profile in self.profiles],
+            dtype=bool
+        ).reshape(len(self.profiles), len(SOCIAL_FIELDS))
+        self.blacklists = [profile.blacklist for profile in self.profiles]
+
+    def __len__(self):
+        return len(self.profiles)
+
+
+def evaluate(batch, matrix, socials=False):
+    """
+    Run the filter stages for every (admin, token) pair in one vectorized pass
+
+    Unknown liquidity or age never rejects a token, matching the per-token
+    checks.
+
+    Args:
+        batch: CandidateBatch
+        matrix: ProfileMatrix
+        socials: Also apply the social link filters (needs enriched tokens)
+
+    Returns:
+        tuple: (accept, rejections) where accept is a bool array of shape
+            (admins, tokens) and rejections maps stage name -> number of tokens
+            no admin accepted any more after that stage
+    """
+    accept = np.ones((len(matrix), len(batch)), dtype=bool)
+    alive = np.ones(len(batch), dtype=bool)
+    rejections = {}
+
+    def close_stage(stage):
+        nonlocal alive
+        still_alive = accept.any(axis=0)
+        rejections[stage] = int(np.count_nonzero(alive & ~still_alive))
+        alive = still_alive
+
+    for row, blacklist in enumerate(matrix.blacklists):
+        if blacklist:
+            accept[row] &= ~np.isin(batch.addresses, list(blacklist))
+    close_stage("blacklist")
+
+    liquidity_known = ~np.isnan(batch.liquidity)
+    accept &= ~liquidity_known | (batch.liquidity[None, :] >= matrix.min_liquidity[:, None])
+    close_stage("liquidity")
+
+    age_known = ~np.isnan(batch.age_hours)
+    accept &= ~age_known | (batch.age_hours[None, :] <= matrix.max_age_hours[:, None])
+    close_stage("age")
+
+    if socials:
+        missing = (matrix.required_socials[:, None, :] & ~batch.socials[None, :, :]).any(axis=2)
+        accept &= ~missing
+        close_stage("socials")
+
+    return accept, rejections
+
+
+def rank(batch, matrix, socials=False, weights=None):
+    """
+    Filter and rank a batch for a set of admins
+
+    Returns:
+        tuple: (ranked, rejections) where ranked is a list of
+            (token, accepting profiles, score) in descending score order,
+            containing only tokens at least one admin accepts
+    """
+    accept, rejections = evaluate(batch, matrix, socials=socials)
+    kept = np.flatnonzero(accept.any(axis=0))
+    scores = batch.scores(weights)
+    order = kept[np.argsort(-scores[kept], kind="stable")]
+
+    # Tokens accepted by the same set of admins share one profile list
+    groups = {}
+    ranked = []
+    for index, mask in zip(order.tolist(), accept[:, order].T.tolist()):
+        key = tuple(mask)
+        accepting = groups.get(key)
+        if accepting is None:
+            accepting = groups[key] = [profile for profile, ok in zip(matrix.profiles, mask) if ok]
+        ranked.append((batch.tokens[index], accepting, float(scores[index])))
+    return ranked, rejections
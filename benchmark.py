@@ -0,0 +1,128 @@
+"""
+Micro-benchmarks for hot paths of the auto-buy pipeline
+
+Usage:
+    python benchmark.py keypair [--iterations N]
+    python benchmark.py scoring [--candidates N] [--admins N]
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+
+
+def bench_keypair(iterations):
+    """Per-buy signing overhead: decoding the stored secret vs the cached keypair"""
+    from solana.keypair import Keypair
+    from wallet import WalletManager
+
+    message = os.urandom(512)  # roughly the size of a Jupiter swap message
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wallet_file = os.path.join(tmp, "wallets.json")
+        keypair = Keypair()
+        with open(wallet_file, "w") as f:
+            json.dump({"bench": {"public": str(keypair.public_key), "secret": list(keypair.secret_key)}}, f)
+
+        manager = WalletManager(wallet_file=wallet_file)
+        secret = manager.get_wallet("bench")["secret"]
+
+        def before():
+            # What buy_token used to do for every buy
+            Keypair.from_secret_key(bytes(secret[:64])).sign(message)
+
+        def after():
+            manager.get_keypair("bench").sign(message)
+
+        results = {}
+        for name, fn in (("decode + sign", before), ("cached + sign", after)):
+            best = min(timeit.repeat(fn, number=iterations, repeat=5))
+            results[name] = best / iterations * 1e6
+
+    print(f"Keypair signing overhead ({iterations} iterations, best of 5)")
+    for name, usec in results.items():
+        print(f"  {name:<15} {usec:8.1f} µs/buy")
+    print(f"  speedup         {results['decode + sign'] / results['cached + sign']:8.2f}x")
+
+
+def bench_scoring(candidates, admins):
+    """Screening a discovery batch: per-token stage loop vs one vectorized pass"""
+    import random
+    import batch_scoring
+    from decision_pipeline import DecisionPipeline, compile_profile
+
+    rng = random.Random(42)
+    tokens = [
+        {
+            "address": f"token{i}",
+            "liquidity": rng.choice([None, rng.uniform(0, 50000)]),
+            "volume_24h": rng.uniform(0, 100000),
+            "price_change_24h": rng.uniform(-90, 500),
+            "age_hours": rng.choice([None, rng.uniform(0, 72)]),
+            "website": rng.random() < 0.5,
+            "telegram": rng.random() < 0.5,
+            "twitter": rng.random() < 0.5
+        }
+        for i in range(candidates)
+    ]
+    profiles = [
+        compile_profile(
+            user_id,
+            {"min_liquidity": rng.choice([500, 1000, 5000]), "max_token_age_hours": rng.choice([0, 24])},
+            {"website": rng.random() < 0.5, "telegram": True, "twitter": rng.random() < 0.5}
+        )
+        for user_id in range(admins)
+    ]
+
+    def scalar():
+        pipeline = DecisionPipeline()
+        ranked = []
+        for token in tokens:
+            accepting = pipeline._screen_stages(token, profiles)
+            if accepting and pipeline.check_socials(token, accepting):
+                ranked.append(token)
+        ranked.sort(key=lambda token: token.get("liquidity") or 0, reverse=True)
+        return ranked
+
+    def vectorized():
+        return batch_scoring.rank(
+            batch_scoring.CandidateBatch(tokens),
+            batch_scoring.ProfileMatrix(profiles),
+            socials=True
+        )
+
+    results = {}
+    for name, fn in (("scalar", scalar), ("vectorized", vectorized)):
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        results[name] = best * 1e3
+
+    accepted = len(vectorized()[0])
+    print(f"Screening {candidates} candidates for {admins} admins (best of 5, {accepted} accepted)")
+    for name, msec in results.items():
+        print(f"  {name:<15} {msec:8.2f} ms/cycle")
+    print(f"  speedup         {results['scalar'] / results['vectorized']:8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    keypair_parser = subparsers.add_parser("keypair", help="keypair decode vs cached signing")
+    keypair_parser.add_argument("--iterations", type=int, default=2000)
+
+    scoring_parser = subparsers.add_parser("scoring", help="per-token vs vectorized candidate screening")
+    scoring_parser.add_argument("--candidates", type=int, default=10000)
+    scoring_parser.add_argument("--admins", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "keypair":
+        bench_keypair(args.iterations)
+    elif args.benchmark == "scoring":
+        bench_scoring(args.candidates, args.admins)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
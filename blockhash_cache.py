@@ -0,0 +1,121 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A blockhash is valid for this many blocks: lastValidBlockHeight is the
+# block height at which it was fetched plus this
+MAX_PROCESSING_AGE = 150
+
+# Average block time, used to extrapolate the block height between refreshes
+SLOT_SECONDS = 0.4
+
+
+class BlockhashCache:
+    """
+    Keep a recent blockhash (and its last valid block height) in memory
+
+    A background task calls ``getLatestBlockhash`` every ``refresh_interval``
+    seconds, so transactions built locally can be signed without a round-trip
+    in the buy path. Because ``lastValidBlockHeight`` is the current block
+    height plus MAX_PROCESSING_AGE, the cache also knows (to within a few
+    blocks) the current block height, which lets callers tell that a
+    transaction's blockhash has expired without asking the RPC.
+    """
+
+    def __init__(self, http_pool, rpc_url, refresh_interval=2.0, commitment="confirmed"):
+        self.http = http_pool
+        self.rpc_url = rpc_url
+        self.refresh_interval = refresh_interval
+        self.commitment = commitment
+        self.blockhash = None
+        self.last_valid_block_height = None
+        self.fetched_at = 0.0
+        self.task = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return self.task
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def is_fresh(self):
+        """True while the cached blockhash was refreshed recently enough to trust"""
+        return self.blockhash is not None and time.monotonic() - self.fetched_at < max(self.refresh_interval * 5, 10.0)
+
+    async def get(self):
+        """
+        Get a recent blockhash, fetching one only if the cache is not fresh
+
+        Returns:
+            tuple: (blockhash, last_valid_block_height)
+        """
+        if not self.is_fresh():
+            await self.refresh()
+        return self.blockhash, self.last_valid_block_height
+
+    def block_height(self):
+        """
+        Estimated current block height, or None when the cache is not fresh
+        """
+        if not self.is_fresh():
+            return None
+        elapsed_blocks = int((time.monotonic() - self.fetched_at) / SLOT_SECONDS)
+        return self.last_valid_block_height - MAX_PROCESSING_AGE + elapsed_blocks
+
+    def is_expired(self, last_valid_block_height):
+        """
+        True if a transaction with this last valid block height can no longer land
+
+        Returns False when unknown (no height given or the cache is not fresh).
+        """
+        height = self.block_height()
+        if height is None or not last_valid_block_height:
+            return False
+        return height > last_valid_block_height
+
+    async def refresh(self):
+        client = self.http.get_client(self.rpc_url)
+        response = await client.post(self.rpc_url, json={
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getLatestBlockhash",
+            "params": [{"commitment": self.commitment}]
+        })
+        if response.status_code != 200:
+            raise ValueError(f"getLatestBlockhash returned HTTP {response.status_code}")
+        value = (response.json().get("result") or {}).get("value") or {}
+        if not value.get("blockhash"):
+            raise ValueError("getLatestBlockhash returned no blockhash")
+        self.blockhash = value["blockhash"]
+        self.last_valid_block_height = value.get("lastValidBlockHeight")
+        self.fetched_at = time.monotonic()
+        self.refreshes += 1
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error refreshing blockhash: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stats(self):
+        return {
+            "blockhash": self.blockhash,
+            "last_valid_block_height": self.last_valid_block_height,
+            "age": round(time.monotonic() - self.fetched_at, 1) if self.blockhash else None,
+            "refreshes": self.refreshes,
+            "errors": self.errors
+        }
@@ -0,0 +1,98 @@
+import heapq
+import time
+import logging
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+class BuyScheduler:
+    """
+    Priority queue of buy candidates, best score first
+
+    Candidates from every discovery cycle go into one heap, so a strong token
+    found later is bought ahead of weaker ones still waiting. Candidates older
+    than ``ttl`` seconds are dropped instead of being bought late. Scores
+    come from the screening pass (batch_scoring.CandidateBatch.scores).
+
+    Args:
+        ttl: Seconds a candidate stays eligible after it was queued
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self.heap = []  # (-score, seq, expires_at, token, profiles)
+        self.pending = {}  # token address -> seq of its live heap entry
+        self.seq = count()
+        self.pushed = 0
+        self.popped = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def push(self, token, profiles, score):
+        """
+        Queue a candidate for the admins whose filters accepted it
+
+        Queuing an address that is already pending replaces the old entry.
+
+        Args:
+            token: Screened token dict
+            profiles: UserProfiles of the admins that accept it
+            score: The token's ranking score from DecisionPipeline.screen_batch
+
+        Returns:
+            float: The candidate's score
+        """
+        seq = next(self.seq)
+        self.pending[token["address"]] = seq
+        heapq.heappush(self.heap, (-score, seq, time.time() + self.ttl, token, profiles))
+        self.pushed += 1
+        return score
+
+    def pop(self):
+        """
+        Take the best pending candidate
+
+        Returns:
+            tuple: (token, profiles, score), or None when nothing is pending
+        """
+        now = time.time()
+        while self.heap:
+            neg_score, seq, expires_at, token, profiles = heapq.heappop(self.heap)
+            address = token["address"]
+            if self.pending.get(address) != seq:
+                continue  # Replaced by a newer entry
+            del self.pending[address]
+            if expires_at < now:
+                self.expired += 1
+                logger.info(f"Buy candidate {token.get('symbol') or address} expired after {self.ttl:.0f}s in the queue")
+                continue
+            self.popped += 1
+            return token, profiles, -neg_score
+        return None
+
+    def expire(self):
+        """Drop candidates past their TTL without waiting for them to reach the top"""
+        now = time.time()
+        kept = []
+        for entry in self.heap:
+            address = entry[3]["address"]
+            if self.pending.get(address) != entry[1]:
+                continue
+            if entry[2] < now:
+                del self.pending[address]
+                self.expired += 1
+                continue
+            kept.append(entry)
+        heapq.heapify(kept)
+        self.heap = kept
+
+    def stats(self):
+        """Counters for logging and /status"""
+        return {
+            "pending": len(self.pending),
+            "pushed": self.pushed,
+            "dispatched": self.popped,
+            "expired": self.expired
+        }
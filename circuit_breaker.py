@@ -0,0 +1,111 @@
+import time
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker with exponential backoff and jitter
+
+    Closed: requests go through. After ``failure_threshold`` consecutive
+    failures the breaker opens and every request is skipped without touching
+    the network. Once the backoff delay has passed it goes half-open and lets
+    a single trial request through: success closes it again, failure re-opens
+    it with the delay doubled (up to ``max_delay``). ``jitter`` spreads retries
+    by up to that fraction of the delay.
+
+    Callers check ``allow()`` before a request and report the outcome with
+    ``record_success()`` / ``record_failure()`` (or ``record_response()``).
+    A trial request that is cancelled before it finished calls ``release()``.
+    """
+
+    def __init__(self, name, failure_threshold=3, base_delay=5.0, max_delay=300.0, jitter=0.5, trial_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.trial_timeout = trial_timeout
+        self.state = CLOSED
+        self.failures = 0          # Consecutive failures
+        self.opened_count = 0      # Consecutive times opened, drives the backoff
+        self.retry_at = 0.0
+        self.trial_started = None
+        self.skipped = 0
+        self.last_error = None
+
+    def allow(self):
+        """True if a request to this source should be made now"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self.retry_at:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, sending a trial request")
+
+        if self.state == HALF_OPEN:
+            # One trial at a time; a trial that never reported back is given up on
+            if self.trial_started is not None and now - self.trial_started < self.trial_timeout:
+                self.skipped += 1
+                return False
+            self.trial_started = now
+        return True
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"Circuit for {self.name} closed, source recovered")
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.trial_started = None
+
+    def record_failure(self, error=None):
+        self.failures += 1
+        self.last_error = str(error) if error is not None else None
+        self.trial_started = None
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            delay = min(self.base_delay * 2 ** self.opened_count, self.max_delay)
+            delay *= 1 + random.uniform(0, self.jitter)
+            self.opened_count += 1
+            self.state = OPEN
+            self.retry_at = time.monotonic() + delay
+            logger.warning(f"Circuit for {self.name} open after {self.failures} failure(s), retrying in {delay:.0f}s")
+
+    def record_response(self, status_code):
+        """Rate limiting (429) and server errors count as failures, anything else as success"""
+        if status_code == 429 or status_code >= 500:
+            self.record_failure(f"HTTP {status_code}")
+        else:
+            self.record_success()
+
+    def release(self):
+        """Give up a trial request without a verdict (e.g. it was cancelled)"""
+        self.trial_started = None
+
+    def retry_in(self):
+        """Seconds until an open breaker lets a trial through"""
+        return max(0.0, self.retry_at - time.monotonic()) if self.state == OPEN else 0.0
+
+    def describe(self):
+        """Short human-readable state for /status"""
+        if self.state == CLOSED:
+            return "Active ✅" if not self.failures else f"Degraded ⚠️ ({self.failures} recent failure(s))"
+        if self.state == HALF_OPEN:
+            return "Recovering 🔄"
+        return f"Backing off ⏸ (retry in {self.retry_in():.0f}s)"
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "retry_in": round(self.retry_in(), 1),
+            "last_error": self.last_error
+        }
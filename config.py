@@ -16,3 +16,25 @@ BIRDEYE_API_KEY = "8fmEhQmCaKwsgxGEQ5uQRPvK23eJ7BBqKxQspKj7"
 # Other global settings
 MAX_SCAN_RESULTS = 5
 DEFAULT_SNIPE_AMOUNT = 0.005
+
+# Token metadata enrichment (auto-buy discovery)
+METADATA_MAX_IN_FLIGHT = 8        # Max tokens enriched concurrently
+METADATA_TOKEN_DEADLINE = 8.0     # Seconds allowed per token before slow sources are dropped
+
+# Event loop lag monitor: log any callback blocking the loop longer than this
+LOOP_LAG_THRESHOLD_MS = 100
+
+# Push-based token discovery (auto-buy loop consumes from the discovery queue)
+DISCOVERY_POLL_INTERVAL = 5.0     # Seconds between polls for sources without push support
+DISCOVERY_BATCH_SIZE = 50         # Max tokens handled per auto-buy cycle
+DISCOVERY_BATCH_WAIT = 5.0        # Seconds to wait for new tokens before re-checking auto-buy state
+
+# Processed-token dedup index for the auto-buy loop
+PROCESSED_TOKENS_MAX = 5000                     # Max tokens remembered (oldest evicted first)
+PROCESSED_TOKENS_TTL = 3600                     # Seconds before a token may be processed again
+PROCESSED_TOKENS_FILE = "processed_tokens.json"  # Set to None to keep the index in memory only
+
+# Buy scheduler: screened candidates wait in a priority queue, best score first
+BUY_SCHEDULER_TTL = 60.0          # Seconds a candidate stays eligible before it expires
+BUY_SCHEDULER_MAX_PER_CYCLE = 5   # Candidates bought per cycle before checking for new discoveries
+BUY_SCORE_WEIGHTS = {}            # Overrides for batch_scoring.DEFAULT_SCORE_WEIGHTS
@@ -0,0 +1,299 @@
+import logging
+from typing import NamedTuple
+
+from token_values import token_number
+
+# NumPy is needed for batch screening; without it tokens are screened one by one
+try:
+    import batch_scoring
+except ImportError:
+    batch_scoring = None
+
+logger = logging.getLogger(__name__)
+
+# Stages in the order they run, cheapest first. Everything before "socials"
+# only uses data the discovery sources already provide; "socials" needs the
+# metadata lookup, which is only done for tokens still wanted by some admin.
+STAGES = ("dedup", "blacklist", "liquidity", "age", "socials")
+
+DEFAULT_FILTERS = {"website": True, "telegram": True, "twitter": True}
+
+DEFAULT_SETTINGS = {
+    "min_liquidity": 500,
+    "max_token_age_hours": 0,
+    "max_buy_per_token": 0.1,
+    "buy_slippage": 20,
+    "tx_priority_lamports": 1500,
+    "priority_fee_policy": "fixed",
+    "priority_fee_cap": 0.005,
+    "mev_protection": False,
+    "ignore_socials": False,
+    "blacklisted_addresses": [],
+    "summary_interval_mins": 10,
+    "summary_buy_threshold": 3
+}
+
+
+class UserProfile(NamedTuple):
+    """
+    Immutable, precompiled view of one admin's auto-buy settings
+
+    Built by compile_profile() whenever the settings change so that deciding
+    for every admin is a tight loop over attributes, with no dict lookups or
+    default handling per token.
+    """
+
+    user_id: int
+    amount: float                   # Snipe amount with max_buy_per_token applied
+    min_liquidity: float
+    max_age_hours: float            # 0 means no age limit
+    blacklist: frozenset
+    required_socials: tuple         # Empty when socials are ignored
+    slippage: float
+    priority_fee_lamports: int      # Fixed priority fee
+    priority_fee_policy: str        # "fixed" or a percentile policy (see priority_fees)
+    priority_fee_cap: float
+    mev_protection: bool
+    summary_interval_mins: int
+    summary_buy_threshold: int
+
+    def buy_params(self):
+        """Parameters for WalletManager.buy_token"""
+        return {
+            "slippage": self.slippage,
+            "priority_fee_lamports": self.priority_fee_lamports,
+            "priority_fee_policy": self.priority_fee_policy,
+            "priority_fee_cap": self.priority_fee_cap,
+            "mev_protection": self.mev_protection
+        }
+
+
+def fixed_priority_fee_lamports(settings):
+    """
+    The admin's fixed priority fee in lamports
+
+    Settings from before the fee was stored in lamports carry ``tx_priority``
+    instead, which buy_token sent as ``tx_priority * 1e6`` lamports; it is
+    migrated to that same number of lamports so the fee paid does not change.
+    """
+    if "tx_priority_lamports" in settings:
+        return int(settings["tx_priority_lamports"])
+    return int(settings.get("tx_priority", 0.0015) * 1_000_000)
+
+
+def compile_profile(user_id, settings=None, filters=None, snipe_amount=0.005):
+    """
+    Compile an admin's settings, social filters and snipe amount into a UserProfile
+
+    Args:
+        user_id: Telegram user id
+        settings: The admin's bot_settings dict (defaults when None)
+        filters: The admin's USER_FILTERS dict (defaults when None)
+        snipe_amount: The admin's ADMIN_SNIPE_AMOUNTS entry
+
+    Returns:
+        UserProfile: The compiled profile
+    """
+    settings = settings or DEFAULT_SETTINGS
+    filters = filters if filters is not None else DEFAULT_FILTERS
+
+    # Apply max buy per token limit if set
+    amount = snipe_amount
+    max_buy = settings.get("max_buy_per_token", 0.1)
+    if max_buy > 0 and amount > max_buy:
+        amount = max_buy
+
+    if settings.get("ignore_socials", False):
+        required_socials = ()
+    else:
+        required_socials = tuple(field for field, enabled in filters.items() if enabled)
+
+    return UserProfile(
+        user_id=user_id,
+        amount=amount,
+        min_liquidity=settings.get("min_liquidity", 500),
+        max_age_hours=settings.get("max_token_age_hours", 0) or 0,
+        blacklist=frozenset(settings.get("blacklisted_addresses", [])),
+        required_socials=required_socials,
+        slippage=settings.get("buy_slippage", 20),
+        priority_fee_lamports=fixed_priority_fee_lamports(settings),
+        priority_fee_policy=settings.get("priority_fee_policy", "fixed"),
+        priority_fee_cap=settings.get("priority_fee_cap", 0.005),
+        mev_protection=settings.get("mev_protection", False),
+        summary_interval_mins=settings.get("summary_interval_mins", 10),
+        summary_buy_threshold=settings.get("summary_buy_threshold", 3)
+    )
+
+
+class ProfileRegistry:
+    """
+    Compiled UserProfiles by user id
+
+    Profiles are rebuilt only when an admin's settings change (see
+    ``rebuild``); the auto-buy loop just reads them. The settings a profile
+    was last compiled from are kept, so a rebuild without settings (e.g.
+    after a snipe amount change) keeps the admin's blacklist and thresholds.
+    """
+
+    def __init__(self):
+        self.profiles = {}
+        self.settings = {}
+
+    def get(self, user_id):
+        return self.profiles.get(user_id)
+
+    def rebuild(self, user_id, settings=None, filters=None, snipe_amount=0.005):
+        if settings is None:
+            settings = self.settings.get(user_id)
+        else:
+            self.settings[user_id] = settings
+        profile = compile_profile(user_id, settings, filters, snipe_amount)
+        self.profiles[user_id] = profile
+        return profile
+
+    def invalidate(self, user_id=None):
+        """Forget one profile (or all) so it is compiled again on next use"""
+        if user_id is None:
+            self.profiles = {}
+        else:
+            self.profiles.pop(user_id, None)
+
+
+class DecisionPipeline:
+    """
+    Staged auto-buy decision for discovered tokens
+
+    ``screen_batch()`` runs the cheap stages for a batch of tokens and every
+    admin profile (``screen()`` does the same for one token) and returns the
+    profiles that could still buy each token; ``check_socials()`` runs the
+    last stage after enrichment. A token counts as rejected at the first stage
+    after which no admin accepts it.
+    """
+
+    def __init__(self, score_weights=None):
+        self.score_weights = score_weights
+        self.rejections = {stage: 0 for stage in STAGES}
+        self.screened = 0
+        self.accepted = 0
+
+    def screen(self, token, processed_tokens, profiles):
+        """
+        Run the dedup, blacklist, liquidity and age stages
+
+        Args:
+            token: Discovered token dict
+            processed_tokens: Dedup index; the token is added once it passes dedup
+            profiles: Compiled UserProfiles of the admins
+
+        Returns:
+            list: The profiles that still accept the token
+        """
+        self.screened += 1
+        address = token.get("address")
+        if not address or address in processed_tokens:
+            self.rejections["dedup"] += 1
+            return []
+        processed_tokens.add(address)
+        return self._screen_stages(token, profiles)
+
+    def screen_batch(self, tokens, processed_tokens, profiles):
+        """
+        Run the dedup, blacklist, liquidity and age stages for a whole batch
+
+        With NumPy available the filters and the ranking score are computed
+        for all tokens x all admins in one vectorized pass (see batch_scoring);
+        without it the score is the token's liquidity.
+
+        Args:
+            tokens: Discovered token dicts
+            processed_tokens: Dedup index; tokens are added once they pass dedup
+            profiles: Compiled UserProfiles of the admins
+
+        Returns:
+            list: (token, accepting profiles, score) triples, best ranked first
+        """
+        if batch_scoring is None:
+            screened = [(token, self.screen(token, processed_tokens, profiles)) for token in tokens]
+            ranked = [(token, accepting, token_number(token, "liquidity") or 0.0) for token, accepting in screened if accepting]
+            ranked.sort(key=lambda item: item[2], reverse=True)
+            return ranked
+
+        fresh = []
+        for token in tokens:
+            self.screened += 1
+            address = token.get("address")
+            if not address or address in processed_tokens:
+                self.rejections["dedup"] += 1
+                continue
+            processed_tokens.add(address)
+            fresh.append(token)
+
+        if not fresh:
+            return []
+
+        ranked, rejections = batch_scoring.rank(
+            batch_scoring.CandidateBatch(fresh),
+            batch_scoring.ProfileMatrix(profiles),
+            weights=self.score_weights
+        )
+        for stage, count in rejections.items():
+            self.rejections[stage] += count
+        return ranked
+
+    def _screen_stages(self, token, profiles):
+        """Blacklist, liquidity and age stages for a single deduplicated token"""
+        address = token.get("address")
+        accepting = [profile for profile in profiles if address not in profile.blacklist]
+        if not accepting:
+            self.rejections["blacklist"] += 1
+            return []
+
+        # Tokens without liquidity data (e.g. fresh on-chain mints) are not rejected here
+        liquidity = token_number(token, "liquidity")
+        if liquidity is not None:
+            accepting = [profile for profile in accepting if liquidity >= profile.min_liquidity]
+            if not accepting:
+                self.rejections["liquidity"] += 1
+                return []
+
+        age_hours = token_number(token, "age_hours")
+        if age_hours is not None:
+            accepting = [profile for profile in accepting if not profile.max_age_hours or age_hours <= profile.max_age_hours]
+            if not accepting:
+                self.rejections["age"] += 1
+                return []
+
+        return accepting
+
+    def required_fields(self, profiles):
+        """Social fields the socials stage will look at for these admins"""
+        fields = set()
+        for profile in profiles:
+            fields.update(profile.required_socials)
+        return fields
+
+    def check_socials(self, token, profiles):
+        """
+        Run the socials stage on an enriched token
+
+        Returns:
+            list: The profiles whose social filters the token passes
+        """
+        accepting = [
+            profile for profile in profiles
+            if all(token.get(field) for field in profile.required_socials)
+        ]
+
+        if accepting:
+            self.accepted += 1
+        else:
+            self.rejections["socials"] += 1
+        return accepting
+
+    def stats(self):
+        """Counters for logging and /status"""
+        return {
+            "screened": self.screened,
+            "accepted": self.accepted,
+            "rejected": dict(self.rejections)
+        }
@@ -0,0 +1,349 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+
+from token_index import TokenIndex
+
+# Websocket support is optional; without it only polling/fake sources are available
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+# Programs whose logs announce new tokens / pools
+PUMP_FUN_PROGRAM_ID = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+RAYDIUM_AMM_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLYfQM9H24wFSUt1Mp8"
+
+# Mints that are never the "new" token in a pool
+QUOTE_MINTS = {
+    "So11111111111111111111111111111111111111112",   # Wrapped SOL
+    "EPjFWdd5AufqSSqeM2qEUDzN9ZwsTyuqeSbRo5V3jb5x",  # USDC
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY2HZu5HWKqnEhhq",  # USDT
+}
+
+
+class DiscoverySource:
+    """
+    Base class for token discovery sources
+
+    A source runs forever and calls ``emit(token)`` for every token it finds.
+    Tokens are dicts with at least an "address" and a "source" key.
+    """
+
+    name = "source"
+
+    async def run(self, emit):
+        raise NotImplementedError
+
+    async def stop(self):
+        """Release anything the source started besides ``run`` itself"""
+
+
+class PollingSource(DiscoverySource):
+    """
+    Long-poll adapter for APIs that do not offer push notifications
+
+    Calls an async fetch function (e.g. WalletManager.fetch_tokens_from_dexscreener)
+    every ``interval`` seconds and emits every token it returns.
+    """
+
+    def __init__(self, name, fetch, interval=5.0):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+
+    async def run(self, emit):
+        while True:
+            started = time.monotonic()
+            try:
+                for token in await self.fetch():
+                    await emit(token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling {self.name}: {e}")
+
+            # Keep a steady cadence regardless of how long the fetch took
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+
+class LogSubscriptionSource(DiscoverySource):
+    """
+    Streaming source built on the Solana ``logsSubscribe`` websocket
+
+    Every log notification for ``program_id`` that contains ``marker`` is
+    resolved to the new mint(s) via ``getTransaction`` and emitted immediately.
+    Reconnects with exponential backoff when the socket drops.
+
+    At most ``max_in_flight`` lookups run at once; notifications beyond
+    ``max_pending`` outstanding lookups are dropped rather than piling up
+    while the RPC node is slow.
+    """
+
+    def __init__(self, name, ws_url, rpc_url, program_id, marker, http_pool, commitment="processed",
+                 max_in_flight=8, max_pending=256):
+        self.name = name
+        self.ws_url = ws_url
+        self.rpc_url = rpc_url
+        self.program_id = program_id
+        self.marker = marker
+        self.http = http_pool
+        self.commitment = commitment
+        self.max_pending = max_pending
+        self.resolve_slots = asyncio.Semaphore(max_in_flight)
+        self.resolving = set()
+        self.dropped = 0
+
+    async def run(self, emit):
+        if websockets is None:
+            logger.warning(f"websockets package not installed, {self.name} stream disabled")
+            return
+
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+                    await ws.send(json.dumps({
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "logsSubscribe",
+                        "params": [{"mentions": [self.program_id]}, {"commitment": self.commitment}]
+                    }))
+                    logger.info(f"📡 Subscribed to {self.name} logs")
+                    backoff = 1.0
+
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        value = message.get("params", {}).get("result", {}).get("value", {})
+                        if not value or value.get("err"):
+                            continue
+                        if not any(self.marker in line for line in value.get("logs", [])):
+                            continue
+
+                        # Resolve in the background so the socket keeps draining
+                        if len(self.resolving) >= self.max_pending:
+                            self.dropped += 1
+                            continue
+                        task = asyncio.create_task(self._resolve_and_emit(value.get("signature"), emit))
+                        self.resolving.add(task)
+                        task.add_done_callback(self.resolving.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.name} stream error: {e} - reconnecting in {backoff:.0f}s")
+
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, 60.0)
+
+    async def stop(self):
+        """Cancel the lookups still in flight"""
+        tasks, self.resolving = self.resolving, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _resolve_and_emit(self, signature, emit):
+        """Look up the transaction behind a log notification and emit its new mints"""
+        if not signature:
+            return
+        async with self.resolve_slots:
+            await self._resolve(signature, emit)
+
+    async def _resolve(self, signature, emit):
+        try:
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getTransaction",
+                "params": [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"}]
+            }
+            # The transaction is usually not queryable the instant its logs stream in
+            for _ in range(3):
+                response = await self.http.get_client(self.rpc_url).post(self.rpc_url, json=payload)
+                result = response.json().get("result") if response.status_code == 200 else None
+                if result:
+                    break
+                await asyncio.sleep(0.5)
+            else:
+                return
+
+            mints = []
+            for balance in (result.get("meta") or {}).get("postTokenBalances", []):
+                mint = balance.get("mint")
+                if mint and mint not in QUOTE_MINTS and mint not in mints:
+                    mints.append(mint)
+
+            for mint in mints:
+                await emit({
+                    "address": mint,
+                    "symbol": "UNKNOWN",
+                    "age_hours": 0,
+                    "signature": signature,
+                    "source": self.name
+                })
+        except Exception as e:
+            logger.error(f"Error resolving {self.name} transaction {signature}: {e}")
+
+
+class FakeSource(DiscoverySource):
+    """
+    Offline source that emits made-up tokens, for local testing
+
+    Args:
+        tokens: Optional list of token dicts to emit (in order). When omitted,
+            random tokens are generated forever.
+        interval: Seconds between tokens
+    """
+
+    name = "fake"
+
+    def __init__(self, tokens=None, interval=1.0):
+        self.tokens = tokens
+        self.interval = interval
+
+    async def run(self, emit):
+        if self.tokens is not None:
+            for token in self.tokens:
+                await emit(dict(token))
+                await asyncio.sleep(self.interval)
+            return
+
+        count = 0
+        while True:
+            count += 1
+            await emit({
+                "address": f"FakeToken{count}{''.join(random.choices('0123456789abcdef', k=8))}",
+                "symbol": f"FAKE{count}",
+                "liquidity": random.randint(100, 20000),
+                "age_hours": random.uniform(0, 2),
+                "source": self.name
+            })
+            await asyncio.sleep(self.interval)
+
+
+class DiscoveryEngine:
+    """
+    Runs discovery sources concurrently and feeds new tokens into a queue
+
+    The auto-buy loop consumes from the queue instead of polling on a timer,
+    so a token is acted on as soon as any source reports it. Tokens queued
+    in the last ``seen_ttl`` seconds are dropped, as are tokens that sat in
+    the queue longer than ``max_age`` seconds. A token that could not be
+    queued (queue full) or went stale is not remembered, so the next report
+    of it gets another chance.
+    """
+
+    def __init__(self, sources, maxsize=1000, max_age=120.0, seen_limit=5000, seen_ttl=600.0):
+        self.sources = list(sources)
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.max_age = max_age
+        self.seen = TokenIndex(seen_limit, seen_ttl)
+        self.tasks = []
+        self.dropped = 0
+
+    def start(self):
+        """Start every source in the background"""
+        if self.tasks:
+            return
+        for source in self.sources:
+            task = asyncio.create_task(self._run_source(source))
+            self.tasks.append(task)
+        logger.info(f"🛰️ Discovery engine started with sources: {', '.join(s.name for s in self.sources)}")
+
+    async def stop(self):
+        """Cancel every source"""
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for source in self.sources:
+            await source.stop()
+
+    async def _run_source(self, source):
+        try:
+            await source.run(self.emit)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Discovery source {source.name} stopped: {e}")
+
+    async def emit(self, token):
+        """Queue a token unless it was already queued recently"""
+        address = token.get("address")
+        if not address or address in self.seen:
+            return
+
+        token.setdefault("discovered_at", time.time())
+        try:
+            self.queue.put_nowait(token)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self.seen.add(address)
+
+    async def get_batch(self, max_items=50, timeout=5.0):
+        """
+        Wait for newly discovered tokens
+
+        Blocks until at least one token arrives (or ``timeout`` seconds pass),
+        then returns it together with everything else already queued, up to
+        ``max_items``.
+
+        Returns:
+            list: Token dicts in discovery order (possibly empty)
+        """
+        batch = []
+        try:
+            batch.append(await asyncio.wait_for(self.queue.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            return batch
+
+        while len(batch) < max_items and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        cutoff = time.time() - self.max_age
+        fresh = []
+        for token in batch:
+            if token.get("discovered_at", 0) >= cutoff:
+                fresh.append(token)
+            else:
+                self.dropped += 1
+                self.seen.discard(token["address"])
+        return fresh
+
+
+def create_discovery_engine(wallet_manager, poll_interval=5.0, use_fake=None):
+    """
+    Build the default discovery engine for the auto-buy loop
+
+    Uses streaming log subscriptions for pump.fun and Raydium when the
+    ``websockets`` package is available, plus polling adapters for DexScreener,
+    pump.fun and Birdeye. Set DISCOVERY_FAKE_SOURCE=1 to use the offline fake
+    source instead.
+    """
+    if use_fake is None:
+        use_fake = os.getenv("DISCOVERY_FAKE_SOURCE", "0") == "1"
+    if use_fake:
+        return DiscoveryEngine([FakeSource()])
+
+    sources = [
+        PollingSource("dexscreener", wallet_manager.fetch_tokens_from_dexscreener, interval=poll_interval),
+        PollingSource("pump.fun", wallet_manager.fetch_tokens_from_pump_fun, interval=poll_interval),
+        PollingSource("birdeye", wallet_manager.fetch_tokens_from_birdeye, interval=max(poll_interval, 30.0)),
+    ]
+
+    if websockets is not None:
+        rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+        ws_url = os.getenv("SOLANA_WS_URL", rpc_url.replace("https://", "wss://").replace("http://", "ws://"))
+        sources.extend([
+            LogSubscriptionSource("pump.fun", ws_url, rpc_url, PUMP_FUN_PROGRAM_ID, "Instruction: Create", wallet_manager.http),
+            LogSubscriptionSource("raydium", ws_url, rpc_url, RAYDIUM_AMM_PROGRAM_ID, "initialize2", wallet_manager.http),
+        ])
+
+    return DiscoveryEngine(sources)
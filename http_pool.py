@@ -0,0 +1,103 @@
+import os
+import logging
+import importlib.util
+from urllib.parse import urlsplit
+
+import httpx
+
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Default request timeout (seconds) for each upstream host
+DEFAULT_TIMEOUT = 10.0
+HOST_TIMEOUTS = {
+    "api.dexscreener.com": 12.0,
+    "api.pump.fun": 10.0,
+    "public-api.birdeye.so": 10.0,
+    "api.solscan.io": 10.0,
+    "quote-api.jup.ag": 15.0,
+}
+
+# Connection pool limits applied to every host client
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 60.0
+
+# Pacing for the Solana RPC endpoint (requests per second, burst); public
+# mainnet-beta allows roughly 10 requests per second per IP
+RPC_RATE_LIMIT = (10.0, 20)
+
+
+class HttpClientPool:
+    """
+    Long-lived, keep-alive httpx clients, one per upstream host
+
+    Reusing a client per host avoids a fresh TCP+TLS handshake on every call.
+    Clients are created lazily on first use and must be closed with aclose()
+    when the bot shuts down. Every request is paced by the per-host token
+    buckets in ``rate_limiter`` before it is sent (see rate_limiter.py).
+    """
+
+    def __init__(self, host_timeouts=None, default_timeout=DEFAULT_TIMEOUT, http2=HTTP2_AVAILABLE, rate_limiter=None):
+        self.host_timeouts = dict(HOST_TIMEOUTS)
+        if host_timeouts:
+            self.host_timeouts.update(host_timeouts)
+
+        # The Solana RPC endpoint is configurable, give it the default timeout
+        rpc_host = urlsplit(os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")).hostname
+        if rpc_host:
+            self.host_timeouts.setdefault(rpc_host, default_timeout)
+
+        self.rate_limiter = rate_limiter or RateLimiter()
+        if rpc_host and rpc_host not in self.rate_limiter.host_limits:
+            self.rate_limiter.set_limit(rpc_host, *RPC_RATE_LIMIT)
+
+        self.default_timeout = default_timeout
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+        self.clients = {}
+
+    def get_client(self, url):
+        """
+        Get the shared client for the host of a URL
+
+        Args:
+            url: Any URL on the upstream host
+
+        Returns:
+            httpx.AsyncClient: The pooled client for that host
+        """
+        host = urlsplit(url).hostname or ""
+        client = self.clients.get(host)
+        if client is None or client.is_closed:
+            timeout = self.host_timeouts.get(host, self.default_timeout)
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+                event_hooks={"request": [self._pace]}
+            )
+            self.clients[host] = client
+        return client
+
+    async def _pace(self, request):
+        """httpx request hook: wait for the host's rate limit before sending"""
+        await self.rate_limiter.acquire(request.url.host)
+
+    async def aclose(self):
+        """Close every pooled client"""
+        clients = list(self.clients.values())
+        self.clients = {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client: {e}")
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Detect callbacks that block the asyncio event loop
+
+    A heartbeat coroutine sleeps for ``interval`` seconds and measures how late
+    it wakes up. Any delay above ``threshold_ms`` means something ran on the
+    loop without yielding (e.g. a synchronous HTTP call) and is logged.
+
+    With ``debug=True`` asyncio's own slow-callback logging is switched on as
+    well, which names the offending callback at the cost of some overhead.
+    """
+
+    def __init__(self, threshold_ms=100, interval=0.25, debug=False):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.debug = debug
+        self.max_lag_ms = 0.0
+        self.lag_events = 0
+        self.last_lag_ms = 0.0
+
+    async def run(self, stop_event=None):
+        """Run the heartbeat until cancelled or ``stop_event`` is set"""
+        loop = asyncio.get_running_loop()
+        if self.debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold_ms / 1000
+            logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+        logger.info(f"⏱️ Loop lag monitor started (threshold {self.threshold_ms} ms)")
+        while stop_event is None or not stop_event.is_set():
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.monotonic() - expected) * 1000
+            self.last_lag_ms = lag_ms
+
+            if lag_ms > self.threshold_ms:
+                self.lag_events += 1
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                logger.warning(f"⚠️ Event loop blocked for {lag_ms:.0f} ms (threshold {self.threshold_ms} ms)")
+
+    def stats(self):
+        """Get lag statistics for status reporting"""
+        return {
+            "threshold_ms": self.threshold_ms,
+            "lag_events": self.lag_events,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "last_lag_ms": round(self.last_lag_ms, 1)
+        }
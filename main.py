@@ -10,6 +10,12 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 from telegram.helpers import escape_markdown
 from wallet import wallet_manager
+from loop_monitor import LoopLagMonitor
+from discovery import create_discovery_engine
+from token_index import TokenIndex
+from decision_pipeline import DecisionPipeline, ProfileRegistry, fixed_priority_fee_lamports
+from buy_scheduler import BuyScheduler
+from priority_fees import FEE_POLICIES
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -19,6 +25,14 @@ load_dotenv()
 from config import BIRDEYE_API_KEY
 os.environ["BIRDEYE_API_KEY"] = BIRDEYE_API_KEY
 
+# Auto-buy pipeline tuning
+from config import (
+    METADATA_MAX_IN_FLIGHT, METADATA_TOKEN_DEADLINE, LOOP_LAG_THRESHOLD_MS,
+    DISCOVERY_POLL_INTERVAL, DISCOVERY_BATCH_SIZE, DISCOVERY_BATCH_WAIT,
+    PROCESSED_TOKENS_MAX, PROCESSED_TOKENS_TTL, PROCESSED_TOKENS_FILE,
+    BUY_SCHEDULER_TTL, BUY_SCHEDULER_MAX_PER_CYCLE, BUY_SCORE_WEIGHTS
+)
+
 # Enable logging with reduced verbosity
 logging.basicConfig(
 format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.WARNING
@@ -45,6 +59,17 @@ AUTHENTICATED_USERS = set()
 ADMIN_SNIPE_AMOUNTS = {}
 # Track each user's filter preferences
 USER_FILTERS = {}
+# Compiled auto-buy profiles, rebuilt when settings, filters or snipe amounts change
+USER_PROFILES = ProfileRegistry()
+
+def refresh_user_profile(user_id, settings=None):
+    """
+    Recompile a user's auto-buy profile from their settings, filters and snipe amount
+
+    Handlers pass the user's ``context.bot_settings`` entry; without one the
+    settings the profile was last compiled from are reused.
+    """
+    return USER_PROFILES.rebuild(user_id, settings, USER_FILTERS.get(user_id), ADMIN_SNIPE_AMOUNTS.get(user_id, 0.005))
 
 def is_authenticated(user_id):
     # Make sure user_id is a valid integer or comparable type
@@ -59,9 +84,96 @@ def is_authenticated(user_id):
             async def auto_buy_loop(app):
                 await asyncio.sleep(5)
                 low_balance_warnings = set()  # Track users who have been warned about low balance
-                processed_tokens = set()  # Track tokens we've already processed
+                processed_tokens = TokenIndex(PROCESSED_TOKENS_MAX, PROCESSED_TOKENS_TTL, PROCESSED_TOKENS_FILE)  # Track tokens we've already processed
+                decision_pipeline = DecisionPipeline(score_weights=BUY_SCORE_WEIGHTS)  # Staged buy decision with per-stage rejection counters
+                app.decision_pipeline = decision_pipeline
+                buy_scheduler = BuyScheduler(ttl=BUY_SCHEDULER_TTL)  # Pending buys, best candidate first
+                app.buy_scheduler = buy_scheduler
                 last_summary_time = 0
                 buy_count_since_last_summary = 0
+                pending_reports = set()  # Buy reports waiting for their transaction to land
+
+                async def report_buy(token, candidate, result, chat_id):
+                    """Notify about one wallet's buy once its outcome is known (awaits the landing task if it is still in flight)"""
+                    nonlocal last_summary_time, buy_count_since_last_summary
+                    if asyncio.isfuture(result):
+                        result = await result
+
+                    token_address = token.get("address")
+                    symbol = token.get("symbol")
+                    website = token.get("website")
+                    telegram = token.get("telegram")
+                    twitter = token.get("twitter")
+                    source = token.get("source", "birdeye")
+                    user_id = candidate["user_id"]
+                    username = candidate["username"]
+                    profile = candidate["profile"]
+                    amount = candidate["amount"]
+
+                    try:
+                        if chat_id:
+                            if result.get("success"):
+                                # NOW we log it since we're buying
+                                import datetime
+                                current_time = datetime.datetime.now().strftime("%H:%M:%S")
+                                logger.info(f"[BUY][{current_time}] @{username} sniped ${symbol}")
+                                logger.info(f"🔹 Token: ${symbol}")
+                                logger.info(f"🔹 Amount: {amount} SOL")
+                                logger.info(f"🔹 Tx: {result['tx_signature'][:8]}...{result['tx_signature'][-4:]}")
+                                logger.info(f"🔹 Explorer: {result['explorer_url']}")
+
+                                buy_count_since_last_summary += 1
+
+                                # Send individual notification (for now)
+                                source_emoji = "🔍" if source == "birdeye" else "🔥" if source == "pump.fun" else "📊"
+                                social_info = []
+                                if website:
+                                    social_info.append("🌐 Website")
+                                if telegram:
+                                    social_info.append("💬 Telegram")
+                                if twitter:
+                                    social_info.append("🐦 Twitter")
+
+                                social_text = " • ".join(social_info) if social_info else "No social links"
+
+                                buttons = [
+                                    [InlineKeyboardButton("🔍 View on Solscan", url=result['explorer_url'])],
+                                    [InlineKeyboardButton("🔍 View on Birdeye", url=f"https://birdeye.so/token/{token_address}?chain=solana")]
+                                ]
+
+                                reply_markup = InlineKeyboardMarkup(buttons)
+                                await app.bot.send_message(
+                                    chat_id=chat_id,
+                                    text=f"🎯 *Auto-Sniped Token for @{username}*\n\n"
+                                    f"Token: `{symbol}`\n"
+                                    f"Amount: {amount} SOL\n"
+                                    f"Source: {source_emoji} {source.capitalize()}\n"
+                                    f"Socials: {social_text}\n",
+                                    parse_mode="Markdown",
+                                    disable_web_page_preview=True,
+                                    reply_markup=reply_markup
+                                )
+
+
+                            else:
+                                # Only notify about failed purchases
+                                await app.bot.send_message(
+                                    chat_id=chat_id,
+                                    text=f"❌ *Auto-Buy Failed for @{username}*\n\n"
+                                    f"Token: `{symbol}`\nReason: {result.get('error', 'Unknown error')}",
+                                    parse_mode="Markdown"
+                                )
+
+                        # Check if it's time to send a summary
+                        import time
+                        current_time = time.time()
+                        interval_seconds = profile.summary_interval_mins * 60
+                        if current_time - last_summary_time >= interval_seconds or buy_count_since_last_summary >= profile.summary_buy_threshold:
+                            await send_auto_buy_summary(app, user_id)
+                            last_summary_time = current_time
+                            buy_count_since_last_summary = 0
+                    except Exception as e:
+                        logger.error(f"Error reporting buy of ${symbol} for @{username}: {e}")
 
                 # Debug counter to track scanning cycles
                 scan_cycle_count = 0
@@ -73,6 +185,11 @@ def is_authenticated(user_id):
                     # Print starting message to confirm auto-buy is running
                     logger.info("🚀 Auto-buy loop started - will log scanning cycles and transactions")
 
+                    # Start push-based token discovery; the loop below consumes from its queue
+                    if not hasattr(app, 'discovery_engine'):
+                        app.discovery_engine = create_discovery_engine(wallet_manager, poll_interval=DISCOVERY_POLL_INTERVAL)
+                    app.discovery_engine.start()
+
                     try:
                         # Use while not stop_event for cleaner cancellation
                         while not app.stop_event.is_set():
@@ -91,75 +208,86 @@ def is_authenticated(user_id):
                                     logger.info(f"[INFO][{current_time}] Auto-buy ENABLED - Scanning for new tokens...")
                                     wallet_manager.last_status_time = time.time()
 
-                                    # Get tokens from multiple sources (silently - we'll only log buys)
+                                    # Wait for newly discovered tokens (DexScreener, pump.fun, Birdeye and on-chain
+                                    # log streams) instead of sleeping a fixed interval between scans
+                                    discovered_tokens = await app.discovery_engine.get_batch(
+                                        max_items=DISCOVERY_BATCH_SIZE,
+                                        # Don't block on discovery while candidates are still waiting to be bought
+                                        timeout=0.1 if len(buy_scheduler) else DISCOVERY_BATCH_WAIT
+                                    )
+                                    # Cheap decision stages first (dedup, blacklist, liquidity, age) on the data the
+                                    # discovery sources already provide; only tokens some admin could still buy go on
+                                    user_profiles = [
+                                        USER_PROFILES.get(user_id) or refresh_user_profile(user_id)
+                                        for user_id in AUTHENTICATED_USERS
+                                    ]
+                                    candidates = {}  # token address -> profiles of the admins that still accept it
+                                    scores = {}  # token address -> ranking score from the screening pass
                                     tokens_to_process = []
-
-                                    # Primary source: Dexscreener (most reliable for new listings)
+                                    # Screened and ranked for all tokens x all admins in one vectorized pass
+                                    for token, accepting, score in decision_pipeline.screen_batch(discovered_tokens, processed_tokens, user_profiles):
+                                        candidates[token["address"]] = accepting
+                                        scores[token["address"]] = score
+                                        tokens_to_process.append(token)
+                                    if not tokens_to_process and not len(buy_scheduler):
+                                        processed_tokens.save()
+                                        continue
+
+                                    # Start Jupiter quotes for likely buys now so they are ready once the filters pass
+                                    if os.getenv("USE_PROCESS_BUY", "0") != "1":
+                                        for token in tokens_to_process:
+                                            for profile in candidates[token["address"]]:
+                                                wallet_manager.prefetch_buy_quote(token["address"], profile.amount, profile.slippage)
+
+                                    # Social lookups are the expensive stage: only enrich tokens an admin still wants
+                                    # socials for, and stop each lookup once the fields those admins check are found
+                                    tokens_to_enrich = [
+                                        token for token in tokens_to_process
+                                        if any(profile.required_socials for profile in candidates[token["address"]])
+                                    ]
+                                    required_fields = decision_pipeline.required_fields(
+                                        profile for profiles in candidates.values() for profile in profiles
+                                    )
+
+                                    # Get social data for all new tokens at once (bounded concurrency, per-token deadline)
                                     try:
-                                        # Reduced logging - only log errors
-                                        dexscreener_tokens = await wallet_manager.fetch_tokens_from_dexscreener()
-                                        for token in dexscreener_tokens:
-                                            if token.get("address") not in processed_tokens:
-                                                # Get social data for this token from Birdeye
-                                                token_metadata = await wallet_manager.get_token_metadata(token.get("address"))
-                                                token.update(token_metadata)  # Add social links to the token data
-                                                tokens_to_process.append(token)
-            except Exception as e:
-                logger.error(f"Error fetching from Dexscreener: {e}")
-                pass
-
-                                                    # Secondary source: Pump.fun (good for trending tokens)
-                                                    try:
-                                                        # Reduced logging - only log errors
-                                                        pump_fun_tokens = await wallet_manager.fetch_tokens_from_pump_fun()
-                                                        for token in pump_fun_tokens:
-                                                            if token.get("address") not in processed_tokens:
-                                                                # Get social data for this token from Birdeye
-                                                                token_metadata = await wallet_manager.get_token_metadata(token.get("address"))
-                                                                token.update(token_metadata)  # Add social links to the token data
-                                                                tokens_to_process.append(token)
-                                                                except Exception as e:
-                                                                    logger.error(f"Error fetching from pump.fun: {e}")
-                                                                    pass
-
-                                                                    # Tertiary source: Birdeye API (fallback)
-                                                                    try:
-                                                                        # Reduced logging - only log errors
-                                                                        url = "https://public-api.birdeye.so/public/tokenlist"
-                                                                        headers = {"X-API-KEY": os.getenv("BIRDEYE_API_KEY", "")}
-                                                                        response = httpx.get(url, headers=headers, timeout=10)
-                                                                        if response.status_code == 200:
-                                                                            birdeye_tokens = response.json().get("data", [])[:5]
-                                                                            for token in birdeye_tokens:
-                                                                                if token.get("address") not in processed_tokens:
-                                                                                    tokens_to_process.append(token)
-                                                                                    else:
-                                                                                        logger.error(f"Birdeye API returned status code: {response.status_code}")
-                                                                                        except Exception as e:
-                                                                                            logger.error(f"Error fetching from Birdeye: {e}")
-                                                                                            pass
-
-                                                                                            # Sort tokens by liquidity (if available) to prioritize more liquid tokens
-                                                                                            tokens_to_process.sort(key=lambda x: x.get("liquidity", 0), reverse=True)
+                                        await wallet_manager.enrich_tokens(
+                                            tokens_to_enrich,
+                                            max_in_flight=METADATA_MAX_IN_FLIGHT,
+                                            per_token_deadline=METADATA_TOKEN_DEADLINE,
+                                            required_fields=required_fields
+                                        )
+                                    except Exception as e:
+                                        logger.error(f"Error enriching token metadata: {e}")
+                                        pass
+
+                                    # Queue the screened tokens; they compete with candidates left over from earlier cycles
+                                    for token in tokens_to_process:
+                                        buy_scheduler.push(token, candidates[token["address"]], scores[token["address"]])
+                                    buy_scheduler.expire()
 
                                                                                             # Only log when finding a significant number of tokens
                                                                                             if len(tokens_to_process) > 10:
-                                                                                                logger.info(f"Processing {len(tokens_to_process)} tokens after deduplication")
-
-                                                                                                for token in tokens_to_process:
-                                                                                                    token_address = token.get("address")
-
-                                                                                                    # Skip if we've already processed this token
-                                                                                                    if token_address in processed_tokens:
-                                                                                                        continue
-
-                                                                                                        # Add to processed tokens to avoid duplicates
-                                                                                                        processed_tokens.add(token_address)
-
-                                                                                                        # Limit the size of processed_tokens to prevent memory issues
-                                                                                                        if len(processed_tokens) > 1000:
-                                                                                                            processed_tokens = set(list(processed_tokens)[-500:])  # Keep only the most recent 500
-
+                                                                                                logger.info(f"Processing {len(tokens_to_process)} tokens after screening")
+
+                                                                                                # Fetch every admin wallet balance in one RPC call for this cycle
+                                                                                                balance_snapshot = {}
+                                                                                                try:
+                                                                                                    balance_snapshot = await wallet_manager.get_balances([
+                                                                                                        app.dispatcher.user_data.get(user_id, {}).get('username', f'user_{user_id}')
+                                                                                                        for user_id in AUTHENTICATED_USERS
+                                                                                                    ])
+                                                                                                except Exception as e:
+                                                                                                    logger.error(f"Error fetching balance snapshot: {e}")
+
+                                                                                                # Buy the best pending candidates first; the rest stay queued until they are
+                                                                                                # picked in a later cycle or expire
+                                                                                                for _ in range(BUY_SCHEDULER_MAX_PER_CYCLE):
+                                                                                                    scheduled = buy_scheduler.pop()
+                                                                                                    if scheduled is None:
+                                                                                                        break
+                                                                                                    token, screened_profiles, score = scheduled
+                                                                                                            token_address = token.get("address")
                                                                                                             symbol = token.get("symbol")
                                                                                                             website = token.get("website")
                                                                                                             telegram = token.get("telegram")
@@ -169,214 +297,167 @@ def is_authenticated(user_id):
                                                                                                             # Log token detection during testing so we can see it working
                                                                                                             import datetime
                                                                                                             current_time = datetime.datetime.now().strftime("%H:%M:%S")
-                                                                                                            logger.info(f"[DETECT][{current_time}] Found token: ${symbol} | Addr: {token_address} | Liquidity: ${token.get('liquidity', 'N/A')}")
+                                                                                                            logger.info(f"[DETECT][{current_time}] Found token: ${symbol} | Addr: {token_address} | Liquidity: ${token.get('liquidity', 'N/A')} | Score: {score:.2f}")
 
-                                                                                                            for user_id in AUTHENTICATED_USERS:
+                                                                                                            # Last stage: the admins' social filters, now that the token is enriched
+                                                                                                            accepting = decision_pipeline.check_socials(token, screened_profiles)
+                                                                                                            if not accepting:
+                                                                                                                continue
+
+                                                                                                            # Check every admin first, then fire all eligible buys for this token at once
+                                                                                                            eligible_buys = []
+                                                                                                            for profile in accepting:
+                                                                                                                user_id = profile.user_id
                                                                                                                 # Look in app.dispatcher.user_data for username
                                                                                                                 user_data = app.dispatcher.user_data.get(user_id, {})
                                                                                                                 username = user_data.get('username', f'user_{user_id}')
 
-                                                                                                                # Get user settings (or use defaults)
-                                                                                                                user_settings = getattr(app.dispatcher, 'bot_settings', {}).get(user_id, {
-                                                                                                                "min_liquidity": 500,
-                                                                                                                "max_buy_per_token": 0.1,
-                                                                                                                "buy_slippage": 20,
-                                                                                                                "ignore_socials": False,
-                                                                                                                "blacklisted_addresses": []
-                                                                                                                })
-
-                                                                                                                # Check user's balance before attempting buy
-                                                                                                                amount = ADMIN_SNIPE_AMOUNTS.get(user_id, 0.005)
-
-                                                                                                                # Apply max buy per token limit if set
-                                                                                                                max_buy = user_settings.get("max_buy_per_token", 0.1)
-                                                                                                                if max_buy > 0 and amount > max_buy:
-                                                                                                                    amount = max_buy
+                                                                                                                # Snipe amount with the max-buy-per-token cap already applied
+                                                                                                                amount = profile.amount
 
+                                                                                                                # Served from this cycle's batched snapshot, no RPC per (token, user) pair
+                                                                                                                balance = balance_snapshot.get(username)
+                                                                                                                if balance is None:
                                                                                                                     balance = await wallet_manager.get_balance(username)
 
-                                                                                                                    # Check if token has been blacklisted
-                                                                                                                    if token_address in user_settings.get("blacklisted_addresses", []):
-                                                                                                                        continue
-
-                                                                                                                        # Check minimum liquidity (if we have that data)
-                                                                                                                        if "liquidity" in token and token["liquidity"] < user_settings.get("min_liquidity", 500):
-                                                                                                                            continue
-
-                                                                                                                            # Check if token passes user's filters (unless ignore_socials is enabled)
-                                                                                                                            if not user_settings.get("ignore_socials", False):
-                                                                                                                                filters = USER_FILTERS.get(user_id, {"website": True, "telegram": True, "twitter": True})
-
-                                                                                                                                missing_filters = []
-                                                                                                                                if filters.get("website") and not website:
-                                                                                                                                    missing_filters.append("website")
-                                                                                                                                    if filters.get("telegram") and not telegram:
-                                                                                                                                        missing_filters.append("telegram")
-                                                                                                                                        if filters.get("twitter") and not twitter:
-                                                                                                                                            missing_filters.append("twitter")
-
-                                                                                                                                            if missing_filters:
-                                                                                                                                                # Don't log every skipped token
-                                                                                                                                                # import datetime
-                                                                                                                                                # current_time = datetime.datetime.now().strftime("%H:%M:%S")
-                                                                                                                                                # logger.info(f"[SKIP][{current_time}] Skipped ${symbol} for user {user_id} - missing {'/'.join(missing_filters)}")
-                                                                                                                                                continue
-
-                                                                                                                                                # Skip if insufficient balance
-                                                                                                                                                if balance < amount:
-                                                                                                                                                    # Only log balance failures occasionally to reduce spam
-                                                                                                                                                    if not hasattr(wallet_manager, 'last_balance_fail_log') or time.time() - wallet_manager.last_balance_fail_log > 60:
-                                                                                                                                                        import datetime
-                                                                                                                                                        current_time = datetime.datetime.now().strftime("%H:%M:%S")
-                                                                                                                                                        logger.info(f"[FAIL][{current_time}] Not enough SOL for @{username} ({balance} SOL < {amount} SOL)")
-                                                                                                                                                        wallet_manager.last_balance_fail_log = time.time()
-
-                                                                                                                                                        # Get chat_id from chat_data
-                                                                                                                                                        chat_id = None
-                                                                                                                                                        for chat_id_key, chat_data in app.chat_data.items():
-                                                                                                                                                            if isinstance(chat_data, dict) and chat_data.get("chat_id"):
-                                                                                                                                                                chat_id = chat_data.get("chat_id")
-                                                                                                                                                                break
-
-                                                                                                                                                                # Send low balance warning if not already warned
-                                                                                                                                                                if chat_id and username not in low_balance_warnings:
-                                                                                                                                                                    low_balance_warnings.add(username)
-
-                                                                                                                                                                    # Only send a warning if they haven't been warned in the last 24 hours
-                                                                                                                                                                    current_time = time.time()
-                                                                                                                                                                    last_warning_time = getattr(wallet_manager, f'last_warning_{username}', 0)
-
-                                                                                                                                                                    if current_time - last_warning_time > 86400:  # 24 hours
-                                                                                                                                                                        # Turn off auto-buy for this user if balance is too low
-                                                                                                                                                                        if balance < 0.0005:  # Very low balance threshold (0.0005 SOL)
-                                                                                                                                                                            await app.bot.send_message(
-                                                                                                                                                                            chat_id=chat_id,
-                                                                                                                                                                            text=f"⚠️ *Auto-Buy Disabled*\n\n"
-                                                                                                                                                                            f"@{username} your wallet balance is too low. "
-                                                                                                                                                                            f"Current balance: {balance} SOL\n"
-                                                                                                                                                                            f"Auto-buy has been turned off. Use /autobuy_on to re-enable after adding funds.",
-                                                                                                                                                                            parse_mode="Markdown"
-                                                                                                                                                                            )
-                                                                                                                                                                            # Disable auto-buy globally (could be improved to do per-user)
-                                                                                                                                                                            await wallet_manager.toggle_auto_buy(False)
-                                                                                                                                                                            setattr(wallet_manager, f'last_warning_{username}', current_time)
-                                                                                                                                                                            elif balance < amount * 1.2:  # Warn if less than 120% of required amount
-                                                                                                                                                                                await app.bot.send_message(
-                                                                                                                                                                                chat_id=chat_id,
-                                                                                                                                                                                text=f"⚠️ *Low Balance Warning*\n\n"
-                                                                                                                                                                                f"@{username} your wallet balance is low: {balance} SOL\n"
-                                                                                                                                                                                f"Required for snipe: {amount} SOL\n"
-                                                                                                                                                                                f"Please add funds to continue auto-buying.",
-                                                                                                                                                                                parse_mode="Markdown"
-                                                                                                                                                                                )
-                                                                                                                                                                                setattr(wallet_manager, f'last_warning_{username}', current_time)
-                                                                                                                                                                                continue
-
-                                                                                                                                                                                # If we get here, the balance is sufficient
-                                                                                                                                                                                if username in low_balance_warnings:
-                                                                                                                                                                                    low_balance_warnings.remove(username)
-
-                                                                                                                                                                                    # Prepare buy parameters with user settings
-                                                                                                                                                                                    buy_params = {
-                                                                                                                                                                                    "slippage": user_settings.get("buy_slippage", 20),
-                                                                                                                                                                                    "priority_fee": user_settings.get("tx_priority", 0.0015),
-                                                                                                                                                                                    "mev_protection": user_settings.get("mev_protection", False)
-                                                                                                                                                                                    }
-
-                                                                                                                                                                                    # Attempt to buy the token with settings - either through Jupiter API or directly
-                                                                                                                                                                                    # Check if we should use the process_buy function or wallet_manager.buy_token
-                                                                                                                                                                                    use_process_buy = os.getenv("USE_PROCESS_BUY", "0") == "1"
-                                                                                                                                                                                    if use_process_buy:
-                                                                                                                                                                                        success = await process_buy(token_address, amount, username)
-                                                                                                                                                                                        result = {
-                                                                                                                                                                                        "success": success,
-                                                                                                                                                                                        "tx_signature": "simulated_tx" if success else "",
-                                                                                                                                                                                        "error": "Failed to buy token" if not success else ""
-                                                                                                                                                                                        }
-                                                                                                                                                                                        else:
-                                                                                                                                                                                            # Use the wallet_manager.buy_token function (Jupiter API integration)
-                                                                                                                                                                                            result = await wallet_manager.buy_token(username, token_address, amount, buy_params)
-
-                                                                                                                                                                                            # Get chat_id from chat_data
-                                                                                                                                                                                            chat_id = None
-                                                                                                                                                                                            for chat_id_key, chat_data in app.chat_data.items():
-                                                                                                                                                                                                if isinstance(chat_data, dict) and chat_data.get("chat_id"):
-                                                                                                                                                                                                    chat_id = chat_data.get("chat_id")
-                                                                                                                                                                                                    break
-
-                                                                                                                                                                                                    if chat_id:
-                                                                                                                                                                                                        if result.get("success"):
-                                                                                                                                                                                                            # NOW we log it since we're buying
-                                                                                                                                                                                                            import datetime
-                                                                                                                                                                                                            current_time = datetime.datetime.now().strftime("%H:%M:%S")
-                                                                                                                                                                                                            logger.info(f"[BUY][{current_time}] @{username} sniped ${symbol}")
-                                                                                                                                                                                                            logger.info(f"🔹 Token: ${symbol}")
-                                                                                                                                                                                                            logger.info(f"🔹 Amount: {amount} SOL")
-                                                                                                                                                                                                            logger.info(f"🔹 Tx: {result['tx_signature'][:8]}...{result['tx_signature'][-4:]}")
-                                                                                                                                                                                                            logger.info(f"🔹 Explorer: {result['explorer_url']}")
-
-                                                                                                                                                                                                            # Update simulated balance after successful purchase
-                                                                                                                                                                                                            await wallet_manager.update_simulated_balance(username, -amount)
-                                                                                                                                                                                                            buy_count_since_last_summary += 1
-
-                                                                                                                                                                                                            # Send individual notification (for now)
-                                                                                                                                                                                                            source_emoji = "🔍" if source == "birdeye" else "🔥" if source == "pump.fun" else "📊"
-                                                                                                                                                                                                            social_info = []
-                                                                                                                                                                                                            if website:
-                                                                                                                                                                                                                social_info.append("🌐 Website")
-                                                                                                                                                                                                                if telegram:
-                                                                                                                                                                                                                    social_info.append("💬 Telegram")
-                                                                                                                                                                                                                    if twitter:
-                                                                                                                                                                                                                        social_info.append("🐦 Twitter")
-
-                                                                                                                                                                                                                        social_text = " • ".join(social_info) if social_info else "No social links"
-
-                                                                                                                                                                                                                        buttons = [
-                                                                                                                                                                                                                        [InlineKeyboardButton("🔍 View on Solscan", url=result['explorer_url'])],
-                                                                                                                                                                                                                        [InlineKeyboardButton("🔍 View on Birdeye", url=f"https://birdeye.so/token/{token_address}?chain=solana")]
-                                                                                                                                                                                                                        ]
-
-                                                                                                                                                                                                                        reply_markup = InlineKeyboardMarkup(buttons)
-                                                                                                                                                                                                                        await app.bot.send_message(
-                                                                                                                                                                                                                        chat_id=chat_id,
-                                                                                                                                                                                                                        text=f"🎯 *Auto-Sniped Token for @{username}*\n\n"
-                                                                                                                                                                                                                        f"Token: `{symbol}`\n"
-                                                                                                                                                                                                                        f"Amount: {amount} SOL\n"
-                                                                                                                                                                                                                        f"Source: {source_emoji} {source.capitalize()}\n"
-                                                                                                                                                                                                                        f"Socials: {social_text}\n",
-                                                                                                                                                                                                                        parse_mode="Markdown",
-                                                                                                                                                                                                                        disable_web_page_preview=True,
-                                                                                                                                                                                                                        reply_markup=reply_markup
-                                                                                                                                                                                                                        )
-
-
-                                                                                                                                                                                                                        else:
-                                                                                                                                                                                                                            # Only notify about failed purchases
-                                                                                                                                                                                                                            await app.bot.send_message(
-                                                                                                                                                                                                                            chat_id=chat_id,
-                                                                                                                                                                                                                            text=f"❌ *Auto-Buy Failed for @{username}*\n\n"
-                                                                                                                                                                                                                            f"Token: `{symbol}`\nReason: {result.get('error', 'Unknown error')}",
-                                                                                                                                                                                                                            parse_mode="Markdown"
-                                                                                                                                                                                                                            )
-
-                                                                                                                                                                                                                            # Check if it's time to send a summary
-                                                                                                                                                                                                                            import time
-                                                                                                                                                                                                                            current_time = time.time()
-                                                                                                                                                                                                                            interval_seconds = user_settings.get("summary_interval_mins", 10) * 60
-                                                                                                                                                                                                                            if current_time - last_summary_time >= interval_seconds or buy_count_since_last_summary >= user_settings.get("summary_buy_threshold", 3):
-                                                                                                                                                                                                                                await send_auto_buy_summary(app, user_id)
-                                                                                                                                                                                                                                last_summary_time = current_time
-                                                                                                                                                                                                                                buy_count_since_last_summary = 0
+                                                                                                                # Skip if insufficient balance
+                                                                                                                if balance < amount:
+                                                                                                                    # Only log balance failures occasionally to reduce spam
+                                                                                                                    if not hasattr(wallet_manager, 'last_balance_fail_log') or time.time() - wallet_manager.last_balance_fail_log > 60:
+                                                                                                                        import datetime
+                                                                                                                        current_time = datetime.datetime.now().strftime("%H:%M:%S")
+                                                                                                                        logger.info(f"[FAIL][{current_time}] Not enough SOL for @{username} ({balance} SOL < {amount} SOL)")
+                                                                                                                        wallet_manager.last_balance_fail_log = time.time()
+
+                                                                                                                    # Get chat_id from chat_data
+                                                                                                                    chat_id = None
+                                                                                                                    for chat_id_key, chat_data in app.chat_data.items():
+                                                                                                                        if isinstance(chat_data, dict) and chat_data.get("chat_id"):
+                                                                                                                            chat_id = chat_data.get("chat_id")
+                                                                                                                            break
+
+                                                                                                                    # Send low balance warning if not already warned
+                                                                                                                    if chat_id and username not in low_balance_warnings:
+                                                                                                                        low_balance_warnings.add(username)
+
+                                                                                                                        # Only send a warning if they haven't been warned in the last 24 hours
+                                                                                                                        current_time = time.time()
+                                                                                                                        last_warning_time = getattr(wallet_manager, f'last_warning_{username}', 0)
+
+                                                                                                                        if current_time - last_warning_time > 86400:  # 24 hours
+                                                                                                                            # Turn off auto-buy for this user if balance is too low
+                                                                                                                            if balance < 0.0005:  # Very low balance threshold (0.0005 SOL)
+                                                                                                                                await app.bot.send_message(
+                                                                                                                                    chat_id=chat_id,
+                                                                                                                                    text=f"⚠️ *Auto-Buy Disabled*\n\n"
+                                                                                                                                    f"@{username} your wallet balance is too low. "
+                                                                                                                                    f"Current balance: {balance} SOL\n"
+                                                                                                                                    f"Auto-buy has been turned off. Use /autobuy_on to re-enable after adding funds.",
+                                                                                                                                    parse_mode="Markdown"
+                                                                                                                                )
+                                                                                                                                # Disable auto-buy globally (could be improved to do per-user)
+                                                                                                                                await wallet_manager.toggle_auto_buy(False)
+                                                                                                                                setattr(wallet_manager, f'last_warning_{username}', current_time)
+                                                                                                                            elif balance < amount * 1.2:  # Warn if less than 120% of required amount
+                                                                                                                                await app.bot.send_message(
+                                                                                                                                    chat_id=chat_id,
+                                                                                                                                    text=f"⚠️ *Low Balance Warning*\n\n"
+                                                                                                                                    f"@{username} your wallet balance is low: {balance} SOL\n"
+                                                                                                                                    f"Required for snipe: {amount} SOL\n"
+                                                                                                                                    f"Please add funds to continue auto-buying.",
+                                                                                                                                    parse_mode="Markdown"
+                                                                                                                                )
+                                                                                                                                setattr(wallet_manager, f'last_warning_{username}', current_time)
+                                                                                                                    continue
+
+                                                                                                                # If we get here, the balance is sufficient
+                                                                                                                if username in low_balance_warnings:
+                                                                                                                    low_balance_warnings.remove(username)
+
+                                                                                                                eligible_buys.append({
+                                                                                                                    "user_id": user_id,
+                                                                                                                    "username": username,
+                                                                                                                    "profile": profile,
+                                                                                                                    "amount": amount,
+                                                                                                                    "balance": balance,
+                                                                                                                    "buy_params": profile.buy_params()
+                                                                                                                })
+
+                                                                                                            if not eligible_buys:
+                                                                                                                continue
+
+                                                                                                            # Attempt to buy the token with settings - either through Jupiter API or directly
+                                                                                                            # Check if we should use the process_buy function or wallet_manager.buy_token
+                                                                                                            use_process_buy = os.getenv("USE_PROCESS_BUY", "0") == "1"
+
+                                                                                                            async def execute_buy(candidate):
+                                                                                                                if use_process_buy:
+                                                                                                                    success = await process_buy(token_address, candidate["amount"], candidate["username"])
+                                                                                                                    return {
+                                                                                                                        "success": success,
+                                                                                                                        "tx_signature": "simulated_tx" if success else "",
+                                                                                                                        "error": "Failed to buy token" if not success else ""
+                                                                                                                    }
+                                                                                                                # Use the wallet_manager.buy_token function (Jupiter API integration)
+                                                                                                                return await wallet_manager.buy_token(candidate["username"], token_address, candidate["amount"], candidate["buy_params"])
+
+                                                                                                            # Every wallet buys concurrently; one wallet failing does not affect the others
+                                                                                                            buy_results = await asyncio.gather(*(execute_buy(candidate) for candidate in eligible_buys), return_exceptions=True)
+                                                                                                            buy_results = [
+                                                                                                                result if isinstance(result, dict) else {"success": False, "error": str(result)}
+                                                                                                                for result in buy_results
+                                                                                                            ]
+
+                                                                                                            # Per-token aggregate for logging and the notification/summary paths below
+                                                                                                            token_buy_result = {
+                                                                                                                "token_address": token_address,
+                                                                                                                "symbol": symbol,
+                                                                                                                "attempted": len(buy_results),
+                                                                                                                "succeeded": sum(1 for result in buy_results if result.get("success")),
+                                                                                                                "results": {candidate["username"]: result for candidate, result in zip(eligible_buys, buy_results)}
+                                                                                                            }
+                                                                                                            token_buy_result["failed"] = token_buy_result["attempted"] - token_buy_result["succeeded"]
+                                                                                                            logger.info(f"[BUY] ${symbol}: {token_buy_result['succeeded']}/{token_buy_result['attempted']} wallets filled")
+
+                                                                                                            # Get chat_id from chat_data
+                                                                                                            chat_id = None
+                                                                                                            for chat_id_key, chat_data in app.chat_data.items():
+                                                                                                                if isinstance(chat_data, dict) and chat_data.get("chat_id"):
+                                                                                                                    chat_id = chat_data.get("chat_id")
+                                                                                                                    break
+
+                                                                                                            for candidate, result in zip(eligible_buys, buy_results):
+                                                                                                                if result.get("success"):
+                                                                                                                    # Reserve the amount for the rest of this cycle; the wallet records the buy once it lands
+                                                                                                                    balance_snapshot[candidate["username"]] = balance_snapshot.get(candidate["username"], candidate["balance"]) - candidate["amount"]
+                                                                                                                landing = result.get("landing")
+                                                                                                                if landing is not None:
+                                                                                                                    # Sent: report once it landed, failed or expired without holding up the next token
+                                                                                                                    report = asyncio.create_task(report_buy(token, candidate, landing, chat_id))
+                                                                                                                    pending_reports.add(report)
+                                                                                                                    report.add_done_callback(pending_reports.discard)
+                                                                                                                else:
+                                                                                                                    await report_buy(token, candidate, result, chat_id)
+
+                                                                                                                                                                                                                                # Persist the dedup index so a restart does not re-process recent listings
+                                                                                                                                                                                                                                processed_tokens.save()
 
                                                                                                                                                                                                                                 # Only log cycle completion very occasionally
                                                                                                                                                                                                                                 if not hasattr(wallet_manager, 'last_cycle_log') or time.time() - wallet_manager.last_cycle_log > 1800:  # Log only every 30 minutes
                                                                                                                                                                                                                                     import datetime
                                                                                                                                                                                                                                     current_time = datetime.datetime.now().strftime("%H:%M:%S")
-                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Finished scanning cycle. Waiting 30 seconds before next scan...")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Finished scanning cycle. Waiting for newly discovered tokens...")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Decision pipeline: {decision_pipeline.stats()}")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Buy scheduler: {buy_scheduler.stats()}")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Rate limits: {wallet_manager.http.rate_limiter.stats()}")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] DexScreener endpoints: {wallet_manager.get_dexscreener_stats()}")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] RPC broadcast: {wallet_manager.get_broadcast_stats()}")
+                                                                                                                                                                                                                                    logger.info(f"[INFO][{current_time}] Landing: {wallet_manager.get_landing_stats()}")
                                                                                                                                                                                                                                     wallet_manager.last_cycle_log = time.time()
-                                                                                                                                                                                                                                    await asyncio.sleep(30)
                                                                                                                                                                                                                                     except asyncio.CancelledError:
                                                                                                                                                                                                                                         logger.info("Auto-buy loop cancelled, shutting down gracefully")
+                                                                                                                                                                                                                                        for report in pending_reports:
+                                                                                                                                                                                                                                            report.cancel()
                                                                                                                                                                                                                                         is_running = False
                                                                                                                                                                                                                                         except Exception as e:
                                                                                                                                                                                                                                             logger.error(f"Error in auto-buy loop: {e}")
@@ -516,10 +597,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                     if user_id not in context.bot_settings:
                                                                                                                                                                                                                                                                                                                                         context.bot_settings[user_id] = {
                                                                                                                                                                                                                                                                                                                                         "min_liquidity": 500,  # Default $500 minimum liquidity
+                                                                                                                                                                                                                                                                                                                                        "max_token_age_hours": 0,  # Default: no token age limit (hours)
                                                                                                                                                                                                                                                                                                                                         "max_buy_per_token": 0.1,  # Default 0.1 SOL cap per token
                                                                                                                                                                                                                                                                                                                                         "buy_slippage": 20,  # Default 20% slippage for buys
                                                                                                                                                                                                                                                                                                                                         "sell_slippage": 20,  # Default 20% slippage for sells
-                                                                                                                                                                                                                                                                                                                                        "tx_priority": 0.0015,  # Default 0.0015 SOL for priority fee
+                                                                                                                                                                                                                                                                                                                                        "tx_priority_lamports": 1500,  # Default fixed priority fee (lamports)
+                                                                                                                                                                                                                                                                                                                                        "priority_fee_policy": "fixed",  # Default: pay the fixed priority fee
+                                                                                                                                                                                                                                                                                                                                        "priority_fee_cap": 0.005,  # Most an adaptive fee policy may pay
                                                                                                                                                                                                                                                                                                                                         "mev_protection": False,  # Default MEV protection off
                                                                                                                                                                                                                                                                                                                                         "ignore_socials": False,  # Default respect social filters
                                                                                                                                                                                                                                                                                                                                         "blacklisted_addresses": [],  # Default empty blacklist
@@ -794,6 +878,7 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 username = update.effective_user.username
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 user_settings = getattr(context, 'bot_settings', {}).get(user_id, {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "min_liquidity": 500,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "max_token_age_hours": 0,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "max_buy_per_token": 0.1,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "buy_slippage": 20,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "ignore_socials": False,
@@ -813,6 +898,9 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             if user_settings.get("ignore_socials", False):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 filter_status = ["Filters Disabled 🚫"]
 
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                # Circuit breaker state of each upstream source (see circuit_breaker.py)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                source_status = wallet_manager.get_source_status()
+
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Create status message
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 status_message = (
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"📊 *Bot Status Report*\n\n"
@@ -820,9 +908,10 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"🔄 Auto-Buy: {auto_buy_status}\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"💰 Snipe Amount: {ADMIN_SNIPE_AMOUNTS.get(user_id, 0.005)} SOL\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"📡 *Data Sources:*\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 🔍 Birdeye API - Active\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 🔥 pump.fun - Active\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 📊 DexScreener - Active\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 🔍 Birdeye API - {source_status['birdeye'].describe()}\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 🔥 pump.fun - {source_status['pump.fun'].describe()}\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 📊 DexScreener - {source_status['dexscreener'].describe()}\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                f"• 🧾 Solscan - {source_status['solscan'].describe()}\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"🔍 *Social Filters:*\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"• {' • '.join(filter_status)}\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 f"💼 *Settings:*\n"
@@ -886,6 +975,7 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     return
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     ADMIN_SNIPE_AMOUNTS[user_id] = new_amount
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    refresh_user_profile(user_id, getattr(context, 'bot_settings', {}).get(user_id))  # amount is part of the compiled profile
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     await update.message.reply_text(f"✅ Snipe amount set to {new_amount} SOL for @{username}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     except ValueError:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         await update.message.reply_text("❌ Invalid amount. Please provide a valid number.")
@@ -929,8 +1019,6 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     result = await wallet_manager.buy_token(username, token_address, amount)
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     if result.get("success"):
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Update simulated balance
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await wallet_manager.update_simulated_balance(username, -amount)
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         buttons = [[InlineKeyboardButton("🔍 View on Solscan", url=result['explorer_url'])]]
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         reply_markup = InlineKeyboardMarkup(buttons)
@@ -1079,6 +1167,7 @@ def is_authenticated(user_id):
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     user_settings = getattr(context, 'bot_settings', {}).get(user_id, {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "min_liquidity": 500,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "max_token_age_hours": 0,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "max_buy_per_token": 0.1,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "buy_slippage": 20,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "ignore_socials": False
@@ -1150,10 +1239,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 if user_id not in context.bot_settings:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     context.bot_settings[user_id] = {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "min_liquidity": 500,  # Default $500 minimum liquidity
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "max_token_age_hours": 0,  # Default: no token age limit (hours)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "max_buy_per_token": 0.1,  # Default 0.1 SOL cap per token
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "buy_slippage": 20,  # Default 20% slippage for buys
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "sell_slippage": 20,  # Default 20% slippage for sells
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "tx_priority": 0.0015,  # Default 0.0015 SOL for priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "tx_priority_lamports": 1500,  # Default fixed priority fee (lamports)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "priority_fee_policy": "fixed",  # Default: pay the fixed priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    "priority_fee_cap": 0.005,  # Most an adaptive fee policy may pay
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "mev_protection": False,  # Default MEV protection off
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "ignore_socials": False,  # Default respect social filters
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "blacklisted_addresses": [],  # Default empty blacklist
@@ -1165,6 +1257,7 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     if query.data.startswith("amount_"):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         new_amount = float(query.data.split("_")[1])
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         ADMIN_SNIPE_AMOUNTS[user_id] = new_amount
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        refresh_user_profile(user_id, getattr(context, 'bot_settings', {}).get(user_id))  # amount is part of the compiled profile
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         await query.edit_message_text(f"✅ Snipe amount updated to {new_amount} SOL for @{username}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         elif query.data == "status":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             await query.edit_message_text("📊 Bot is running. Sniper is watching for new tokens.")
@@ -1511,6 +1604,9 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     InlineKeyboardButton(f"Min Liquidity: ${settings['min_liquidity']}", callback_data="set_min_liquidity")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     ],
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     [
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    InlineKeyboardButton(f"Max Token Age: {settings.get('max_token_age_hours', 0)}h", callback_data="set_max_token_age_hours")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    ],
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    [
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     InlineKeyboardButton(f"Max Buy Per Token: {settings['max_buy_per_token']} SOL", callback_data="set_max_buy_per_token")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     ],
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     [
@@ -1525,6 +1621,7 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     await query.edit_message_text(
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "🌊 *Liquidity & Buy Limits*\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     f"Minimum Liquidity: ${settings['min_liquidity']}\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    f"Max Token Age: {settings.get('max_token_age_hours', 0)} hours (0 = no limit)\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     f"Max Buy Per Token: {settings['max_buy_per_token']} SOL\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     f"Ignore Social Filters: {'Yes' if settings['ignore_socials'] else 'No'}\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     "Click on a setting to change it:",
@@ -1561,13 +1658,22 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         elif query.data == "settings_mev":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             # Show MEV & speed settings
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             settings = context.bot_settings[user_id]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            fixed_fee = fixed_priority_fee_lamports(settings)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            fee_policy = settings.get("priority_fee_policy", "fixed")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            fee_cap = settings.get("priority_fee_cap", 0.005)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            network_fees = wallet_manager.get_priority_fee_stats()["network_lamports"]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            network_line = " / ".join(f"{policy} {lamports / 1e9:.6f}" for policy, lamports in network_fees.items()) or "no samples yet"
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             buttons = [
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             [
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             InlineKeyboardButton(f"{'✅' if settings['mev_protection'] else '❌'} MEV Protection", callback_data="toggle_mev_protection")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             ],
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             [
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            InlineKeyboardButton(f"TX Priority: {settings['tx_priority']} SOL", callback_data="set_tx_priority")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            InlineKeyboardButton(f"TX Priority: {fixed_fee} lamports", callback_data="set_tx_priority")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            ],
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            [
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            InlineKeyboardButton(f"Fee Policy: {fee_policy}", callback_data="toggle_priority_fee_policy"),
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            InlineKeyboardButton(f"Fee Cap: {fee_cap} SOL", callback_data="set_priority_fee_cap")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             ],
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             [
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             InlineKeyboardButton("Back to Settings", callback_data="settings_menu"),
@@ -1578,7 +1684,10 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             await query.edit_message_text(
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "🚀 *MEV & Speed Settings*\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             f"MEV Protection: {'Enabled' if settings['mev_protection'] else 'Disabled'}\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            f"Transaction Priority Fee: {settings['tx_priority']} SOL\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            f"Transaction Priority Fee: {fixed_fee} lamports\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            f"Fee Policy: {fee_policy} (fixed pays the priority fee, p50/p75/p95 follow recent fees up to the cap)\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            f"Fee Cap: {fee_cap} SOL\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            f"Recent fees (SOL): {network_line}\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "Click on a setting to change it:",
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             parse_mode="Markdown",
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             reply_markup=InlineKeyboardMarkup(buttons)
@@ -1674,6 +1783,36 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     parse_mode="Markdown"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     )
 
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    elif query.data == "set_tx_priority":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings = context.bot_settings[user_id]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        context.user_data["awaiting_input"] = "tx_priority"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await query.edit_message_text(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "🚀 *Set Transaction Priority*\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"Current: {fixed_priority_fee_lamports(settings)} lamports\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Enter the fixed priority fee in lamports (1 SOL = 1,000,000,000 lamports, e.g. 1500):",
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        parse_mode="Markdown"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    elif query.data == "set_priority_fee_cap":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings = context.bot_settings[user_id]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        context.user_data["awaiting_input"] = "priority_fee_cap"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await query.edit_message_text(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "🚀 *Set Priority Fee Cap*\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"Current: {settings.get('priority_fee_cap', 0.005)} SOL\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Enter the most an adaptive fee policy (p50/p75/p95) may pay per transaction, in SOL (e.g. 0.005):",
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        parse_mode="Markdown"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    elif query.data == "set_max_token_age_hours":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings = context.bot_settings[user_id]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        context.user_data["awaiting_input"] = "max_token_age_hours"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await query.edit_message_text(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "⏳ *Set Maximum Token Age*\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"Current: {settings.get('max_token_age_hours', 0)} hours (0 = no limit)\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Enter the maximum token age in hours for auto-buying, or 0 for no limit (e.g. 24):",
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        parse_mode="Markdown"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     elif query.data == "tokens_menu":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         # Show tokens menu with portfolio
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         tokens = await wallet_manager.get_tokens(username)
@@ -1828,37 +1967,20 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     # Wait a bit to simulate processing time
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     await asyncio.sleep(2)
 
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    # Rank the simulated tokens and apply this admin's filters the same way the real auto-buy does
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    profile = USER_PROFILES.get(user_id) or refresh_user_profile(user_id, getattr(context, 'bot_settings', {}).get(user_id))
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    simulation = DecisionPipeline()
+
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     # Generate simulated purchases
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    for token in simulated_tokens:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Apply filter logic similar to the real auto-buy
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        user_settings = getattr(context, 'bot_settings', {}).get(user_id, {
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "min_liquidity": 500,
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "ignore_socials": False
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        })
-
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Check if token passes liquidity filter
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        if token["liquidity"] < user_settings.get("min_liquidity", 500):
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    for token, _, _ in simulation.screen_batch(simulated_tokens, set(), [profile]):
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Check if token passes social filter
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        if not simulation.check_socials(token, [profile]):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             continue
 
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            # Check if token passes social filter
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            if not user_settings.get("ignore_socials", False):
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                filters = USER_FILTERS.get(user_id, {"website": True, "telegram": True, "twitter": True})
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                missing_filters = []
-
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                if filters.get("website") and not token["website"]:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    missing_filters.append("website")
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    if filters.get("telegram") and not token["telegram"]:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        missing_filters.append("telegram")
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        if filters.get("twitter") and not token["twitter"]:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            missing_filters.append("twitter")
-
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            if missing_filters:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                continue
-
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Generate fake transaction data
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 fake_tx = ''.join(random.choices('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz', k=44))
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 fake_explorer = f"https://solscan.io/tx/{fake_tx}"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                amount = ADMIN_SNIPE_AMOUNTS.get(user_id, 0.005)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                amount = profile.amount
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Get emojis based on source
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 source_emoji = "🔍" if token["source"] == "birdeye" else "🔥" if token["source"] == "pump.fun" else "📊"
@@ -1969,10 +2091,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             if user_id not in context.bot_settings:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 context.bot_settings[user_id] = {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "min_liquidity": 500,  # Default $500 minimum liquidity
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "max_token_age_hours": 0,  # Default: no token age limit (hours)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "max_buy_per_token": 0.1,  # Default 0.1 SOL cap per token
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "buy_slippage": 20,  # Default 20% slippage for buys
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "sell_slippage": 20,  # Default 20% slippage for sells
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "tx_priority": 0.0015,  # Default 0.00015 SOL for priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "tx_priority_lamports": 1500,  # Default fixed priority fee (lamports)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee_policy": "fixed",  # Default: pay the fixed priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee_cap": 0.005,  # Most an adaptive fee policy may pay
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "mev_protection": False,  # Default MEV protection off
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "ignore_socials": False,  # Default respect social filters
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "blacklisted_addresses": [],  # Default empty blacklist
@@ -1990,13 +2115,22 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     # Handle special toggles
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     if key == "mev_protection":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         settings["mev_protection"] = not settings["mev_protection"]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        refresh_user_profile(user_id, settings)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         return await menu_callback(update, context)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         elif key == "ignore_socials":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             settings["ignore_socials"] = not settings["ignore_socials"]
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            refresh_user_profile(user_id, settings)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            return await menu_callback(update, context)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        elif key == "priority_fee_policy":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            # Cycle fixed -> p50 -> p75 -> p95 -> fixed
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            current = settings.get("priority_fee_policy", "fixed")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            settings["priority_fee_policy"] = FEE_POLICIES[(FEE_POLICIES.index(current) + 1) % len(FEE_POLICIES)] if current in FEE_POLICIES else "fixed"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            refresh_user_profile(user_id, settings)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             return await menu_callback(update, context)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             # Handle social filter toggles
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             elif key in filters:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 filters[key] = not filters.get(key, True)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                refresh_user_profile(user_id, settings)
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Handle numeric settings
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 elif query.data.startswith("set_"):
@@ -2039,15 +2173,6 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     parse_mode="Markdown"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     )
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     return
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    elif setting_key == "tx_priority":
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        context.user_data["awaiting_input"] = "tx_priority"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await query.edit_message_text(
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "🚀 *Set Transaction Priority*\n\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"Current: {settings['tx_priority']} SOL\n\n"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Enter the priority fee in SOL for transactions (e.g. 0.0015):",
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        parse_mode="Markdown"
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        return
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         elif setting_key == "sell_percentages":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             context.user_data["awaiting_input"] = "sell_percentages"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             await query.edit_message_text(
@@ -2117,6 +2242,8 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         index = int(query.data.replace("remove_blacklist_", ""))
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         if index < len(settings["blacklisted_addresses"]):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             removed = settings["blacklisted_addresses"].pop(index)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            # Recompile the auto-buy profile so the address is no longer blocked
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            refresh_user_profile(user_id, settings)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             await query.edit_message_text(
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             f"✅ Address `{removed[:8]}...{removed[-8:]}` removed from blacklist.",
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             parse_mode="Markdown",
@@ -2181,6 +2308,21 @@ def is_authenticated(user_id):
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         task.add_done_callback(task_done_callback)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         logger.info("✅ Auto-buy loop task created successfully")
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Watch the event loop for callbacks that block it (e.g. synchronous HTTP calls)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        app.loop_monitor = LoopLagMonitor(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            threshold_ms=LOOP_LAG_THRESHOLD_MS,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            debug=os.getenv("LOOP_DEBUG", "0") == "1"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        monitor_task = asyncio.create_task(app.loop_monitor.run(app.stop_event))
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        app.running_tasks.append(monitor_task)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        monitor_task.add_done_callback(task_done_callback)
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Keep wallet balances fresh from account-change notifications
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await wallet_manager.start_balance_feed()
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Keep a recent blockhash in memory for the swap path
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        wallet_manager.start_blockhash_refresher()
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         except Exception as e:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             logger.error(f"❌ Failed to create auto-buy loop task: {e}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             import traceback
@@ -2261,10 +2403,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         # These are the default values used when an admin hasn't configured custom settings
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         DEFAULT_AUTO_BUY_SETTINGS = {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "min_liquidity": 500,           # Minimum liquidity in USD ($500)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "max_token_age_hours": 0,       # No token age limit (hours)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "max_buy_per_token": 0.1,       # Maximum 0.1 SOL per token
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "buy_slippage": 20,             # 20% slippage tolerance for buys
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "sell_slippage": 20,            # 20% slippage tolerance for sells
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "tx_priority": 0.0015,          # 0.0015 SOL priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "tx_priority_lamports": 1500,   # Fixed priority fee (lamports)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "priority_fee_policy": "fixed", # Pay the fixed fee (or p50/p75/p95 of recent fees)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "priority_fee_cap": 0.005,      # Cap for p50/p75/p95 policies (SOL)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "mev_protection": False,        # MEV protection disabled by default
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "ignore_socials": False,        # Respect social media filters by default
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "summary_interval_mins": 10,    # Send summary every 10 minutes
@@ -2680,6 +2825,8 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             # Clear the user_balances cache completely
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             if hasattr(wallet_manager, 'user_balances'):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 wallet_manager.user_balances = {}
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                # Drop subscription-fed balances too; they refill on the next read or notification
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                wallet_manager.balance_cache.invalidate()
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 await update.message.reply_text(
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "✅ Balance cache has been completely reset.\n\n"
@@ -2899,10 +3046,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         if user_id not in context.bot_settings:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             context.bot_settings[user_id] = {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "min_liquidity": 500,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            "max_token_age_hours": 0,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "max_buy_per_token": 0.1,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "buy_slippage": 20,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "sell_slippage": 20,
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            "tx_priority": 0.0015,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            "tx_priority_lamports": 1500,
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            "priority_fee_policy": "fixed",
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            "priority_fee_cap": 0.005,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "mev_protection": False,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "ignore_socials": False,
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             "blacklisted_addresses": [],
@@ -2972,13 +3122,42 @@ def is_authenticated(user_id):
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                             elif input_type == "tx_priority":
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 try:
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    value = float(text)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    value = int(text)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     if value < 0:
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         await update.message.reply_text("❌ Priority fee cannot be negative. Please try again.")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         return True
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings["tx_priority"] = value
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings["tx_priority_lamports"] = value
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings.pop("tx_priority", None)  # Superseded by the lamport value
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         await update.message.reply_text(
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"✅ Transaction priority fee set to {value} SOL\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"✅ Transaction priority fee set to {value} lamports\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Use /settings to go back to settings menu."
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        except ValueError:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            await update.message.reply_text("❌ Invalid number. Please enter a whole number of lamports.")
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            elif input_type == "priority_fee_cap":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                try:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    value = float(text)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    if value < 0:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await update.message.reply_text("❌ Fee cap cannot be negative. Please try again.")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        return True
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings["priority_fee_cap"] = value
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await update.message.reply_text(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"✅ Priority fee cap set to {value} SOL\n\n"
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        "Use /settings to go back to settings menu."
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        )
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        except ValueError:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            await update.message.reply_text("❌ Invalid number. Please enter a valid amount.")
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                            elif input_type == "max_token_age_hours":
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                try:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    value = float(text)
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    if value < 0:
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await update.message.reply_text("❌ Maximum token age cannot be negative. Please try again.")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        return True
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        settings["max_token_age_hours"] = value
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        await update.message.reply_text(
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        f"✅ Maximum token age set to {value} hours (0 = no limit)\n\n"
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         "Use /settings to go back to settings menu."
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         )
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         except ValueError:
@@ -3053,6 +3232,9 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         await update.message.reply_text("❌ Invalid number. Please enter a valid integer.")
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         # Clear the awaiting input state
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        # Recompile the auto-buy profile from the updated settings
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                        refresh_user_profile(user_id, settings)
+
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         del context.user_data["awaiting_input"]
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                         return True
 
@@ -3280,6 +3462,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Give tasks time to shut down
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 await asyncio.sleep(1)
 
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                # Stop discovery sources
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                if hasattr(app, 'discovery_engine'):
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    await app.discovery_engine.stop()
+
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                # Close pooled HTTP connections
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                await wallet_manager.close()
+
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 app = Application.builder().token(os.getenv("TELEGRAM_TOKEN", "")).post_init(on_startup).post_shutdown(on_shutdown).build()
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 app.add_handler(CommandHandler("start", start))
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 app.add_handler(CommandHandler("auth", auth_command))
@@ -3365,11 +3554,13 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Create parameters for the buy operation with user settings
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 buy_params = {
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "slippage": user_settings.get("buy_slippage", 20),  # Default 20% slippage
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee": user_settings.get("tx_priority", 0.0015),  # Default priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee_lamports": fixed_priority_fee_lamports(user_settings),  # Fixed priority fee
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee_policy": user_settings.get("priority_fee_policy", "fixed"),  # Fixed unless an adaptive policy is set
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                "priority_fee_cap": user_settings.get("priority_fee_cap", 0.005),  # Cap for adaptive policies
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 "mev_protection": user_settings.get("mev_protection", False)  # Default no MEV protection
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 }
 
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                print(f"⚙️ [{current_time}] [SETTINGS] Using: Slippage {buy_params['slippage']}%, Priority fee {buy_params['priority_fee']} SOL")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                print(f"⚙️ [{current_time}] [SETTINGS] Using: Slippage {buy_params['slippage']}%, Priority fee {buy_params['priority_fee_lamports']} lamports")
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 # Validate token address format (basic check)
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                 if not token or len(token) < 32:
@@ -3401,7 +3592,7 @@ def is_authenticated(user_id):
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     token_symbol = result.get("symbol", "Unknown")
 
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     # Log success with detailed information
-                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    print(f"✅ [{current_time}] [SUCCESS] Buy confirmed for token {token} {user_info}")
+                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                    print(f"✅ [{current_time}] [SUCCESS] Buy sent for token {token} {user_info}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     print(f"🔹 Token symbol: {token_symbol}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     print(f"🔹 Transaction hash: {tx_hash}")
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                     print(f"🔹 Explorer URL: {explorer_url}")
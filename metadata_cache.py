@@ -0,0 +1,176 @@
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Social link fields checked by the admins' filters and used for negative caching
+SOCIAL_FIELDS = ("website", "telegram", "twitter")
+
+
+class MetadataCache:
+    """
+    Two-tier token metadata cache: in-process LRU in front of a SQLite file
+
+    Results with social links ("positive") and without ("negative") get
+    separate TTLs, so tokens that had no socials are not re-queried every
+    cycle but are still re-checked sooner than tokens that did. Entries past
+    their TTL are served as "stale" for up to ``max_stale`` seconds while the
+    caller refreshes them in the background.
+
+    Disk writes are batched: ``put`` only updates memory and queues the
+    entry, and the queue is written every ``flush_interval`` seconds in a
+    worker thread (``asyncio.to_thread``) on its own connection, so the event
+    loop never waits on a commit. Rows too old to ever be served again are
+    deleted when the store is opened and every ``prune_interval`` seconds.
+    """
+
+    def __init__(self, path=None, maxsize=2000, positive_ttl=6 * 3600, negative_ttl=900, max_stale=24 * 3600,
+                 flush_interval=2.0, prune_interval=3600.0):
+        self.maxsize = maxsize
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self.memory = OrderedDict()  # address -> (fetched_at, negative, metadata), least recent first
+        self.pending = {}            # address -> entry not yet written to disk
+        self.flush_task = None
+        self.writing = None  # The worker thread write in progress, if any
+        self.last_prune = 0.0
+        self.db = None      # Reads, on the event loop thread
+        self.writer = None  # Batched writes and pruning, in a worker thread
+        if path:
+            try:
+                self.db = sqlite3.connect(path)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS token_metadata ("
+                    "address TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL, negative INTEGER NOT NULL)"
+                )
+                self.db.commit()
+                self.writer = sqlite3.connect(path, check_same_thread=False)
+                self.writer.execute("PRAGMA synchronous=NORMAL")
+                self._prune()
+            except sqlite3.Error as e:
+                logger.error(f"Metadata cache disk store disabled ({path}): {e}")
+                self.db = self.writer = None
+
+    @staticmethod
+    def is_negative(metadata):
+        """True when the metadata has none of the social links"""
+        return not any(metadata.get(field) for field in SOCIAL_FIELDS)
+
+    def get(self, address):
+        """
+        Look up cached metadata
+
+        Returns:
+            tuple: (metadata copy or None, "fresh" | "stale" | "miss")
+        """
+        entry = self.memory.get(address) or self.pending.get(address)
+        if entry is not None:
+            self._remember(address, entry)
+        elif self.db is not None:
+            entry = self._load(address)
+            if entry is not None:
+                self._remember(address, entry)
+
+        if entry is None:
+            return None, "miss"
+
+        fetched_at, negative, metadata = entry
+        age = time.time() - fetched_at
+        ttl = self.negative_ttl if negative else self.positive_ttl
+        if age <= ttl:
+            return dict(metadata), "fresh"
+        if age <= ttl + self.max_stale:
+            return dict(metadata), "stale"
+        return None, "miss"
+
+    def put(self, address, metadata):
+        """Store metadata in memory now and on disk with the next batch"""
+        entry = (time.time(), self.is_negative(metadata), dict(metadata))
+        self._remember(address, entry)
+        if self.writer is None:
+            return
+        self.pending[address] = entry
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        """Write the queued entries (and prune when due) in a worker thread"""
+        if self.writer is None:
+            return
+        # One write at a time on the writer connection; shielded so a cancelled
+        # caller does not leave a thread writing behind close()'s back
+        if self.writing is not None and not self.writing.done():
+            await asyncio.gather(asyncio.shield(self.writing), return_exceptions=True)
+        batch, self.pending = self.pending, {}
+        prune = time.time() - self.last_prune >= self.prune_interval
+        if not batch and not prune:
+            return
+        self.writing = asyncio.ensure_future(asyncio.to_thread(self._write, batch, prune))
+        try:
+            await asyncio.shield(self.writing)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing {len(batch)} metadata entries: {e}")
+
+    async def close(self):
+        if self.flush_task is not None and not self.flush_task.done():
+            self.flush_task.cancel()
+            await asyncio.gather(self.flush_task, return_exceptions=True)
+        await self.flush()
+        if self.writing is not None:
+            await asyncio.gather(self.writing, return_exceptions=True)
+        for db in (self.db, self.writer):
+            if db is not None:
+                db.close()
+        self.db = self.writer = None
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _write(self, batch, prune):
+        self.writer.executemany(
+            "INSERT OR REPLACE INTO token_metadata (address, data, fetched_at, negative) VALUES (?, ?, ?, ?)",
+            [(address, json.dumps(metadata), fetched_at, int(negative)) for address, (fetched_at, negative, metadata) in batch.items()]
+        )
+        self.writer.commit()
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        """Delete rows past their TTL plus max_stale (get() would treat them as a miss anyway)"""
+        now = time.time()
+        deleted = self.writer.execute(
+            "DELETE FROM token_metadata WHERE fetched_at < ? OR (negative = 1 AND fetched_at < ?)",
+            (now - self.positive_ttl - self.max_stale, now - self.negative_ttl - self.max_stale)
+        ).rowcount
+        self.writer.commit()
+        self.last_prune = now
+        if deleted:
+            logger.info(f"Pruned {deleted} expired token metadata rows")
+
+    def _remember(self, address, entry):
+        self.memory[address] = entry
+        self.memory.move_to_end(address)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def _load(self, address):
+        try:
+            row = self.db.execute(
+                "SELECT data, fetched_at, negative FROM token_metadata WHERE address = ?", (address,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading metadata for {address}: {e}")
+            return None
+        if row is None:
+            return None
+        return row[1], bool(row[2]), json.loads(row[0])
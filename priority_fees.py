@@ -0,0 +1,173 @@
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Fee policies selectable in /settings: "fixed" uses the admin's fixed fee,
+# the others pay that percentile of recent prioritization fees (up to the cap)
+FEE_POLICIES = ("fixed", "p50", "p75", "p95")
+POLICY_PERCENTILES = {"p50": 50, "p75": 75, "p95": 95}
+
+# Compute units assumed for a Jupiter swap when turning a per-CU price into lamports
+SWAP_COMPUTE_UNITS = 300_000
+
+# getRecentPrioritizationFees accepts at most this many accounts
+MAX_FEE_ACCOUNTS = 128
+
+LAMPORTS_PER_SOL = 10**9
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PriorityFeeEstimator:
+    """
+    Priority fee estimates from ``getRecentPrioritizationFees``
+
+    Samples are kept per set of accounts (the accounts a swap writes to have
+    their own local fee market) in a rolling window of the last
+    ``window_slots`` slots, merged across calls, plus one network-wide window
+    of every sample seen. A window is re-sampled at most every ``ttl``
+    seconds; ``prefetch()`` does that in the background so the buy path
+    usually finds a fresh window.
+
+    Fees are in micro-lamports per compute unit; ``estimate_lamports`` turns
+    them into the total ``prioritizationFeeLamports`` Jupiter expects.
+    """
+
+    def __init__(self, http_pool, rpc_url, window_slots=300, ttl=5.0, compute_units=SWAP_COMPUTE_UNITS,
+                 max_windows=256, single_flight=None):
+        self.http = http_pool
+        self.rpc_url = rpc_url
+        self.window_slots = window_slots
+        self.ttl = ttl
+        self.compute_units = compute_units
+        self.max_windows = max_windows
+        self.windows = OrderedDict()  # frozenset(accounts) -> (sampled_at, OrderedDict slot -> fee)
+        self.network = OrderedDict()  # slot -> highest fee seen for that slot
+        self.single_flight = single_flight or SingleFlight()
+        self.samples = 0
+        self.errors = 0
+
+    async def sample(self, accounts=()):
+        """
+        Get the rolling fee window for a set of accounts, re-sampling if stale
+
+        Returns:
+            list: Per-slot fees (micro-lamports per CU), possibly empty
+        """
+        key = frozenset(list(accounts)[:MAX_FEE_ACCOUNTS])
+        window = self.windows.get(key)
+        if window is not None and time.monotonic() - window[0] < self.ttl:
+            return list(window[1].values())
+
+        try:
+            await self.single_flight.do(("priority_fees", key), lambda: self._fetch(key))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error sampling prioritization fees: {e}")
+
+        window = self.windows.get(key)
+        return list(window[1].values()) if window is not None else []
+
+    def prefetch(self, accounts=()):
+        """Refresh the window for these accounts in the background"""
+        self.single_flight.start(("prefetch_fees", frozenset(accounts)), lambda: self.sample(accounts))
+
+    async def _fetch(self, key):
+        client = self.http.get_client(self.rpc_url)
+        params = [sorted(key)] if key else []
+        response = await client.post(self.rpc_url, json={
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getRecentPrioritizationFees",
+            "params": params
+        })
+        if response.status_code != 200:
+            raise ValueError(f"getRecentPrioritizationFees returned HTTP {response.status_code}")
+        data = response.json()
+        if "error" in data:
+            raise ValueError(f"getRecentPrioritizationFees error: {data['error']}")
+
+        _, fees = self.windows.pop(key, (None, OrderedDict()))
+        for entry in sorted(data.get("result") or [], key=lambda e: e.get("slot", 0)):
+            slot, fee = entry.get("slot"), entry.get("prioritizationFee", 0)
+            if slot is None:
+                continue
+            fees[slot] = fee
+            self.network[slot] = max(fee, self.network.get(slot, 0))
+        self._trim(fees)
+        self._trim(self.network)
+
+        self.windows[key] = (time.monotonic(), fees)
+        while len(self.windows) > self.max_windows:
+            self.windows.popitem(last=False)
+        self.samples += 1
+
+    def _trim(self, fees):
+        """Keep only the newest ``window_slots`` slots"""
+        if not fees:
+            return
+        newest = max(fees)
+        for slot in [slot for slot in fees if slot <= newest - self.window_slots]:
+            del fees[slot]
+
+    def to_lamports(self, fee_per_cu):
+        """Total priority fee in lamports for a swap at this per-CU price"""
+        return math.ceil(fee_per_cu * self.compute_units / 1_000_000)
+
+    async def estimate_lamports(self, policy, accounts=(), cap_lamports=None, fallback_lamports=0):
+        """
+        Priority fee for a swap under a percentile policy
+
+        Args:
+            policy: "p50", "p75" or "p95"
+            accounts: Accounts the swap writes to (token mint, pools)
+            cap_lamports: Never pay more than this (None for no cap)
+            fallback_lamports: Used when no samples are available
+
+        Returns:
+            int: prioritizationFeeLamports for the swap
+        """
+        fees = await self.sample(accounts)
+        if not fees and accounts:
+            fees = list(self.network.values())
+        if fees:
+            lamports = self.to_lamports(percentile(fees, POLICY_PERCENTILES[policy]))
+        else:
+            lamports = int(fallback_lamports)
+        if cap_lamports is not None:
+            lamports = min(lamports, int(cap_lamports))
+        return lamports
+
+    def network_estimates(self):
+        """
+        Current network-wide estimate for every percentile policy, from samples already taken
+
+        Returns:
+            dict: policy -> lamports (empty until something was sampled)
+        """
+        fees = list(self.network.values())
+        if not fees:
+            return {}
+        return {policy: self.to_lamports(percentile(fees, pct)) for policy, pct in POLICY_PERCENTILES.items()}
+
+    def stats(self):
+        return {
+            "windows": len(self.windows),
+            "network_slots": len(self.network),
+            "samples": self.samples,
+            "errors": self.errors,
+            "network_lamports": self.network_estimates()
+        }
@@ -0,0 +1,173 @@
+import time
+import heapq
+import asyncio
+import functools
+import contextvars
+from contextlib import contextmanager
+from itertools import count
+
+# Request priorities, lower goes first. Buy traffic (quotes, swaps, sending
+# transactions) overtakes discovery polling, which overtakes background
+# metadata enrichment.
+PRIORITY_BUY = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+# Per-host (sustained requests per second, burst size)
+HOST_RATE_LIMITS = {
+    "public-api.birdeye.so": (1.0, 5),      # Free-tier API key
+    "api.solscan.io": (2.0, 5),
+    "quote-api.jup.ag": (10.0, 20),
+    "api.dexscreener.com": (5.0, 10),
+    "api.pump.fun": (5.0, 10),
+}
+
+# Priority of requests made in the current task (see request_priority)
+_request_priority = contextvars.ContextVar("request_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Run the enclosed requests (and tasks started inside the block) at a priority
+
+    Example:
+        with request_priority(PRIORITY_BUY):
+            quote = await wallet_manager.get_buy_quote(...)
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority():
+    return _request_priority.get()
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` requests per second sustained, ``burst`` at once
+
+    When the bucket is empty callers queue up and are released one token at a
+    time, lowest priority value first (FIFO within a priority).
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waiters = []  # (priority, seq, future)
+        self.seq = count()
+        self.timer = None
+        self.waited = 0
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority=None):
+        """
+        Wait for a token
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if priority is None:
+            priority = current_priority()
+        self._refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.seq), future))
+        self._dispatch()
+        await future  # A cancelled waiter is skipped by _dispatch
+
+        waited = time.monotonic() - started
+        self.waited += 1
+        self.total_wait += waited
+        return waited
+
+    def _dispatch(self):
+        """Hand out available tokens to the best waiters and schedule the next wakeup"""
+        self._refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+        while self.waiters and self.waiters[0][2].done():
+            heapq.heappop(self.waiters)
+
+        if self.waiters and self.timer is None:
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            self.timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self._dispatch()
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "queued": sum(1 for _, _, future in self.waiters if not future.done()),
+            "waited": self.waited,
+            "avg_wait": round(self.total_wait / self.waited, 3) if self.waited else 0.0
+        }
+
+
+class RateLimiter:
+    """
+    One TokenBucket per upstream host; hosts without a limit are not paced
+
+    Args:
+        host_limits: Extra or overriding {host: (rate, burst)} entries
+    """
+
+    def __init__(self, host_limits=None):
+        self.host_limits = dict(HOST_RATE_LIMITS)
+        if host_limits:
+            self.host_limits.update(host_limits)
+        self.buckets = {}
+
+    def set_limit(self, host, rate, burst):
+        self.host_limits[host] = (rate, burst)
+        self.buckets.pop(host, None)
+
+    def bucket(self, host):
+        bucket = self.buckets.get(host)
+        if bucket is None and host in self.host_limits:
+            rate, burst = self.host_limits[host]
+            bucket = self.buckets[host] = TokenBucket(rate, burst)
+        return bucket
+
+    async def acquire(self, host, priority=None):
+        """Wait until a request to ``host`` may be sent (returns seconds waited)"""
+        bucket = self.bucket(host)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire(priority)
+
+    def stats(self):
+        return {host: bucket.stats() for host, bucket in self.buckets.items()}
+
+
+def prioritized(priority):
+    """Decorator: run an async function's requests at ``priority``"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with request_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,63 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight request
+
+    The first caller for a key starts the request as a task; callers arriving
+    while it runs await the same task instead of issuing their own. The key is
+    forgotten as soon as the task finishes, so later calls fetch again (caching
+    is up to the caller). Each caller awaits through ``asyncio.shield``, so one
+    caller giving up (e.g. a deadline) does not cancel the request for the
+    others.
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.started = 0
+        self.joined = 0
+
+    def __contains__(self, key):
+        return key in self.flights
+
+    def start(self, key, factory):
+        """
+        Get the in-flight task for ``key``, starting ``factory()`` if there is none
+
+        Args:
+            key: Hashable identity of the request
+            factory: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            asyncio.Task: The shared task
+        """
+        task = self.flights.get(key)
+        if task is not None:
+            self.joined += 1
+            return task
+
+        task = asyncio.create_task(factory())
+        self.flights[key] = task
+        self.started += 1
+
+        def forget(t):
+            if self.flights.get(key) is t:
+                del self.flights[key]
+            # Mark the exception retrieved in case every caller gave up waiting
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(forget)
+        return task
+
+    async def do(self, key, factory):
+        """Await the shared result for ``key`` (see start)"""
+        return await asyncio.shield(self.start(key, factory))
+
+    def stats(self):
+        return {
+            "in_flight": len(self.flights),
+            "started": self.started,
+            "coalesced": self.joined
+        }
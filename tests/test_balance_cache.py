@@ -0,0 +1,52 @@
+import asyncio
+
+from balance_cache import LAMPORTS_PER_SOL, BalanceCache, LocalBalanceFeed
+
+
+def test_reads_are_served_only_while_the_feed_is_live():
+    async def scenario():
+        cache = BalanceCache()
+        connects = []
+
+        async def on_connect():
+            connects.append(True)
+
+        feed = LocalBalanceFeed(cache, on_connect=on_connect)
+        await feed.watch("wallet")
+        feed.push("wallet", 2 * LAMPORTS_PER_SOL, slot=10)
+        before = cache.get("wallet")
+
+        task = asyncio.create_task(feed.run())
+        await asyncio.sleep(0)
+        live = cache.get("wallet")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return before, live, cache.get("wallet"), connects
+
+    assert asyncio.run(scenario()) == (None, 2.0, None, [True])
+
+
+def test_unwatched_wallets_are_ignored():
+    cache = BalanceCache()
+    LocalBalanceFeed(cache).push("other", LAMPORTS_PER_SOL)
+    assert cache.entries == {}
+
+
+def test_older_slots_do_not_overwrite_newer_balances():
+    cache = BalanceCache()
+    cache.live = True
+    cache.set("wallet", 3 * LAMPORTS_PER_SOL, slot=20)
+    cache.set("wallet", 1 * LAMPORTS_PER_SOL, slot=10)
+    assert cache.get("wallet") == 3.0
+
+
+def test_own_trades_adjust_the_balance_optimistically():
+    cache = BalanceCache()
+    cache.live = True
+    cache.set("wallet", LAMPORTS_PER_SOL, slot=1)
+    cache.adjust("wallet", -0.25)
+    cache.adjust("unknown", -1)
+    assert cache.get("wallet") == 0.75
+    assert cache.get("unknown") is None
+    cache.adjust("wallet", -5)
+    assert cache.get("wallet") == 0.0
@@ -0,0 +1,37 @@
+import pytest
+
+import decision_pipeline
+from decision_pipeline import DEFAULT_SETTINGS, DecisionPipeline, compile_profile
+
+
+@pytest.fixture(params=["vectorized", "scalar"])
+def pipeline(request, monkeypatch):
+    """A DecisionPipeline on the NumPy path and on the per-token fallback"""
+    if request.param == "scalar":
+        monkeypatch.setattr(decision_pipeline, "batch_scoring", None)
+    elif decision_pipeline.batch_scoring is None:
+        pytest.skip("NumPy is not installed")
+    return DecisionPipeline()
+
+
+def screen(pipeline, tokens, settings=None):
+    profile = compile_profile(1, {**DEFAULT_SETTINGS, **(settings or {})})
+    return [token["address"] for token, _, _ in pipeline.screen_batch(tokens, set(), [profile])]
+
+
+@pytest.mark.parametrize("liquidity", [None, "n/a", "", float("nan")])
+def test_unknown_liquidity_is_not_rejected(pipeline, liquidity):
+    tokens = [{"address": "unknown", "liquidity": liquidity}, {"address": "low", "liquidity": 10}]
+    assert screen(pipeline, tokens) == ["unknown"]
+    assert pipeline.rejections["liquidity"] == 1
+
+
+def test_numeric_string_liquidity_is_compared_as_a_number(pipeline):
+    tokens = [{"address": "rich", "liquidity": "5000"}, {"address": "poor", "liquidity": "50"}]
+    assert screen(pipeline, tokens) == ["rich"]
+
+
+def test_string_age_is_coerced(pipeline):
+    tokens = [{"address": "old", "age_hours": "30"}, {"address": "new", "age_hours": "1"}, {"address": "odd", "age_hours": "?"}]
+    assert sorted(screen(pipeline, tokens, {"max_token_age_hours": 24})) == ["new", "odd"]
+    assert pipeline.rejections["age"] == 1
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from discovery import DiscoveryEngine, FakeSource
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=5))
+
+
+def test_duplicate_addresses_are_queued_once():
+    async def scenario():
+        tokens = [{"address": "A", "source": "fake"}, {"address": "B", "source": "fake"}, {"address": "A", "source": "fake"}]
+        engine = DiscoveryEngine([FakeSource(tokens, interval=0)])
+        engine.start()
+        await asyncio.sleep(0.05)
+        batch = await engine.get_batch(timeout=0.1)
+        await engine.stop()
+        return [token["address"] for token in batch]
+
+    assert run(scenario()) == ["A", "B"]
+
+
+def test_seen_entries_expire():
+    async def scenario():
+        engine = DiscoveryEngine([], seen_ttl=0.05)
+        await engine.emit({"address": "A"})
+        await engine.emit({"address": "A"})
+        first = await engine.get_batch(timeout=0.1)
+        await asyncio.sleep(0.1)
+        await engine.emit({"address": "A"})
+        second = await engine.get_batch(timeout=0.1)
+        return len(first), len(second)
+
+    assert run(scenario()) == (1, 1)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    async def scenario():
+        engine = DiscoveryEngine([], maxsize=1)
+        for address in ("A", "B", "C"):
+            await engine.emit({"address": address})
+        dropped = engine.dropped
+        # A token dropped for a full queue is not remembered and can be queued later
+        await engine.get_batch(timeout=0.1)
+        await engine.emit({"address": "B"})
+        later = await engine.get_batch(timeout=0.1)
+        return dropped, [token["address"] for token in later]
+
+    assert run(scenario()) == (2, ["B"])
+
+
+def test_stale_tokens_are_dropped_and_forgotten():
+    async def scenario():
+        engine = DiscoveryEngine([], max_age=60)
+        await engine.emit({"address": "A", "discovered_at": time.time() - 120})
+        stale = await engine.get_batch(timeout=0.1)
+        await engine.emit({"address": "A"})
+        fresh = await engine.get_batch(timeout=0.1)
+        return len(stale), engine.dropped, [token["address"] for token in fresh]
+
+    assert run(scenario()) == (0, 1, ["A"])
+
+
+def test_get_batch_times_out_empty():
+    assert run(DiscoveryEngine([]).get_batch(timeout=0.01)) == []
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TokenIndex:
+    """
+    Bounded, insertion-ordered set of processed token addresses
+
+    Lookups, inserts and evictions are O(1). Entries expire ``ttl`` seconds
+    after they were added, and the oldest entries are evicted once more than
+    ``maxsize`` are held. When ``path`` is set the index is loaded from and
+    saved to a JSON file so a restart does not re-process recent listings.
+    """
+
+    def __init__(self, maxsize=1000, ttl=3600.0, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # address -> time added, oldest first
+        self.dirty = False
+        if path:
+            self.load()
+
+    def __contains__(self, address):
+        added = self.entries.get(address)
+        if added is None:
+            return False
+        if time.time() - added > self.ttl:
+            del self.entries[address]
+            self.dirty = True
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, address):
+        """Mark a token as processed (refreshing its position if already present)"""
+        self.entries[address] = time.time()
+        self.entries.move_to_end(address)
+        self.dirty = True
+        self.expire()
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def discard(self, address):
+        if self.entries.pop(address, None) is not None:
+            self.dirty = True
+
+    def expire(self):
+        """Drop expired entries from the old end of the index"""
+        cutoff = time.time() - self.ttl
+        while self.entries:
+            address, added = next(iter(self.entries.items()))
+            if added > cutoff:
+                break
+            self.entries.popitem(last=False)
+            self.dirty = True
+
+    def load(self):
+        """Load persisted entries, skipping ones that have already expired"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading processed tokens from {self.path}: {e}")
+            return
+
+        cutoff = time.time() - self.ttl
+        for address, added in sorted(saved.items(), key=lambda item: item[1]):
+            if added > cutoff:
+                self.entries[address] = added
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        self.dirty = False
+        logger.info(f"Loaded {len(self.entries)} processed tokens from {self.path}")
+
+    def save(self):
+        """Persist the index if it changed since the last save"""
+        if not self.path or not self.dirty:
+            return
+        self.expire()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(self.entries), f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logger.error(f"Error saving processed tokens to {self.path}: {e}")
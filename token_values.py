@@ -0,0 +1,20 @@
+import math
+
+
+def token_number(token, key):
+    """
+    One numeric field of a token as a float, or None when missing or not a number
+
+    Discovery sources report numbers as ints, floats or strings; anything that
+    does not parse (or is NaN) counts as unknown. Both the per-token decision
+    stages and batch_scoring read token fields through this, so a bad value is
+    treated the same way on either path.
+    """
+    value = token.get(key)
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
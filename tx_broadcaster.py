@@ -0,0 +1,291 @@
+import time
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the per-endpoint latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class EndpointStats:
+    """Acceptance statistics of one RPC endpoint"""
+
+    def __init__(self, url):
+        self.url = url
+        self.sends = 0
+        self.accepted = 0
+        self.errors = 0
+        self.first = 0             # Times this endpoint accepted before all others
+        self.latency = None        # EWMA of acceptance latency (seconds)
+        self.pruned_until = 0.0
+        self.last_error = None
+
+    @property
+    def error_rate(self):
+        return self.errors / self.sends if self.sends else 0.0
+
+    def record(self, latency=None, error=None):
+        self.sends += 1
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+            return
+        self.accepted += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_EWMA_ALPHA * (latency - self.latency)
+
+    def as_dict(self):
+        return {
+            "sends": self.sends,
+            "accepted": self.accepted,
+            "first": self.first,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "pruned": self.pruned_until > time.monotonic(),
+            "last_error": self.last_error
+        }
+
+
+class TransactionBroadcaster:
+    """
+    Send one signed transaction to several RPC endpoints at once
+
+    ``broadcast()`` returns as soon as the first endpoint accepts the
+    transaction; the other sends keep running in the background (more
+    leaders see it, the signature is the same). Every endpoint keeps an
+    acceptance-latency average and error counters. Endpoints that error on
+    more than ``max_error_rate`` of their sends, or are more than
+    ``max_latency_ratio`` times slower than the fastest, are pruned for
+    ``prune_seconds`` and then tried again. At least ``min_endpoints`` (the
+    best ranked) are always used.
+    """
+
+    def __init__(self, http_pool, endpoints, min_endpoints=1, min_samples=10, max_error_rate=0.5,
+                 max_latency_ratio=4.0, prune_seconds=300.0):
+        self.http = http_pool
+        self.endpoints = {url: EndpointStats(url) for url in dict.fromkeys(endpoints) if url}
+        self.min_endpoints = max(1, min_endpoints)
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_latency_ratio = max_latency_ratio
+        self.prune_seconds = prune_seconds
+        self.background = set()
+        # Rebroadcast loop outcomes (see land)
+        self.landing = {"transactions": 0, "landed": 0, "failed": 0, "expired": 0, "attempts": 0, "attempts_to_land": {}}
+
+    def ranked(self):
+        """Endpoints best first: fastest average acceptance, unmeasured ones after, erroring ones last"""
+        def key(stats):
+            return (stats.error_rate > self.max_error_rate, stats.latency is None, stats.latency or 0.0)
+        return sorted(self.endpoints.values(), key=key)
+
+    def active(self):
+        """Endpoints a broadcast goes to right now"""
+        now = time.monotonic()
+        ranked = self.ranked()
+        active = [stats for stats in ranked if stats.pruned_until <= now]
+        for stats in ranked:
+            if len(active) >= self.min_endpoints:
+                break
+            if stats not in active:
+                active.append(stats)
+        return active
+
+    def prune(self):
+        """Bench endpoints that error too often or are much slower than the fastest"""
+        now = time.monotonic()
+        latencies = [s.latency for s in self.endpoints.values() if s.latency is not None and s.pruned_until <= now]
+        fastest = min(latencies) if latencies else None
+        for stats in self.endpoints.values():
+            if stats.pruned_until > now or stats.sends < self.min_samples:
+                continue
+            too_slow = fastest is not None and stats.latency is not None and stats.latency > fastest * self.max_latency_ratio
+            if stats.error_rate > self.max_error_rate or too_slow:
+                logger.warning(
+                    f"Pruning RPC endpoint {urlsplit(stats.url).hostname} for {self.prune_seconds:.0f}s "
+                    f"({'slow' if too_slow else 'errors'}: {stats.as_dict()})"
+                )
+                stats.pruned_until = now + self.prune_seconds
+                # Start over when it comes back, so it is judged on fresh samples
+                stats.sends = stats.accepted = stats.errors = 0
+
+    async def _send(self, stats, serialized_tx, skip_preflight, max_retries=None):
+        config = {"encoding": "base64", "skipPreflight": skip_preflight, "preflightCommitment": "processed"}
+        if max_retries is not None:
+            config["maxRetries"] = max_retries
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "sendTransaction",
+            "params": [serialized_tx, config]
+        }
+        started = time.monotonic()
+        try:
+            client = self.http.get_client(stats.url)
+            response = await client.post(stats.url, json=payload)
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            data = response.json()
+            if "result" not in data:
+                raise ValueError(data.get("error", "no result"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats.record(error=e)
+            raise
+        latency = time.monotonic() - started
+        stats.record(latency=latency)
+        return data["result"], latency
+
+    async def broadcast(self, serialized_tx, skip_preflight=True, max_retries=None):
+        """
+        Send a base64-encoded signed transaction to every active endpoint
+
+        ``max_retries`` is passed to the RPC nodes (0 leaves resending to the
+        caller, see land).
+
+        Returns:
+            dict: {"signature", "endpoint", "latency", "errors"}; signature is
+                None (and errors maps endpoint -> message) if none accepted it
+        """
+        endpoints = self.active()
+        tasks = {asyncio.create_task(self._send(stats, serialized_tx, skip_preflight, max_retries)): stats for stats in endpoints}
+        errors = {}
+        winner = None
+
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stats = tasks[task]
+                if task.exception() is not None:
+                    errors[stats.url] = str(task.exception())
+                elif winner is None:
+                    signature, latency = task.result()
+                    winner = {"signature": signature, "endpoint": stats.url, "latency": latency}
+                    stats.first += 1
+
+        # Let the slower sends finish in the background; they only add coverage and stats
+        for task in pending:
+            self.background.add(task)
+            task.add_done_callback(self._finish_background)
+
+        self.prune()
+        if winner is None:
+            return {"signature": None, "endpoint": None, "latency": None, "errors": errors}
+        winner["errors"] = errors
+        return winner
+
+    async def send_until_landed(self, serialized_tx, tracker, commitment="confirmed", timeout=None,
+                                last_valid_block_height=None, is_expired=None, interval=0.5):
+        """
+        Broadcast a signed transaction and keep re-sending it until it lands
+
+        Same as broadcast() followed by land(); callers that must not wait for
+        the outcome call those two separately and run land() in a task.
+
+        Returns:
+            dict: broadcast() result plus "attempts" and "confirmation" (the
+                tracker result, None if no endpoint accepted the transaction)
+        """
+        first = await self.broadcast(serialized_tx, max_retries=0)
+        if not first["signature"]:
+            self.landing["transactions"] += 1
+            self.landing["attempts"] += 1
+            first.update({"attempts": 1, "confirmation": None})
+            return first
+        return await self.land(first, serialized_tx, tracker, commitment, timeout,
+                               last_valid_block_height, is_expired, interval)
+
+    async def land(self, first, serialized_tx, tracker, commitment="confirmed", timeout=None,
+                   last_valid_block_height=None, is_expired=None, interval=0.5):
+        """
+        Keep re-sending an accepted transaction until it lands
+
+        The same signed bytes are re-broadcast every ``interval`` seconds until
+        the ConfirmationTracker has seen the transaction (any commitment), it
+        failed, or its blockhash expired; a re-sent duplicate can never
+        execute twice. The RPC nodes' own retry queues are disabled so the
+        loop controls the cadence.
+
+        Args:
+            first: The broadcast(max_retries=0) result that accepted the transaction
+            serialized_tx: Base64-encoded signed transaction
+            tracker: ConfirmationTracker used to wait for the outcome
+            commitment: Commitment to wait for
+            timeout: Seconds to wait for ``commitment`` at most
+            last_valid_block_height: Expiry height of the transaction's blockhash
+            is_expired: Optional callable(last_valid_block_height) -> bool that
+                detects expiry locally (e.g. BlockhashCache.is_expired)
+            interval: Seconds between re-sends
+
+        Returns:
+            dict: ``first`` plus "attempts" and "confirmation" (the tracker result)
+        """
+        attempts = 1
+        self.landing["transactions"] += 1
+        signature = first["signature"]
+        waiter = asyncio.create_task(tracker.wait(
+            signature,
+            commitment=commitment,
+            timeout=timeout,
+            last_valid_block_height=last_valid_block_height
+        ))
+        try:
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=interval)
+                if done:
+                    break
+                if tracker.status(signature) is not None:
+                    continue  # Landed (or failed): just wait for the commitment
+                if is_expired is not None and is_expired(last_valid_block_height):
+                    continue  # Can no longer land; the tracker reports the expiry
+                attempts += 1
+                # Not awaited: a slow endpoint must not delay the next re-send
+                resend = asyncio.create_task(self.broadcast(serialized_tx, max_retries=0))
+                self.background.add(resend)
+                resend.add_done_callback(self._finish_background)
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+
+        confirmation = waiter.result()
+        self.landing["attempts"] += attempts
+        status = confirmation["status"]
+        if status in ("failed", "expired"):
+            self.landing[status] += 1
+        elif status is not None:
+            self.landing["landed"] += 1
+            histogram = self.landing["attempts_to_land"]
+            histogram[attempts] = histogram.get(attempts, 0) + 1
+        if attempts > 1:
+            logger.info(f"Transaction {signature[:8]}... {status or 'unconfirmed'} after {attempts} send(s)")
+
+        result = dict(first)
+        result.update({"attempts": attempts, "confirmation": confirmation})
+        return result
+
+    def landing_stats(self):
+        """Outcomes of land(): landed/failed/expired counts and attempts-to-land histogram"""
+        landing = dict(self.landing)
+        landing["avg_attempts"] = round(landing["attempts"] / landing["transactions"], 2) if landing["transactions"] else 0.0
+        return landing
+
+    def _finish_background(self, task):
+        self.background.discard(task)
+        if not task.cancelled():
+            task.exception()  # Already counted in the endpoint stats
+
+    async def close(self):
+        for task in list(self.background):
+            task.cancel()
+        await asyncio.gather(*self.background, return_exceptions=True)
+        self.background = set()
+
+    def stats(self):
+        """Per-endpoint statistics, best ranked first"""
+        return {stats.url: stats.as_dict() for stats in self.ranked()}
@@ -0,0 +1,288 @@
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+
+# Websocket support is optional; without it only polling mode is available
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger(__name__)
+
+# Commitment levels in increasing order of finality
+COMMITMENT_LEVELS = ("processed", "confirmed", "finalized")
+
+# getSignatureStatuses accepts at most this many signatures per call
+MAX_SIGNATURES_PER_CALL = 256
+
+
+class ConfirmationTracker:
+    """
+    Track sent transactions until they land, fail or expire
+
+    Every pending signature is checked with one ``getSignatureStatuses`` call
+    per 256 signatures per poll, however many buys are in flight. A
+    transaction whose ``lastValidBlockHeight`` has passed (or, without one,
+    that stays unseen for ``timeout`` seconds) is reported as "expired".
+
+    ``block_height`` may be a callable returning the current block height (or
+    None when unknown), e.g. BlockhashCache.block_height; expiry checks then
+    skip the ``getBlockHeight`` call.
+
+    In "subscribe" mode every signature also gets a ``signatureSubscribe`` on
+    one shared websocket, so confirmation is pushed instead of polled; polling
+    then only runs every ``subscription_poll_interval`` seconds to pick up
+    finalization and expiry.
+
+    Results are dicts: {"status": "processed" | "confirmed" | "finalized" |
+    "failed" | "expired", "slot": int or None, "error": ... or None}.
+    """
+
+    def __init__(self, http_pool, rpc_url, ws_url=None, mode="poll", poll_interval=0.5,
+                 subscription_poll_interval=2.0, timeout=90.0, max_results=1000, block_height=None):
+        self.http = http_pool
+        self.rpc_url = rpc_url
+        self.ws_url = ws_url
+        self.mode = mode if websockets is not None and ws_url else "poll"
+        self.poll_interval = poll_interval
+        self.subscription_poll_interval = subscription_poll_interval
+        self.timeout = timeout
+        self.max_results = max_results
+        self.block_height = block_height
+        self.pending = {}  # signature -> entry (see track)
+        self.results = OrderedDict()  # signature -> final result, most recent last
+        self.poll_task = None
+        self.ws = None
+        self.ws_task = None
+        self.ws_requests = {}       # request id -> signature
+        self.ws_subscriptions = {}  # subscription id -> signature
+        self.next_id = 1
+        self.rpc_calls = 0
+
+    def track(self, signature, last_valid_block_height=None):
+        """Start tracking a sent transaction (no-op if it is already tracked)"""
+        if signature in self.pending or signature in self.results:
+            return
+        loop = asyncio.get_running_loop()
+        self.pending[signature] = {
+            "added": time.monotonic(),
+            "last_valid_block_height": last_valid_block_height,
+            "status": None,
+            "slot": None,
+            "futures": {level: loop.create_future() for level in COMMITMENT_LEVELS}
+        }
+        if self.poll_task is None or self.poll_task.done():
+            self.poll_task = asyncio.create_task(self._poll_loop())
+        if self.mode == "subscribe":
+            if self.ws_task is None or self.ws_task.done():
+                self.ws_task = asyncio.create_task(self._run_subscriptions())
+            elif self.ws is not None:
+                asyncio.create_task(self._subscribe(signature))
+
+    async def wait(self, signature, commitment="confirmed", timeout=None, last_valid_block_height=None):
+        """
+        Wait until a transaction reaches ``commitment``, fails or expires
+
+        Args:
+            signature: Transaction signature (tracked automatically if needed)
+            commitment: "processed", "confirmed" or "finalized"
+            timeout: Optional seconds to wait before returning the status so far
+            last_valid_block_height: Expiry height of the transaction's blockhash
+
+        Returns:
+            dict: The result (see class docstring); status is None when
+                ``timeout`` passed first
+        """
+        if signature in self.results:
+            return dict(self.results[signature])
+        self.track(signature, last_valid_block_height)
+        entry = self.pending[signature]
+        future = entry["futures"][commitment]
+        try:
+            return dict(await asyncio.wait_for(asyncio.shield(future), timeout))
+        except asyncio.TimeoutError:
+            return {"status": entry["status"], "slot": entry["slot"], "error": None}
+
+    def status(self, signature):
+        """Latest known status of a signature (None if unknown or still unseen)"""
+        if signature in self.results:
+            return self.results[signature]["status"]
+        entry = self.pending.get(signature)
+        return entry["status"] if entry else None
+
+    async def close(self):
+        for task in (self.poll_task, self.ws_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self.poll_task, self.ws_task) if t is not None), return_exceptions=True)
+        self.poll_task = self.ws_task = None
+
+    def _resolve(self, signature, status, slot=None, error=None):
+        """Record a status and wake every waiter whose commitment it satisfies"""
+        entry = self.pending.get(signature)
+        if entry is None:
+            return
+        result = {"status": status, "slot": slot, "error": error}
+
+        if status in COMMITMENT_LEVELS:
+            reached = COMMITMENT_LEVELS.index(status)
+            if entry["status"] in COMMITMENT_LEVELS and COMMITMENT_LEVELS.index(entry["status"]) > reached:
+                return  # Never move backwards (e.g. a late poll after a push)
+            entry["status"], entry["slot"] = status, slot
+            for level in COMMITMENT_LEVELS[:reached + 1]:
+                if not entry["futures"][level].done():
+                    entry["futures"][level].set_result(result)
+            if status != "finalized":
+                return
+        else:
+            entry["status"] = status
+            for future in entry["futures"].values():
+                if not future.done():
+                    future.set_result(result)
+
+        del self.pending[signature]
+        self.results[signature] = result
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+        if status in ("failed", "expired"):
+            logger.warning(f"Transaction {signature[:8]}... {status}{f': {error}' if error else ''}")
+
+    async def _rpc(self, method, params):
+        client = self.http.get_client(self.rpc_url)
+        self.rpc_calls += 1
+        response = await client.post(self.rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        if response.status_code != 200:
+            raise ValueError(f"{method} returned HTTP {response.status_code}")
+        data = response.json()
+        if "error" in data:
+            raise ValueError(f"{method} error: {data['error']}")
+        return data.get("result")
+
+    async def _poll_loop(self):
+        while self.pending:
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling signature statuses: {e}")
+            interval = self.subscription_poll_interval if self.ws is not None else self.poll_interval
+            await asyncio.sleep(interval)
+
+    async def _poll_once(self):
+        signatures = list(self.pending)
+        chunks = [signatures[i:i + MAX_SIGNATURES_PER_CALL] for i in range(0, len(signatures), MAX_SIGNATURES_PER_CALL)]
+        responses = await asyncio.gather(*(
+            self._rpc("getSignatureStatuses", [chunk, {"searchTransactionHistory": False}])
+            for chunk in chunks
+        ))
+
+        unseen = []
+        for chunk, response in zip(chunks, responses):
+            for signature, status in zip(chunk, (response or {}).get("value", [])):
+                if status is None:
+                    unseen.append(signature)
+                    continue
+                if status.get("err") is not None:
+                    self._resolve(signature, "failed", status.get("slot"), status.get("err"))
+                else:
+                    self._resolve(signature, status.get("confirmationStatus") or "processed", status.get("slot"))
+
+        if unseen:
+            await self._expire(unseen)
+
+    async def _expire(self, signatures):
+        """Expire unseen transactions whose blockhash is no longer valid"""
+        now = time.monotonic()
+        block_height = self.block_height() if self.block_height is not None else None
+        if block_height is None and any(self.pending[s]["last_valid_block_height"] for s in signatures if s in self.pending):
+            try:
+                block_height = await self._rpc("getBlockHeight", [{"commitment": "confirmed"}])
+            except Exception as e:
+                logger.error(f"Error fetching block height: {e}")
+
+        for signature in signatures:
+            entry = self.pending.get(signature)
+            if entry is None:
+                continue
+            last_valid = entry["last_valid_block_height"]
+            if last_valid and block_height is not None:
+                if block_height > last_valid:
+                    self._resolve(signature, "expired", error="blockhash expired")
+            elif now - entry["added"] > self.timeout:
+                self._resolve(signature, "expired", error=f"not seen within {self.timeout:.0f}s")
+
+    async def _subscribe(self, signature):
+        request_id = self.next_id
+        self.next_id += 1
+        self.ws_requests[request_id] = signature
+        await self.ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "signatureSubscribe",
+            "params": [signature, {"commitment": "confirmed"}]
+        }))
+
+    async def _run_subscriptions(self):
+        """Push confirmations over one websocket while anything is pending"""
+        backoff = 1.0
+        while self.pending:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+                    self.ws = ws
+                    self.ws_requests = {}
+                    self.ws_subscriptions = {}
+                    for signature in list(self.pending):
+                        await self._subscribe(signature)
+                    backoff = 1.0
+
+                    async for raw in ws:
+                        self._handle(json.loads(raw))
+                        if not self.pending:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Signature subscription error: {e} - reconnecting in {backoff:.0f}s")
+            finally:
+                self.ws = None
+
+            if self.pending:
+                await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, 30.0)
+
+    def _handle(self, message):
+        if "id" in message and message["id"] in self.ws_requests:
+            signature = self.ws_requests.pop(message["id"])
+            if "result" in message:
+                self.ws_subscriptions[message["result"]] = signature
+            return
+
+        if message.get("method") != "signatureNotification":
+            return
+        params = message.get("params", {})
+        signature = self.ws_subscriptions.pop(params.get("subscription"), None)
+        result = params.get("result", {})
+        if signature is None or not result:
+            return
+        value = result.get("value") or {}
+        slot = result.get("context", {}).get("slot")
+        if value.get("err") is not None:
+            self._resolve(signature, "failed", slot, value.get("err"))
+        else:
+            self._resolve(signature, "confirmed", slot)
+
+    def stats(self):
+        return {
+            "mode": "subscribe" if self.ws is not None else "poll",
+            "pending": len(self.pending),
+            "rpc_calls": self.rpc_calls,
+            "recent": {
+                status: sum(1 for result in self.results.values() if result["status"] == status)
+                for status in ("finalized", "failed", "expired")
+            }
+        }
@@ -249,6 +249,16 @@ import time
 import asyncio
 from solana.keypair import Keypair
 import httpx
+from http_pool import HttpClientPool
+from balance_cache import BalanceCache, AccountSubscriptionFeed, LocalBalanceFeed
+from metadata_cache import MetadataCache, SOCIAL_FIELDS
+from circuit_breaker import CircuitBreaker
+from rate_limiter import prioritized, request_priority, PRIORITY_BUY, PRIORITY_NORMAL, PRIORITY_BACKGROUND
+from single_flight import SingleFlight
+from tx_tracker import ConfirmationTracker, COMMITMENT_LEVELS
+from blockhash_cache import BlockhashCache
+from tx_broadcaster import TransactionBroadcaster
+from priority_fees import PriorityFeeEstimator, LAMPORTS_PER_SOL
 
 # Setup logging
 #logger = logging.getLogger(__name__)
@@ -261,8 +271,126 @@ class WalletManager:
         self.wallet_file = wallet_file
         self.wallets = {}
         self.auto_buy_enabled = False
+        # Shared keep-alive HTTP clients, one per upstream host
+        self.http = HttpClientPool()
+        # Concurrent identical lookups (metadata, balances, quotes) share one request
+        self.single_flight = SingleFlight()
+        # Per-endpoint latency/error counters for Dexscreener discovery
+        self.dexscreener_stats = {}
+        # Candidates kept per discovery cycle; ranking is vectorized, so a wide net is cheap
+        self.dexscreener_pair_limit = int(os.getenv("DEXSCREENER_PAIR_LIMIT", "100"))
+        # Push-driven SOL balances (see start_balance_feed)
+        self.balance_cache = BalanceCache()
+        self.balance_feed = None
+        self.balance_feed_task = None
+        # username -> (public key, Keypair), decoded once instead of on every buy
+        self.keypairs = {}
+        # Prefetched Jupiter buy quotes: (mint, lamports, slippageBps) -> (expires_at, quote)
+        self.quote_cache = {}
+        self.quote_tasks = {}
+        self.quote_ttl = float(os.getenv("JUPITER_QUOTE_TTL", "10"))
+        self.max_quote_prefetch = int(os.getenv("JUPITER_QUOTE_PREFETCH_MAX", "20"))
+        # Token metadata: in-memory LRU backed by a local SQLite file
+        self.metadata_cache = MetadataCache(os.getenv("TOKEN_METADATA_DB", "token_metadata.db"))
+        self.metadata_refresh_tasks = {}
+        # Sent transactions are confirmed in batches (getSignatureStatuses) or via signatureSubscribe
+        rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+        # Recent blockhash kept warm in the background (see start_blockhash_refresher)
+        self.blockhash_cache = BlockhashCache(self.http, rpc_url, refresh_interval=float(os.getenv("BLOCKHASH_REFRESH_INTERVAL", "2")))
+        self.tx_tracker = ConfirmationTracker(
+            self.http,
+            rpc_url,
+            ws_url=os.getenv("SOLANA_WS_URL", rpc_url.replace("https://", "wss://").replace("http://", "ws://")),
+            mode=os.getenv("TX_CONFIRMATION_MODE", "poll"),
+            block_height=self.blockhash_cache.block_height
+        )
+        # Signed transactions go to every endpoint in SOLANA_BROADCAST_RPC_URLS (plus the main RPC)
+        broadcast_urls = [rpc_url] + [url.strip() for url in os.getenv("SOLANA_BROADCAST_RPC_URLS", "").split(",")]
+        self.broadcaster = TransactionBroadcaster(self.http, broadcast_urls)
+        self.confirm_commitment = os.getenv("TX_CONFIRM_COMMITMENT", "confirmed")
+        self.confirm_timeout = float(os.getenv("TX_CONFIRM_TIMEOUT", "90"))
+        self.rebroadcast_interval = int(os.getenv("TX_REBROADCAST_INTERVAL_MS", "500")) / 1000
+        # Sent buys being re-sent until they land (see _land_buy)
+        self.landing_tasks = set()
+        # Priority fees sampled per swap accounts (getRecentPrioritizationFees), see get_priority_fee_lamports
+        self.fee_estimator = PriorityFeeEstimator(
+            self.http,
+            rpc_url,
+            window_slots=int(os.getenv("PRIORITY_FEE_WINDOW_SLOTS", "300")),
+            compute_units=int(os.getenv("SWAP_COMPUTE_UNITS", "300000")),
+            single_flight=self.single_flight
+        )
+        self.default_fee_policy = os.getenv("PRIORITY_FEE_POLICY", "p75")
+        # Per-source circuit breakers shared by discovery and metadata lookups
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3")),
+                base_delay=float(os.getenv("CIRCUIT_BASE_DELAY", "5")),
+                max_delay=float(os.getenv("CIRCUIT_MAX_DELAY", "300"))
+            )
+            for name in ("dexscreener", "pump.fun", "birdeye", "solscan")
+        }
         self.load_wallets()
 
+    async def close(self):
+        """Release network resources (called on bot shutdown)"""
+        if self.balance_feed_task is not None:
+            self.balance_feed_task.cancel()
+            await asyncio.gather(self.balance_feed_task, return_exceptions=True)
+            self.balance_feed_task = None
+        for task in list(self.metadata_refresh_tasks.values()):
+            task.cancel()
+        for task in list(self.landing_tasks):
+            task.cancel()
+        await asyncio.gather(*self.landing_tasks, return_exceptions=True)
+        await self.tx_tracker.close()
+        await self.broadcaster.close()
+        await self.blockhash_cache.close()
+        await self.metadata_cache.close()
+        await self.http.aclose()
+
+    async def start_balance_feed(self, local=None):
+        """
+        Subscribe to account changes for every wallet so balance reads are served from memory
+
+        Args:
+            local: Use the in-process LocalBalanceFeed instead of the RPC websocket
+                (defaults to the BALANCE_FEED_LOCAL environment variable)
+
+        Returns:
+            The running feed
+        """
+        if self.balance_feed_task is not None:
+            return self.balance_feed
+
+        if local is None:
+            local = os.getenv("BALANCE_FEED_LOCAL", "0") == "1"
+        if local:
+            feed = LocalBalanceFeed(self.balance_cache, on_connect=self._resync_balances)
+        else:
+            rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+            ws_url = os.getenv("SOLANA_WS_URL", rpc_url.replace("https://", "wss://").replace("http://", "ws://"))
+            feed = AccountSubscriptionFeed(ws_url, self.balance_cache, on_connect=self._resync_balances)
+
+        for wallet in self.wallets.values():
+            if wallet.get("public"):
+                await feed.watch(wallet["public"])
+
+        self.balance_feed = feed
+        self.balance_feed_task = asyncio.create_task(feed.run())
+        print(f"📡 Balance feed started for {len(feed.pubkeys)} wallets")
+        return feed
+
+    def start_blockhash_refresher(self):
+        """Start refreshing the cached blockhash in the background (idempotent)"""
+        self.blockhash_cache.start()
+        print(f"🧱 Blockhash refresher started (every {self.blockhash_cache.refresh_interval}s)")
+
+    async def _resync_balances(self):
+        """Reload every wallet balance after the feed (re)connects"""
+        await self.get_balances(list(self.wallets), force_refresh=True)
+
     def load_wallets(self):
         if os.path.exists(self.wallet_file):
             try:
@@ -274,6 +402,14 @@ class WalletManager:
         else:
             self.wallets = {}
 
+        # Decode every keypair up front so signing never pays for it
+        self.keypairs = {}
+        for username in self.wallets:
+            try:
+                self.get_keypair(username)
+            except ValueError as e:
+                print(f"⚠️ Could not decode keypair for {username}: {e}")
+
     def save_wallets(self):
         with open(self.wallet_file, 'w') as f:
             json.dump(self.wallets, f, indent=2)
@@ -290,6 +426,56 @@ class WalletManager:
             return wallet.get('public', 'No wallet found')
         return "No wallet found"
 
+    def get_keypair(self, username):
+        """
+        Get the decoded signing keypair for a user's wallet
+
+        Keypairs are cached per username and rebuilt automatically when the
+        stored wallet changes (e.g. after it is regenerated).
+
+        Args:
+            username: The username of the wallet owner
+
+        Returns:
+            Keypair: The wallet keypair
+
+        Raises:
+            ValueError: If the wallet is missing or its secret key is invalid
+        """
+        wallet = self.get_wallet(username)
+        if not wallet:
+            raise ValueError("No wallet found")
+
+        username = username.lower()
+        cached = self.keypairs.get(username)
+        if cached and cached[0] == wallet.get("public"):
+            return cached[1]
+
+        secret_key = wallet.get('secret')
+        if not secret_key:
+            raise ValueError("Wallet has no secret key")
+
+        # Handle different secret key formats
+        if isinstance(secret_key, list):
+            # If stored as a list of integers
+            if len(secret_key) < 64:
+                raise ValueError(f"Invalid secret key length: {len(secret_key)}, needs 64 bytes")
+            secret_bytes = bytes(secret_key[:64])
+        else:
+            # If stored as base64 string
+            try:
+                secret_bytes = base64.b64decode(secret_key)
+            except Exception:
+                raise ValueError("Could not decode base64 secret key")
+
+        try:
+            keypair = Keypair.from_secret_key(secret_bytes)
+        except Exception as e:
+            raise ValueError(f"Error creating keypair: {str(e)}")
+
+        self.keypairs[username] = (wallet.get("public"), keypair)
+        return keypair
+
     def generate_wallet(self, username):
         """Create a new wallet for the user with a real Solana keypair"""
         if not username:
@@ -301,13 +487,23 @@ class WalletManager:
             keypair = Keypair()
             public_key = str(keypair.public_key)
 
+            # Forget the balance of the wallet being replaced
+            previous = self.wallets.get(username)
+            if previous and previous.get("public"):
+                self.balance_cache.invalidate(previous["public"])
+
             # Store the secret key as an array of integers
             # We'll convert to Base58 when exporting
             self.wallets[username] = {
                 "public": public_key,
                 "secret": list(keypair.secret_key)
             }
+            self.keypairs[username] = (public_key, keypair)
             self.save_wallets()
+
+            # Track the new wallet on the balance feed
+            if self.balance_feed is not None:
+                asyncio.get_running_loop().create_task(self.balance_feed.watch(public_key))
             return public_key
         except Exception as e:
             print(f"Error generating wallet: {e}")
@@ -317,6 +513,7 @@ class WalletManager:
         self.auto_buy_enabled = enabled
         return self.auto_buy_enabled
 
+    @prioritized(PRIORITY_BUY)
     async def get_jupiter_quote(self, input_mint, output_mint, amount_in_lamports):
         """
         Get a quote from Jupiter API for a token swap
@@ -335,113 +532,200 @@ class WalletManager:
 
             print(f"🔍 [JUPITER] Requesting quote: {url}")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
+            client = self.http.get_client(url)
+            response = await client.get(url)
 
-                if response.status_code == 200:
-                    quote_data = response.json()
-                    print(f"✅ [JUPITER] Quote received: {quote_data.get('outAmount')} tokens out")
-                    return quote_data
-                else:
-                    print(f"❌ [JUPITER] Quote failed: HTTP {response.status_code} - {response.text}")
-                    return None
+            if response.status_code == 200:
+                quote_data = response.json()
+                print(f"✅ [JUPITER] Quote received: {quote_data.get('outAmount')} tokens out")
+                return quote_data
+            else:
+                print(f"❌ [JUPITER] Quote failed: HTTP {response.status_code} - {response.text}")
+                return None
         except Exception as e:
             print(f"❌ [JUPITER] Quote error: {str(e)}")
             return None
 
-    async def execute_jupiter_swap(self, quote_data, wallet_keypair):
+    def prefetch_buy_quote(self, token_address, amount, slippage):
         """
-        Execute a swap on Jupiter using the quote data
+        Start fetching the SOL -> token quote for a likely buy in the background
+
+        buy_token() picks the quote up from the cache (or awaits the in-flight
+        request) instead of requesting it after the filters have passed.
+        Prefetches run at normal priority so speculative quotes never queue
+        ahead of a buy's own requests.
 
         Args:
-            quote_data: Quote data from Jupiter quote API
-            wallet_keypair: Solana keypair for signing
+            token_address: The token mint to buy
+            amount: Buy size in SOL
+            slippage: Slippage in percent, as passed to buy_token
+        """
+        if os.getenv("TEST_MODE", "0") == "1":
+            return
+
+        key = (token_address, int(amount * 1_000_000_000), int(slippage * 100))
+        cached = self.quote_cache.get(key)
+        if key in self.quote_tasks or (cached and cached[0] > time.time()):
+            return
+        if len(self.quote_tasks) >= self.max_quote_prefetch:
+            return
+
+        def store(t):
+            self.quote_tasks.pop(key, None)
+            if not t.cancelled() and t.exception() is None:
+                self.quote_cache[key] = (time.time() + self.quote_ttl, t.result())
+                # Warm the fee window for the accounts this swap will write to
+                self.fee_estimator.prefetch(self._swap_fee_accounts(token_address, t.result()))
+
+        # The task and its done callback copy the current context, priority included
+        with request_priority(PRIORITY_NORMAL):
+            task = self.single_flight.start(("quote",) + key, lambda: self._request_buy_quote(*key))
+            self.quote_tasks[key] = task
+            task.add_done_callback(store)
+
+    @prioritized(PRIORITY_BUY)
+    async def get_buy_quote(self, token_address, amount_lamports, slippage_bps):
+        """
+        Get a SOL -> token quote, reusing a prefetched one when still fresh
+
+        Args:
+            token_address: The token mint to buy
+            amount_lamports: Buy size in lamports
+            slippage_bps: Slippage in basis points
 
         Returns:
-            dict: Transaction details or None if failed
+            dict: Jupiter quote response
+
+        Raises:
+            ValueError: If Jupiter did not return a usable quote
         """
-        try:
-            # Jupiter v6 swap API for creating the transaction
-            url = "https://quote-api.jup.ag/v6/swap"
+        key = (token_address, amount_lamports, slippage_bps)
 
-            # Prepare request data
-            account_public_key = str(wallet_keypair.public_key)
+        # Drop expired quotes while we are here
+        now = time.time()
+        for stale in [k for k, (expires, _) in self.quote_cache.items() if expires <= now]:
+            del self.quote_cache[stale]
 
-            swap_data = {
-                "quoteResponse": quote_data,
-                "userPublicKey": account_public_key,
-                "wrapAndUnwrapSol": True,  # Auto-wrap/unwrap SOL
-                "prioritizationFeeLamports": 1500000  # Default priority fee (0.0015 SOL)
-            }
+        cached = self.quote_cache.get(key)
+        if cached:
+            print("⚡ Using prefetched Jupiter quote")
+            return cached[1]
 
-            print(f"🔍 [JUPITER] Requesting swap transaction for {account_public_key}")
+        task = self.quote_tasks.get(key)
+        if task is not None:
+            try:
+                quote = await asyncio.shield(task)
+                print("⚡ Using prefetched Jupiter quote")
+                return quote
+            except ValueError:
+                pass  # the prefetch failed, try once more below
+
+        return await self.single_flight.do(
+            ("quote",) + key,
+            lambda: self._request_buy_quote(token_address, amount_lamports, slippage_bps)
+        )
 
-            # Get the swap transaction from Jupiter
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=swap_data, timeout=10.0)
+    async def _request_buy_quote(self, token_address, amount_lamports, slippage_bps):
+        """
+        Request a SOL -> token quote from Jupiter (raises ValueError on failure)
 
-                if response.status_code != 200:
-                    print(f"❌ [JUPITER] Swap transaction failed: HTTP {response.status_code} - {response.text}")
-                    return None
+        Runs at the caller's priority: PRIORITY_BUY from get_buy_quote,
+        PRIORITY_NORMAL from prefetch_buy_quote.
+        """
+        sol_mint = "So11111111111111111111111111111111111111112"  # SOL mint address
+        quote_url = "https://quote-api.jup.ag/v6/quote"
+        quote_params = {
+            "inputMint": sol_mint,
+            "outputMint": token_address,
+            "amount": amount_lamports,
+            "slippageBps": slippage_bps,
+            "onlyDirectRoutes": False,
+            "platformFeeBps": 0
+        }
 
-                swap_response = response.json()
-                transaction_bytes = swap_response.get("swapTransaction")
+        print(f"📤 Jupiter quote request: {quote_url} with params: {quote_params}")
 
-                if not transaction_bytes:
-                    print("❌ [JUPITER] No transaction bytes in response")
-                    return None
+        client = self.http.get_client(quote_url)
+        try:
+            quote_resp = await client.get(
+                quote_url,
+                params=quote_params
+            )
+        except Exception as req_err:
+            raise ValueError(f"Jupiter quote request failed: {str(req_err)}")
+
+        if quote_resp.status_code != 200:
+            error_text = quote_resp.text[:200] + "..." if len(quote_resp.text) > 200 else quote_resp.text
+            print(f"❌ Jupiter quote failed: HTTP {quote_resp.status_code} - {error_text}")
+            raise ValueError(f"Jupiter quote failed: HTTP {quote_resp.status_code}")
 
-                # Decode transaction
-                import base64
-                from solana.transaction import Transaction
+        try:
+            quote = quote_resp.json()
+        except Exception as json_err:
+            raise ValueError(f"Error parsing Jupiter quote response: {str(json_err)}")
 
-                print(f"🔍 [JUPITER] Decoding transaction bytes")
-                transaction_bytes_decoded = base64.b64decode(transaction_bytes)
-                transaction = Transaction.deserialize(transaction_bytes_decoded)
+        if not quote or not quote.get("data"):
+            print("❌ No route data in Jupiter quote response")
+            raise ValueError("No swap route found for this token")
 
-                # Sign the transaction
-                print(f"🔍 [JUPITER] Signing transaction")
-                transaction.sign([wallet_keypair])
+        return quote
 
-                # Serialize and send the transaction
-                import base58
-                from solana.rpc.api import Client
+    def _swap_fee_accounts(self, token_address, quote):
+        """
+        Accounts whose local fee market a swap competes in: the token mint and the route's pools
 
-                solana_rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
-                client = Client(solana_rpc_url)
+        Handles both the v6 quote shape (routePlan/swapInfo) and the older data/marketInfos one.
+        """
+        accounts = [token_address] if token_address else []
+        for step in (quote or {}).get("routePlan") or []:
+            accounts.append((step.get("swapInfo") or {}).get("ammKey"))
+        for route in ((quote or {}).get("data") or [])[:1]:
+            for market in route.get("marketInfos") or []:
+                accounts.append(market.get("id"))
+        return [account for account in dict.fromkeys(accounts) if account]
+
+    async def get_priority_fee_lamports(self, params, token_address, quote):
+        """
+        Priority fee for a swap under the admin's fee policy
 
-                print(f"🔍 [JUPITER] Sending transaction to {solana_rpc_url}")
+        "fixed" pays ``priority_fee_lamports``; "p50"/"p75"/"p95" pay that
+        percentile of recent prioritization fees on the swap's accounts, never
+        more than ``priority_fee_cap`` (SOL). The fixed fee is the fallback
+        when no samples are available.
 
-                # Send the signed transaction
-                tx_bytes = transaction.serialize()
-                encoded_tx = base58.b58encode(tx_bytes).decode("utf-8")
+        Args:
+            params: Buy parameters (priority_fee_lamports, priority_fee_policy, priority_fee_cap)
+            token_address: The token mint being bought
+            quote: Jupiter quote for the swap
 
-                response = client.send_transaction(encoded_tx, opts={"skipPreflight": True})
+        Returns:
+            int: prioritizationFeeLamports for the swap request
+        """
+        fixed_lamports = int(params.get("priority_fee_lamports", 1500))
+        policy = params.get("priority_fee_policy", "fixed")
+        if policy == "fixed":
+            return fixed_lamports
+
+        cap = params.get("priority_fee_cap")
+        lamports = await self.fee_estimator.estimate_lamports(
+            policy,
+            self._swap_fee_accounts(token_address, quote),
+            cap_lamports=int(cap * LAMPORTS_PER_SOL) if cap is not None else None,
+            fallback_lamports=fixed_lamports
+        )
+        print(f"⚙️ Priority fee ({policy}): {lamports / LAMPORTS_PER_SOL:.6f} SOL")
+        return lamports
 
-                if "result" in response:
-                    tx_signature = response["result"]
-                    print(f"✅ [JUPITER] Transaction sent: {tx_signature}")
-                    return {
-                        "success": True,
-                        "tx_signature": tx_signature,
-                        "explorer_url": f"https://solscan.io/tx/{tx_signature}"
-                    }
-                else:
-                    print(f"❌ [JUPITER] Transaction failed: {response.get('error')}")
-                    return {
-                        "success": False,
-                        "error": str(response.get('error', 'Unknown error'))
-                    }
+    def get_priority_fee_stats(self):
+        """
+        Get priority fee sampling statistics
 
-        except Exception as e:
-            import traceback
-            print(f"❌ [JUPITER] Swap error: {str(e)}")
-            print(traceback.format_exc())
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        Returns:
+            dict: {"windows", "network_slots", "samples", "errors", "network_lamports"}
+        """
+        return self.fee_estimator.stats()
 
+    @prioritized(PRIORITY_BUY)
     async def buy_token(self, username, token_address, amount, params=None):
         """Purchase a token with SOL using Jupiter Aggregator API"""
         try:
@@ -453,7 +737,9 @@ class WalletManager:
             # Default parameters
             buy_params = {
                 "slippage": 20,  # 20% default slippage
-                "priority_fee": 0.0015,  # Default priority fee
+                "priority_fee_lamports": 1500,  # Default fixed priority fee
+                "priority_fee_policy": "fixed",  # Pay priority_fee_lamports as is
+                "priority_fee_cap": 0.005,  # Most a percentile policy may pay (SOL)
                 "mev_protection": False  # No MEV protection by default
             }
 
@@ -505,35 +791,13 @@ class WalletManager:
                     
                     print(f"📡 Using Solana RPC: {rpc_url}")
                     
-                    # Get wallet secret key
-                    secret_key = wallet.get('secret')
-                    if not secret_key:
-                        return {"success": False, "error": "Wallet has no secret key"}
-
-                    # Handle different secret key formats
-                    try:
-                        if isinstance(secret_key, list):
-                            # If stored as a list of integers
-                            if len(secret_key) < 64:
-                                return {"success": False, "error": f"Invalid secret key length: {len(secret_key)}, needs 64 bytes"}
-                            secret_bytes = bytes(secret_key[:64])
-                        else:
-                            # If stored as base64 string
-                            try:
-                                secret_bytes = base64.b64decode(secret_key)
-                            except:
-                                return {"success": False, "error": "Could not decode base64 secret key"}
-                    except Exception as e:
-                        return {"success": False, "error": f"Error processing secret key: {str(e)}"}
-
-                    # Create Solana keypair from secret
+                    # Use the pre-decoded keypair
                     try:
-                        from solana.keypair import Keypair
-                        keypair = Keypair.from_secret_key(secret_bytes)
-                        public_key = str(keypair.public_key)
-                        print(f"🔑 Using wallet: {public_key}")
-                    except Exception as e:
-                        return {"success": False, "error": f"Error creating keypair: {str(e)}"}
+                        keypair = self.get_keypair(username)
+                    except ValueError as e:
+                        return {"success": False, "error": str(e)}
+                    public_key = wallet.get("public") or str(keypair.public_key)
+                    print(f"🔑 Using wallet: {public_key}")
 
                     # Convert SOL amount to lamports
                     amount_lamports = int(amount * 1_000_000_000)
@@ -542,192 +806,134 @@ class WalletManager:
                     # Convert slippage to basis points (1% = 100 bps)
                     slippage_bps = int(buy_params["slippage"] * 100)
                     print(f"⚙️ Slippage: {buy_params['slippage']}% ({slippage_bps} bps)")
-                    print(f"⚙️ Priority fee: {buy_params['priority_fee']} SOL")
+                    print(f"⚙️ Priority fee: {buy_params['priority_fee_lamports']} lamports ({buy_params['priority_fee_policy']})")
 
                     # 1. Get quote from Jupiter
                     print("🔍 Step 1: Getting quote from Jupiter...")
                     
-                    sol_mint = "So11111111111111111111111111111111111111112"  # SOL mint address
-                    quote_url = "https://quote-api.jup.ag/v6/quote"
-                    quote_params = {
-                        "inputMint": sol_mint,
-                        "outputMint": token_address,
-                        "amount": amount_lamports,
-                        "slippageBps": slippage_bps,
-                        "onlyDirectRoutes": False,
-                        "platformFeeBps": 0
+                    # Reuses the quote prefetched while the filters ran, if any
+                    try:
+                        quote = await self.get_buy_quote(token_address, amount_lamports, slippage_bps)
+                    except ValueError as e:
+                        return {"success": False, "error": str(e)}
+
+                    # Log route details
+                    route = quote["data"][0]
+                    in_amount = int(route.get("inAmount", 0))
+                    out_amount = int(route.get("outAmount", 0))
+                        
+                    print(f"✅ Quote received: {in_amount/1e9} SOL → {out_amount} token units")
+                    print(f"🛣️ Route: {route.get('marketInfos', [{'label': 'unknown'}])[0].get('label', 'unknown')}")
+
+                    # 2. Get the swap transaction
+                    print("🔍 Step 2: Getting swap transaction...")
+                    swap_url = "https://quote-api.jup.ag/v6/swap"
+                    client = self.http.get_client(swap_url)
+                    priority_fee_lamports = await self.get_priority_fee_lamports(buy_params, token_address, quote)
+
+                    swap_data = {
+                        "quoteResponse": quote,
+                        "userPublicKey": public_key,
+                        "wrapAndUnwrapSol": True,
+                        "prioritizationFeeLamports": priority_fee_lamports,
+                        "skipUserAccountsCheck": False  # Important for first-time swaps
                     }
 
-                    import httpx
-                    print(f"📤 Jupiter quote request: {quote_url} with params: {quote_params}")
-                    
-                    async with httpx.AsyncClient() as client:
-                        try:
-                            quote_resp = await client.get(
-                                quote_url, 
-                                params=quote_params,
-                                timeout=15.0  # Increased timeout
-                            )
-                        except Exception as req_err:
-                            return {"success": False, "error": f"Jupiter quote request failed: {str(req_err)}"}
-
-                        if quote_resp.status_code != 200:
-                            error_text = quote_resp.text[:200] + "..." if len(quote_resp.text) > 200 else quote_resp.text
-                            print(f"❌ Jupiter quote failed: HTTP {quote_resp.status_code} - {error_text}")
-                            return {"success": False, "error": f"Jupiter quote failed: HTTP {quote_resp.status_code}"}
-
-                        try:
-                            quote = quote_resp.json()
-                        except Exception as json_err:
-                            return {"success": False, "error": f"Error parsing Jupiter quote response: {str(json_err)}"}
-
-                        if not quote or not quote.get("data"):
-                            print("❌ No route data in Jupiter quote response")
-                            return {"success": False, "error": "No swap route found for this token"}
-                        
-                        # Log route details
-                        route = quote["data"][0]
-                        in_amount = int(route.get("inAmount", 0))
-                        out_amount = int(route.get("outAmount", 0))
-                        
-                        print(f"✅ Quote received: {in_amount/1e9} SOL → {out_amount} token units")
-                        print(f"🛣️ Route: {route.get('marketInfos', [{'label': 'unknown'}])[0].get('label', 'unknown')}")
+                    try:
+                        swap_resp = await client.post(
+                            swap_url,
+                            json=swap_data
+                        )
+                    except Exception as swap_req_err:
+                        print(f"❌ Jupiter swap request failed: {str(swap_req_err)}")
+                        return {"success": False, "error": f"Jupiter swap request failed: {str(swap_req_err)}"}
+
+                    if swap_resp.status_code != 200:
+                        error_text = swap_resp.text[:200] + "..." if len(swap_resp.text) > 200 else swap_resp.text
+                        print(f"❌ Jupiter swap transaction failed: HTTP {swap_resp.status_code} - {error_text}")
+                        return {"success": False, "error": f"Jupiter swap transaction failed: HTTP {swap_resp.status_code}"}
 
-                        # 2. Get the swap transaction
-                        print("🔍 Step 2: Getting swap transaction...")
-                        swap_url = "https://quote-api.jup.ag/v6/swap"
-                        priority_fee_micro_lamports = int(buy_params["priority_fee"] * 1_000_000)
-                        
-                        swap_data = {
-                            "quoteResponse": quote,
-                            "userPublicKey": public_key,
-                            "wrapAndUnwrapSol": True,
-                            "prioritizationFeeLamports": priority_fee_micro_lamports,
-                            "skipUserAccountsCheck": False  # Important for first-time swaps
-                        }
+                    try:
+                        swap_result = swap_resp.json()
+                    except Exception as json_err:
+                        print(f"❌ Error parsing Jupiter swap response: {str(json_err)}")
+                        return {"success": False, "error": f"Error parsing Jupiter swap response: {str(json_err)}"}
 
-                        try:
-                            swap_resp = await client.post(
-                                swap_url,
-                                json=swap_data,
-                                timeout=15.0  # Increased timeout
-                            )
-                        except Exception as swap_req_err:
-                            print(f"❌ Jupiter swap request failed: {str(swap_req_err)}")
-                            return {"success": False, "error": f"Jupiter swap request failed: {str(swap_req_err)}"}
-
-                        if swap_resp.status_code != 200:
-                            error_text = swap_resp.text[:200] + "..." if len(swap_resp.text) > 200 else swap_resp.text
-                            print(f"❌ Jupiter swap transaction failed: HTTP {swap_resp.status_code} - {error_text}")
-                            return {"success": False, "error": f"Jupiter swap transaction failed: HTTP {swap_resp.status_code}"}
-
-                        try:
-                            swap_result = swap_resp.json()
-                        except Exception as json_err:
-                            print(f"❌ Error parsing Jupiter swap response: {str(json_err)}")
-                            return {"success": False, "error": f"Error parsing Jupiter swap response: {str(json_err)}"}
-
-                        if "swapTransaction" not in swap_result:
-                            print("❌ No transaction in Jupiter swap response")
-                            return {"success": False, "error": "Swap transaction failed to generate"}
+                    if "swapTransaction" not in swap_result:
+                        print("❌ No transaction in Jupiter swap response")
+                        return {"success": False, "error": "Swap transaction failed to generate"}
                         
-                        print("✅ Swap transaction received from Jupiter")
+                    print("✅ Swap transaction received from Jupiter")
+
+                    # Don't sign and send a transaction whose blockhash has already expired
+                    if self.blockhash_cache.is_expired(swap_result.get("lastValidBlockHeight")):
+                        print("❌ Swap transaction blockhash expired before sending")
+                        return {"success": False, "error": "Swap transaction expired before it could be sent (blockhash too old)"}
 
-                        # 3. Deserialize, sign and send the transaction
-                        print("🔍 Step 3: Signing and sending transaction...")
+                    # 3. Deserialize, sign and send the transaction
+                    print("🔍 Step 3: Signing and sending transaction...")
                         
-                        try:
-                            from solana.transaction import Transaction
-                            from solana.rpc.api import Client
-                            import base64
-
-                            swap_txn_b64 = swap_result["swapTransaction"]
-                            # Create RPC client
-                            client = Client(rpc_url)
-                            
-                            # Deserialize the transaction
-                            tx_bytes = base64.b64decode(swap_txn_b64)
-                            print(f"📦 Transaction size: {len(tx_bytes)} bytes")
-                            
-                            txn = Transaction.deserialize(tx_bytes)
-                            print(f"📝 Transaction deserialized with {len(txn.signatures)} signature slots")
+                    try:
+                        from solana.transaction import Transaction
+                        import base64
 
-                            # Sign the transaction
-                            print("✍️ Signing transaction with keypair...")
-                            transaction_result = txn.sign([keypair])
-                            print(f"✅ Transaction signed: {len(txn.signatures)} signatures")
-                            
-                            # Serialize and encode transaction for sending
-                            serialized_tx = base64.b64encode(txn.serialize()).decode('ascii')
-                            print(f"📦 Serialized transaction size: {len(serialized_tx)} chars")
-
-                            # Send transaction
-                            print("🚀 Sending transaction to Solana network...")
-                            send_opts = {
-                                "skipPreflight": True,  # Skip simulation for faster execution
-                                "preflightCommitment": "processed"
-                            }
-                            
-                            result = await client.send_raw_transaction(
-                                serialized_tx, 
-                                opts=send_opts
-                            )
-                            
-                            if "result" not in result:
-                                error_msg = str(result.get("error", "Unknown error"))
-                                print(f"❌ Transaction failed: {error_msg}")
-                                return {"success": False, "error": f"Failed to send transaction: {error_msg}"}
+                        swap_txn_b64 = swap_result["swapTransaction"]
 
-                            tx_signature = result["result"]
-                            print(f"✅ Transaction sent successfully! Signature: {tx_signature}")
+                        # Deserialize the transaction
+                        tx_bytes = base64.b64decode(swap_txn_b64)
+                        print(f"📦 Transaction size: {len(tx_bytes)} bytes")
                             
-                            explorer_url = f"https://solscan.io/tx/{tx_signature}"
-                            print(f"🔍 Explorer URL: {explorer_url}")
+                        txn = Transaction.deserialize(tx_bytes)
+                        print(f"📝 Transaction deserialized with {len(txn.signatures)} signature slots")
 
-                            # Get token info for better display
-                            token_symbol = "Unknown"
-                            try:
-                                token_metadata = await self.get_token_metadata(token_address)
-                                if token_metadata:
-                                    token_symbol = token_metadata.get("symbol", token_address[:6])
-                            except Exception as meta_err:
-                                print(f"⚠️ Failed to get token metadata: {str(meta_err)}")
+                        # Sign the transaction
+                        print("✍️ Signing transaction with keypair...")
+                        transaction_result = txn.sign([keypair])
+                        print(f"✅ Transaction signed: {len(txn.signatures)} signatures")
                             
-                            # Update the simulated balance to keep track
-                            await self.update_simulated_balance(username, -amount)
-                            print(f"💰 Updated simulated balance for {username}")
-
-                            # Add this buy to recent buys for the user
-                            if not hasattr(self, 'recent_buys'):
-                                self.recent_buys = {}
-                            if username not in self.recent_buys:
-                                self.recent_buys[username] = []
-
-                            buy_record = {
-                                "timestamp": time.time(),
-                                "token_address": token_address,
-                                "symbol": token_symbol,
-                                "amount": amount,
-                                "success": True,
-                                "tx_hash": tx_signature,
-                                "explorer_url": explorer_url
-                            }
-                            
-                            self.recent_buys[username].append(buy_record)
-                            print(f"📝 Added transaction to recent buys for {username}")
-
-                            return {
-                                "success": True,
-                                "tx_signature": tx_signature,
-                                "explorer_url": explorer_url,
-                                "amount": amount,
-                                "symbol": token_symbol
-                            }
-                        except Exception as e:
-                            import traceback
-                            print(f"❌ Error in transaction processing: {str(e)}")
-                            print(traceback.format_exc())
-                            return {"success": False, "error": f"Transaction error: {str(e)}"}
+                        # Serialize and encode transaction for sending
+                        serialized_tx = base64.b64encode(txn.serialize()).decode('ascii')
+                        print(f"📦 Serialized transaction size: {len(serialized_tx)} chars")
+
+                        # Send transaction to every broadcast endpoint at once (skipping
+                        # simulation for faster execution). The buy returns as soon as one
+                        # endpoint accepted it; re-sending until it lands and everything that
+                        # depends on the outcome happen in the background (see _land_buy)
+                        print(f"🚀 Sending transaction to {len(self.broadcaster.active())} RPC endpoint(s)...")
+                        first = await self.broadcaster.broadcast(serialized_tx, max_retries=0)
+
+                        if not first["signature"]:
+                            error_msg = "; ".join(f"{url}: {error}" for url, error in first["errors"].items()) or "Unknown error"
+                            print(f"❌ Transaction failed: {error_msg}")
+                            return {"success": False, "error": f"Failed to send transaction: {error_msg}"}
+
+                        tx_signature = first["signature"]
+                        print(f"✅ Transaction sent successfully! Signature: {tx_signature} (accepted first by {first['endpoint']} in {first['latency'] * 1000:.0f} ms)")
+
+                        explorer_url = f"https://solscan.io/tx/{tx_signature}"
+                        print(f"🔍 Explorer URL: {explorer_url}")
+
+                        landing = asyncio.create_task(self._land_buy(
+                            username, wallet, token_address, amount, first, serialized_tx,
+                            swap_result.get("lastValidBlockHeight")
+                        ))
+                        self.landing_tasks.add(landing)
+                        landing.add_done_callback(self.landing_tasks.discard)
+
+                        return {
+                            "success": True,
+                            "tx_signature": tx_signature,
+                            "explorer_url": explorer_url,
+                            "amount": amount,
+                            "confirmation": "pending",
+                            # Resolves to the final buy result once the transaction landed, failed or expired
+                            "landing": landing
+                        }
+                    except Exception as e:
+                        import traceback
+                        print(f"❌ Error in transaction processing: {str(e)}")
+                        print(traceback.format_exc())
+                        return {"success": False, "error": f"Transaction error: {str(e)}"}
                             
                 except Exception as e:
                     import traceback
@@ -740,6 +946,98 @@ class WalletManager:
             print(traceback.format_exc())
             return {"success": False, "error": str(e)}
 
+    @prioritized(PRIORITY_BUY)
+    async def _land_buy(self, username, wallet, token_address, amount, first, serialized_tx, last_valid_block_height):
+        """
+        Re-send a sent buy until it lands, then record it
+
+        Runs as a background task started by buy_token. The simulated balance,
+        the balance cache and recent_buys are only updated once the
+        transaction reached the configured commitment.
+
+        Returns:
+            dict: The final buy result; "success" is False if the transaction
+                failed, expired or was not confirmed within confirm_timeout
+        """
+        tx_signature = first["signature"]
+        explorer_url = f"https://solscan.io/tx/{tx_signature}"
+        try:
+            result = await self.broadcaster.land(
+                first,
+                serialized_tx,
+                self.tx_tracker,
+                commitment=self.confirm_commitment,
+                timeout=self.confirm_timeout,
+                last_valid_block_height=last_valid_block_height,
+                is_expired=self.blockhash_cache.is_expired,
+                interval=self.rebroadcast_interval
+            )
+
+            confirmation = result["confirmation"]
+            if confirmation["status"] not in COMMITMENT_LEVELS:
+                reason = confirmation["status"] or "unconfirmed"
+                print(f"❌ Transaction {reason} after {result['attempts']} send(s): {confirmation.get('error') or tx_signature}")
+                return {
+                    "success": False,
+                    "error": f"Transaction {reason}: {confirmation.get('error') or 'not confirmed in time'}",
+                    "tx_signature": tx_signature,
+                    "explorer_url": explorer_url,
+                    "send_attempts": result["attempts"]
+                }
+            print(f"✅ Transaction {confirmation['status']} in slot {confirmation['slot']} after {result['attempts']} send(s)")
+
+            # Get token info for better display
+            token_symbol = "Unknown"
+            try:
+                token_metadata = await self.get_token_metadata(token_address)
+                if token_metadata:
+                    token_symbol = token_metadata.get("symbol", token_address[:6])
+            except Exception as meta_err:
+                print(f"⚠️ Failed to get token metadata: {str(meta_err)}")
+
+            # Add this buy to recent buys for the user
+            if not hasattr(self, 'recent_buys'):
+                self.recent_buys = {}
+            if username not in self.recent_buys:
+                self.recent_buys[username] = []
+
+            buy_record = {
+                "timestamp": time.time(),
+                "token_address": token_address,
+                "symbol": token_symbol,
+                "amount": amount,
+                "success": True,
+                "tx_hash": tx_signature,
+                "explorer_url": explorer_url
+            }
+
+            self.recent_buys[username].append(buy_record)
+            print(f"📝 Added transaction to recent buys for {username}")
+
+            # The buy has landed; a bookkeeping error must not report it as failed
+            try:
+                self.balance_cache.adjust(wallet["public"], -amount)
+                await self.update_simulated_balance(username, -amount)
+                print(f"💰 Updated simulated balance for {username}")
+            except Exception as balance_err:
+                print(f"⚠️ Failed to update simulated balance: {str(balance_err)}")
+
+            return {
+                "success": True,
+                "tx_signature": tx_signature,
+                "explorer_url": explorer_url,
+                "amount": amount,
+                "symbol": token_symbol,
+                "confirmation": confirmation["status"],
+                "send_attempts": result["attempts"]
+            }
+        except Exception as e:
+            import traceback
+            print(f"❌ Error confirming transaction {tx_signature}: {e}")
+            print(traceback.format_exc())
+            return {"success": False, "error": f"Confirmation error: {str(e)}", "tx_signature": tx_signature, "explorer_url": explorer_url}
+
+    @prioritized(PRIORITY_BUY)
     async def sell_token(self, username, token_address, percentage=100, params=None):
         """
         Sell a specific token from the user's wallet
@@ -829,6 +1127,12 @@ class WalletManager:
         username = username.lower() if username else f"user_unknown"
         pubkey = wallet.get("public")
 
+        # Served from memory while the account subscription is live
+        if not force_refresh:
+            cached_balance = self.balance_cache.get(pubkey)
+            if cached_balance is not None:
+                return cached_balance
+
         # Print the wallet address we're checking (for debugging)
         print(f"Checking balance for wallet address: {pubkey}")
 
@@ -841,6 +1145,11 @@ class WalletManager:
                     print(f"Using cached balance for {username}: {cached_data['balance']} SOL")
                     return cached_data["balance"]
 
+        # /balance, the auto-buy loop and buys asking at once share one lookup
+        return await self.single_flight.do(("balance", username), lambda: self._fetch_balance(username, pubkey))
+
+    async def _fetch_balance(self, username, pubkey):
+        """Fetch a wallet's SOL balance from the RPC, falling back to Solscan and cached values"""
         # Try to get balance directly from Solana RPC first (more reliable)
         try:
             # Attempt to get balance via the Solana RPC endpoint
@@ -855,31 +1164,32 @@ class WalletManager:
                 "params": [pubkey]
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(solana_rpc_url, json=payload, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        print(f"RPC response: {data}")
-                        if "result" in data and "value" in data["result"]:
-                            balance = data["result"]["value"] / 10**9  # Convert lamports to SOL
-
-                            # Cache this balance
-                            if not hasattr(self, 'user_balances'):
-                                self.user_balances = {}
-
-                            self.user_balances[username] = {
-                                "balance": balance,
-                                "timestamp": time.time()
-                            }
-                            print(f"Successfully fetched balance from Solana RPC for {username}: {balance} SOL")
-                            return balance
-                        else:
-                            print(f"Unexpected RPC response format: {data}")
-                    except Exception as json_err:
-                        print(f"Error parsing RPC response: {json_err}")
-                else:
-                    print(f"Solana RPC returned status code: {response.status_code}")
+            client = self.http.get_client(solana_rpc_url)
+            response = await client.post(solana_rpc_url, json=payload, headers=headers)
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    print(f"RPC response: {data}")
+                    if "result" in data and "value" in data["result"]:
+                        balance = data["result"]["value"] / 10**9  # Convert lamports to SOL
+                        self.balance_cache.set(pubkey, data["result"]["value"], data["result"].get("context", {}).get("slot"))
+
+                        # Cache this balance
+                        if not hasattr(self, 'user_balances'):
+                            self.user_balances = {}
+
+                        self.user_balances[username] = {
+                            "balance": balance,
+                            "timestamp": time.time()
+                        }
+                        print(f"Successfully fetched balance from Solana RPC for {username}: {balance} SOL")
+                        return balance
+                    else:
+                        print(f"Unexpected RPC response format: {data}")
+                except Exception as json_err:
+                    print(f"Error parsing RPC response: {json_err}")
+            else:
+                print(f"Solana RPC returned status code: {response.status_code}")
         except Exception as e:
             print(f"Error fetching balance from Solana RPC: {e}")
 
@@ -887,29 +1197,29 @@ class WalletManager:
         try:
             print(f"Falling back to Solscan API for address: {pubkey}")
             url = f"https://api.solscan.io/account?address={pubkey}"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        print(f"Solscan response: {data}")
-                        lamports = data.get("lamports", 0)
-                        balance = lamports / 10**9  # Convert lamports to SOL
+            client = self.http.get_client(url)
+            response = await client.get(url)
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                    print(f"Solscan response: {data}")
+                    lamports = data.get("lamports", 0)
+                    balance = lamports / 10**9  # Convert lamports to SOL
 
-                        # Cache the balance but with a timestamp for future reference
-                        if not hasattr(self, 'user_balances'):
-                            self.user_balances = {}
+                    # Cache the balance but with a timestamp for future reference
+                    if not hasattr(self, 'user_balances'):
+                        self.user_balances = {}
 
-                        self.user_balances[username] = {
-                            "balance": balance,
-                            "timestamp": time.time()  # Track when we fetched this
-                        }
-                        print(f"Successfully fetched balance from Solscan for {username}: {balance} SOL")
-                        return balance
-                    except Exception as json_err:
-                        print(f"Error parsing Solscan response: {json_err}")
-                else:
-                    print(f"Solscan API returned status code: {response.status_code}")
+                    self.user_balances[username] = {
+                        "balance": balance,
+                        "timestamp": time.time()  # Track when we fetched this
+                    }
+                    print(f"Successfully fetched balance from Solscan for {username}: {balance} SOL")
+                    return balance
+                except Exception as json_err:
+                    print(f"Error parsing Solscan response: {json_err}")
+            else:
+                print(f"Solscan API returned status code: {response.status_code}")
         except Exception as e:
             print(f"Error fetching balance from Solscan: {e}")
 
@@ -933,6 +1243,78 @@ class WalletManager:
         print(f"ALL BALANCE FETCH METHODS FAILED for {username}. Using default balance of 0.0")
         return 0.0  # Default to zero balance
 
+    async def get_balances(self, usernames, force_refresh=False):
+        """
+        Get SOL balances for several wallets with a single RPC round trip
+
+        Uses getMultipleAccounts (100 accounts per call) instead of one
+        getBalance per wallet, and refreshes the per-user balance cache with the
+        results. Wallets the batch call could not resolve fall back to
+        get_balance().
+
+        Args:
+            usernames: Usernames whose balances are needed
+            force_refresh: Skip the subscription-fed balance cache
+
+        Returns:
+            dict: username -> SOL balance
+        """
+        if not hasattr(self, 'user_balances'):
+            self.user_balances = {}
+
+        balances = {}
+        pubkeys = {}
+        for username in usernames:
+            wallet = self.get_wallet(username)
+            if wallet and wallet.get("public"):
+                cached_balance = None if force_refresh else self.balance_cache.get(wallet["public"])
+                if cached_balance is not None:
+                    balances[username] = cached_balance
+                else:
+                    pubkeys[username] = wallet["public"]
+
+        solana_rpc_url = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+        client = self.http.get_client(solana_rpc_url)
+        names = list(pubkeys)
+        for start in range(0, len(names), 100):
+            chunk = names[start:start + 100]
+            payload = {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "getMultipleAccounts",
+                # Only lamports are needed, skip the account data
+                "params": [[pubkeys[name] for name in chunk], {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}]
+            }
+            try:
+                response = await client.post(solana_rpc_url, json=payload, headers={"Content-Type": "application/json"})
+                if response.status_code != 200:
+                    print(f"getMultipleAccounts returned status code: {response.status_code}")
+                    continue
+                result = response.json().get("result", {})
+                accounts = result.get("value")
+                if not isinstance(accounts, list) or len(accounts) != len(chunk):
+                    print(f"Unexpected getMultipleAccounts response for {len(chunk)} wallets")
+                    continue
+
+                now = time.time()
+                for name, account in zip(chunk, accounts):
+                    # A missing account has never been funded
+                    lamports = (account or {}).get("lamports", 0)
+                    balance = lamports / 10**9
+                    balances[name] = balance
+                    self.balance_cache.set(pubkeys[name], lamports, result.get("context", {}).get("slot"))
+                    self.user_balances[name.lower()] = {"balance": balance, "timestamp": now}
+            except Exception as e:
+                print(f"Error fetching balances with getMultipleAccounts: {e}")
+
+        # Anything the batch call missed goes through the regular fallbacks
+        for username in usernames:
+            if username not in balances:
+                balances[username] = await self.get_balance(username)
+
+        print(f"Fetched balances for {len(balances)} wallets ({len(names)} in batch)")
+        return balances
+
     async def fetch_tokens_from_pump_fun(self):
         """
         Fetch new token listings from pump.fun
@@ -940,44 +1322,101 @@ class WalletManager:
         Returns:
             list: List of token data dictionaries
         """
+        breaker = self.breakers["pump.fun"]
+        if not breaker.allow():
+            return []
+
         try:
             url = "https://api.pump.fun/tokens/latest"
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    tokens = []
-
-                    # Format the token data 
-                    for token in data.get("tokens", [])[:10]:  # Limit to 10 most recent
-                        tokens.append({
-                            "address": token.get("address"),
-                            "symbol": token.get("symbol", "UNKNOWN"),
-                            "name": token.get("name", "Unknown Token"),
-                            "created_at": token.get("created_at"),
-                            "source": "pump.fun"
-                        })
-
-                    return tokens
-                else:
-                    print(f"Error fetching from pump.fun: Status {response.status_code}")
-                    return []
+            client = self.http.get_client(url)
+            response = await client.get(url, headers=headers)
+            breaker.record_response(response.status_code)
+            if response.status_code == 200:
+                data = response.json()
+                tokens = []
+
+                # Format the token data 
+                for token in data.get("tokens", [])[:10]:  # Limit to 10 most recent
+                    tokens.append({
+                        "address": token.get("address"),
+                        "symbol": token.get("symbol", "UNKNOWN"),
+                        "name": token.get("name", "Unknown Token"),
+                        "created_at": token.get("created_at"),
+                        "source": "pump.fun"
+                    })
+
+                return tokens
+            else:
+                print(f"Error fetching from pump.fun: Status {response.status_code}")
+                return []
 
         except Exception as e:
+            breaker.record_failure(e)
             print(f"Error fetching from pump.fun: {e}")
             return []
 
-    async def fetch_tokens_from_dexscreener(self):
+    async def fetch_tokens_from_birdeye(self):
+        """
+        Fetch tokens from the Birdeye token list
+
+        Returns:
+            list: List of token data dictionaries
+        """
+        breaker = self.breakers["birdeye"]
+        if not breaker.allow():
+            return []
+
+        try:
+            url = "https://public-api.birdeye.so/public/tokenlist"
+            headers = {"X-API-KEY": os.getenv("BIRDEYE_API_KEY", "")}
+
+            client = self.http.get_client(url)
+            response = await client.get(url, headers=headers)
+            breaker.record_response(response.status_code)
+            if response.status_code == 200:
+                data = response.json().get("data", [])
+                # The token list is either a bare list or wrapped as {"tokens": [...]}
+                if isinstance(data, dict):
+                    data = data.get("tokens", [])
+
+                tokens = []
+                for token in data[:5]:
+                    token = dict(token)
+                    token.setdefault("source", "birdeye")
+                    tokens.append(token)
+                return tokens
+            else:
+                print(f"Birdeye API returned status code: {response.status_code}")
+                return []
+
+        except Exception as e:
+            breaker.record_failure(e)
+            print(f"Error fetching from Birdeye: {e}")
+            return []
+
+    async def fetch_tokens_from_dexscreener(self, deadline=6.0):
         """
         Fetch new token pairs from dexscreener
 
+        All endpoints are requested concurrently and merged as they arrive.
+        Endpoints that have not answered within ``deadline`` seconds are
+        cancelled and the partial results are returned. Per-endpoint latency
+        and error counters are kept in ``self.dexscreener_stats``.
+
+        Args:
+            deadline: Seconds to wait for the slowest endpoint
+
         Returns:
             list: List of token data dictionaries
         """
+        breaker = self.breakers["dexscreener"]
+        if not breaker.allow():
+            return []
+
         try:
             # Try multiple Dexscreener endpoints to get the most comprehensive data
             endpoints = [
@@ -997,113 +1436,210 @@ class WalletManager:
             tokens = []
             processed_addresses = set()
 
-            async with httpx.AsyncClient() as client:
-                for endpoint in endpoints:
-                    try:
-                        response = await client.get(endpoint, headers=headers, timeout=12.0)
-                        if response.status_code != 200:
-                            print(f"Error fetching from {endpoint}: Status {response.status_code}")
+            client = self.http.get_client(endpoints[0])
+
+            async def fetch_endpoint(endpoint):
+                """Fetch the pairs of a single endpoint, recording latency and errors"""
+                stats = self._dexscreener_endpoint_stats(endpoint)
+                stats["requests"] += 1
+                started = time.monotonic()
+                try:
+                    response = await client.get(endpoint, headers=headers)
+                    breaker.record_response(response.status_code)
+                    if response.status_code != 200:
+                        stats["errors"] += 1
+                        print(f"Error fetching from {endpoint}: Status {response.status_code}")
+                        return []
+
+                    data = response.json()
+
+                    # Handle different response formats
+                    pairs = []
+                    if "pairs" in data:
+                        pairs = data.get("pairs", [])[:self.dexscreener_pair_limit]
+                    elif "tokens" in data:
+                        # Handle trending tokens endpoint
+                        for token in data.get("tokens", [])[:self.dexscreener_pair_limit]:
+                            if "pairs" in token:
+                                pairs.extend(token.get("pairs", [])[:3])  # Top 3 pairs per token
+                    return pairs
+                except asyncio.CancelledError:
+                    # Cancelled because the endpoint missed the deadline
+                    stats["timeouts"] += 1
+                    breaker.record_failure("deadline exceeded")
+                    raise
+                except Exception as e:
+                    stats["errors"] += 1
+                    breaker.record_failure(e)
+                    print(f"Error processing {endpoint}: {e}")
+                    return []
+                finally:
+                    latency = time.monotonic() - started
+                    stats["last_latency"] = latency
+                    stats["total_latency"] += latency
+
+            tasks = [asyncio.create_task(fetch_endpoint(endpoint)) for endpoint in endpoints]
+            try:
+                # Merge each endpoint's pairs as soon as it answers
+                for next_result in asyncio.as_completed(tasks, timeout=deadline):
+                    pairs = await next_result
+
+                    for pair in pairs:
+                        # Skip pairs with no liquidity or extremely low liquidity
+                        if not pair.get("liquidity") or pair.get("liquidity", {}).get("usd", 0) < 100:
                             continue
 
-                        data = response.json()
-
-                        # Handle different response formats
-                        pairs = []
-                        if "pairs" in data:
-                            pairs = data.get("pairs", [])[:20]  # Top 20 pairs
-                        elif "tokens" in data:
-                            # Handle trending tokens endpoint
-                            for token in data.get("tokens", [])[:20]:
-                                if "pairs" in token:
-                                    pairs.extend(token.get("pairs", [])[:3])  # Top 3 pairs per token
-
-                        for pair in pairs:
-                            # Skip pairs with no liquidity or extremely low liquidity
-                            if not pair.get("liquidity") or pair.get("liquidity", {}).get("usd", 0) < 100:
+                        # Get creation timestamp to filter for newest tokens
+                        created_at = pair.get("pairCreatedAt", "")
+                        pair_age_hours = 0
+
+                        if created_at:
+                            try:
+                                # Calculate age in hours if timestamp is available
+                                from datetime import datetime
+                                created_timestamp = int(time.mktime(datetime.strptime(created_at.split('.')[0], "%Y-%m-%dT%H:%M:%S").timetuple()))
+                                current_timestamp = int(time.time())
+                                pair_age_hours = (current_timestamp - created_timestamp) / 3600
+                            except Exception:
+                                # Ignore timestamp parsing errors
+                                pass
+
+                        # Analyze base and quote tokens to find the non-major token
+                        token_candidates = []
+
+                        if "baseToken" in pair and pair["baseToken"]["symbol"] not in excluded_symbols:
+                            token_candidates.append({
+                                "address": pair["baseToken"]["address"],
+                                "symbol": pair["baseToken"]["symbol"],
+                                "name": pair["baseToken"].get("name", pair["baseToken"]["symbol"]),
+                                "price_usd": pair["baseToken"].get("price", 0)
+                            })
+
+                        if "quoteToken" in pair and pair["quoteToken"]["symbol"] not in excluded_symbols:
+                            token_candidates.append({
+                                "address": pair["quoteToken"]["address"],
+                                "symbol": pair["quoteToken"]["symbol"],
+                                "name": pair["quoteToken"].get("name", pair["quoteToken"]["symbol"]),
+                                "price_usd": pair["quoteToken"].get("price", 0)
+                            })
+
+                        # Process token candidates
+                        for token_data in token_candidates:
+                            token_address = token_data["address"]
+
+                            # Skip if already processed
+                            if token_address in processed_addresses:
                                 continue
 
-                            # Get creation timestamp to filter for newest tokens
-                            created_at = pair.get("pairCreatedAt", "")
-                            pair_age_hours = 0
-
-                            if created_at:
-                                try:
-                                    # Calculate age in hours if timestamp is available
-                                    import time
-                                    from datetime import datetime
-                                    created_timestamp = int(time.mktime(datetime.strptime(created_at.split('.')[0], "%Y-%m-%dT%H:%M:%S").timetuple()))
-                                    current_timestamp = int(time.time())
-                                    pair_age_hours = (current_timestamp - created_timestamp) / 3600
-                                except Exception:
-                                    # Ignore timestamp parsing errors
-                                    pass
-
-                            # Analyze base and quote tokens to find the non-major token
-                            token_candidates = []
-
-                            if "baseToken" in pair and pair["baseToken"]["symbol"] not in excluded_symbols:
-                                token_candidates.append({
-                                    "address": pair["baseToken"]["address"],
-                                    "symbol": pair["baseToken"]["symbol"],
-                                    "name": pair["baseToken"].get("name", pair["baseToken"]["symbol"]),
-                                    "price_usd": pair["baseToken"].get("price", 0)
-                                })
-
-                            if "quoteToken" in pair and pair["quoteToken"]["symbol"] not in excluded_symbols:
-                                token_candidates.append({
-                                    "address": pair["quoteToken"]["address"],
-                                    "symbol": pair["quoteToken"]["symbol"],
-                                    "name": pair["quoteToken"].get("name", pair["quoteToken"]["symbol"]),
-                                    "price_usd": pair["quoteToken"].get("price", 0)
-                                })
-
-                            # Process token candidates
-                            for token_data in token_candidates:
-                                token_address = token_data["address"]
-
-                                # Skip if already processed
-                                if token_address in processed_addresses:
-                                    continue
-
-                                processed_addresses.add(token_address)
-
-                                # Build token object with all relevant data
-                                token_obj = {
-                                    "address": token_address,
-                                    "symbol": token_data["symbol"],
-                                    "name": token_data["name"],
-                                    "created_at": created_at,
-                                    "age_hours": pair_age_hours,
-                                    "liquidity": pair.get("liquidity", {}).get("usd", 0),
-                                    "price_usd": token_data.get("price_usd", 0),
-                                    "volume_24h": pair.get("volume", {}).get("h24", 0),
-                                    "price_change_24h": pair.get("priceChange", {}).get("h24", 0),
-                                    "source": "dexscreener",
-                                    "dex": pair.get("dexId", "unknown")
-                                }
-
-                                tokens.append(token_obj)
+                            processed_addresses.add(token_address)
+
+                            # Build token object with all relevant data
+                            token_obj = {
+                                "address": token_address,
+                                "symbol": token_data["symbol"],
+                                "name": token_data["name"],
+                                "created_at": created_at,
+                                "age_hours": pair_age_hours,
+                                "liquidity": pair.get("liquidity", {}).get("usd", 0),
+                                "price_usd": token_data.get("price_usd", 0),
+                                "volume_24h": pair.get("volume", {}).get("h24", 0),
+                                "price_change_24h": pair.get("priceChange", {}).get("h24", 0),
+                                "source": "dexscreener",
+                                "dex": pair.get("dexId", "unknown")
+                            }
 
-                    except Exception as e:
-                        print(f"Error processing {endpoint}: {e}")
-                        continue
+                            tokens.append(token_obj)
+            except asyncio.TimeoutError:
+                slow = [endpoint for endpoint, task in zip(endpoints, tasks) if not task.done()]
+                print(f"⚠️ Dexscreener deadline hit, using partial results (slow: {', '.join(slow)})")
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
 
             # Sort by newest first, then by liquidity
             tokens.sort(key=lambda x: (-x.get("liquidity", 0) if x.get("age_hours", 999) < 48 else -999))
 
             # Return the top tokens
-            return tokens[:30]
+            return tokens[:self.dexscreener_pair_limit]
 
         except Exception as e:
             print(f"Error fetching from dexscreener: {e}")
             return []
 
-    async def get_token_metadata(self, token_address):
+    def _dexscreener_endpoint_stats(self, endpoint):
+        """Get (creating if needed) the counters for one Dexscreener endpoint"""
+        return self.dexscreener_stats.setdefault(endpoint, {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "total_latency": 0.0,
+            "last_latency": 0.0
+        })
+
+    def get_dexscreener_stats(self):
+        """
+        Get per-endpoint Dexscreener latency and error counters
+
+        Returns:
+            dict: endpoint -> {"requests", "errors", "timeouts", "avg_latency", "last_latency"}
+        """
+        report = {}
+        for endpoint, stats in self.dexscreener_stats.items():
+            requests = stats["requests"]
+            report[endpoint] = {
+                "requests": requests,
+                "errors": stats["errors"],
+                "timeouts": stats["timeouts"],
+                "avg_latency": round(stats["total_latency"] / requests, 3) if requests else 0.0,
+                "last_latency": round(stats["last_latency"], 3)
+            }
+        return report
+
+    def get_broadcast_stats(self):
+        """
+        Get per-endpoint transaction broadcast statistics, best ranked first
+
+        Returns:
+            dict: endpoint URL -> {"sends", "accepted", "first", "errors", "avg_latency_ms", "pruned", "last_error"}
+        """
+        return self.broadcaster.stats()
+
+    def get_landing_stats(self):
+        """
+        Get rebroadcast loop outcomes
+
+        Returns:
+            dict: {"transactions", "landed", "failed", "expired", "attempts", "attempts_to_land", "avg_attempts"}
+        """
+        return self.broadcaster.landing_stats()
+
+    def get_source_status(self):
+        """
+        Get the circuit breaker state of every upstream data source
+
+        Returns:
+            dict: source name -> CircuitBreaker
+        """
+        return dict(self.breakers)
+
+    async def get_token_metadata(self, token_address, deadline=None, required_fields=None):
         """
         Get token metadata including social links from multiple sources
 
+        Served from the metadata cache when possible. Stale entries are
+        returned immediately and refreshed in the background; misses are
+        fetched from the sources and cached.
+
         Args:
             token_address: Token contract address
+            deadline: Optional number of seconds to wait for the sources. Sources
+                that have not answered by then are cancelled and whatever has
+                arrived is merged.
+            required_fields: Optional fields (e.g. {"website", "telegram"}) the
+                caller needs. When given, the sources race and the lookup
+                returns as soon as these are filled; an empty set means the
+                first source to answer wins. None waits for every source.
 
         Returns:
             dict: Token metadata including social links
@@ -1111,6 +1647,82 @@ class WalletManager:
         if not token_address:
             return {}
 
+        cached, state = self.metadata_cache.get(token_address)
+        if state == "fresh":
+            return cached
+        if state == "stale":
+            if token_address not in self.metadata_refresh_tasks:
+                task = asyncio.create_task(self._fetch_token_metadata(token_address, deadline))
+                self.metadata_refresh_tasks[token_address] = task
+                task.add_done_callback(lambda t: self.metadata_refresh_tasks.pop(token_address, None))
+            return cached
+
+        # Callers asking for the same token (and fields) at once share one lookup
+        key = ("metadata", token_address, frozenset(required_fields) if required_fields is not None else None)
+        metadata = await self.single_flight.do(
+            key,
+            lambda: self._fetch_token_metadata(token_address, deadline, required_fields)
+        )
+        return dict(metadata)
+
+    async def _fetch_token_metadata(self, token_address, deadline=None, required_fields=None):
+        """
+        Query the metadata sources concurrently and cache the merged result
+
+        Results are always merged in priority order (Birdeye, Solscan,
+        pump.fun), whatever order they arrive in. With ``required_fields`` the
+        remaining sources are cancelled as soon as the merged result has those
+        fields. Results are only cached when every source gave a successful
+        answer or all social links were found, so an early exit, a deadline
+        hit, a failing source or an open circuit breaker is not remembered as
+        "no socials".
+        """
+        # Try multiple sources to gather the most comprehensive data
+        sources_to_try = [
+            self._get_metadata_from_birdeye,
+            self._get_metadata_from_solscan,
+            self._get_metadata_from_pump_fun
+        ]
+
+        # Fire every source at once instead of one round-trip after another
+        tasks = [asyncio.create_task(source_func(token_address)) for source_func in sources_to_try]
+        loop = asyncio.get_running_loop()
+        expires_at = None if deadline is None else loop.time() + deadline
+        pending = set(tasks)
+
+        while pending:
+            timeout = None if expires_at is None else max(0.0, expires_at - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"⚠️ Metadata deadline hit for {token_address}: {len(pending)} source(s) still pending")
+                break
+            if required_fields is not None:
+                metadata, answered = self._merge_metadata(token_address, sources_to_try, tasks)
+                if answered and all(metadata.get(field) for field in required_fields):
+                    break
+
+        for task in pending:
+            task.cancel()
+
+        metadata, _ = self._merge_metadata(token_address, sources_to_try, tasks)
+
+        # A source that failed returns None (see _get_metadata_from_*); {} means it had no data
+        all_answered = all(
+            task.done() and not task.cancelled() and task.exception() is None and task.result() is not None
+            for task in tasks
+        )
+        if all_answered or not any(metadata.get(field) is None for field in SOCIAL_FIELDS):
+            self.metadata_cache.put(token_address, metadata)
+
+        return metadata
+
+    def _merge_metadata(self, token_address, sources_to_try, tasks):
+        """
+        Merge the finished source lookups in priority order
+
+        Returns:
+            tuple: (metadata dict, True if at least one source returned data)
+        """
         metadata = {
             "address": token_address,
             "symbol": "UNKNOWN",
@@ -1121,19 +1733,16 @@ class WalletManager:
             "discord": None,
             "liquidity": 0
         }
+        answered = False
 
-        # Try multiple sources to gather the most comprehensive data
-        sources_to_try = [
-            self._get_metadata_from_birdeye,
-            self._get_metadata_from_solscan,
-            self._get_metadata_from_pump_fun
-        ]
-
-        for source_func in sources_to_try:
+        for source_func, task in zip(sources_to_try, tasks):
+            if not task.done() or task.cancelled():
+                continue
             try:
-                source_data = await source_func(token_address)
+                source_data = task.result()
                 if not source_data or not isinstance(source_data, dict):
                     continue
+                answered = True
 
                 # Merge data, preferring non-None values from new source
                 for key, value in source_data.items():
@@ -1151,93 +1760,184 @@ class WalletManager:
                 print(f"Error getting metadata from source {source_func.__name__}: {e}")
                 continue
 
-        return metadata
+        return metadata, answered
+
+    @prioritized(PRIORITY_BACKGROUND)
+    async def enrich_tokens(self, tokens, max_in_flight=8, per_token_deadline=8.0, required_fields=None):
+        """
+        Attach metadata (social links etc.) to a batch of discovered tokens
+
+        Tokens are enriched concurrently, with at most ``max_in_flight`` metadata
+        lookups running at the same time. Each token gets ``per_token_deadline``
+        seconds; slow sources are dropped rather than holding up the batch.
+
+        Args:
+            tokens: List of token dicts with an "address" key (updated in place)
+            max_in_flight: Maximum number of tokens enriched concurrently
+            per_token_deadline: Seconds allowed per token before giving up on
+                the sources that have not answered
+            required_fields: Fields the active filters need; each lookup returns
+                as soon as they are filled (see get_token_metadata)
+
+        Returns:
+            list: The same token dicts, in the same order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def enrich(token):
+            async with semaphore:
+                try:
+                    token_metadata = await self.get_token_metadata(
+                        token.get("address"),
+                        deadline=per_token_deadline,
+                        required_fields=required_fields
+                    )
+                except Exception as e:
+                    print(f"Error enriching token {token.get('address')}: {e}")
+                    return token
+            # Add social links to the token data without replacing what discovery
+            # already knew (symbol, liquidity, ...) with metadata placeholders
+            for key, value in token_metadata.items():
+                if value in (None, "", 0, "UNKNOWN", "Unknown Token"):
+                    continue
+                if token.get(key) in (None, "", 0, "UNKNOWN", "Unknown Token"):
+                    token[key] = value
+            return token
+
+        return await asyncio.gather(*(enrich(token) for token in tokens))
 
     async def _get_metadata_from_birdeye(self, token_address):
-        """Get token metadata from Birdeye API"""
+        """Get token metadata from Birdeye API ({} when it has none, None when the lookup failed)"""
+        breaker = self.breakers["birdeye"]
+        if not breaker.allow():
+            return None
+
         try:
             url = f"https://public-api.birdeye.so/public/token_metadata?address={token_address}"
             headers = {"X-API-KEY": os.getenv("BIRDEYE_API_KEY", "")}
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success", False):
-                        token_data = data.get("data", {})
-                        return {
-                            "symbol": token_data.get("symbol"),
-                            "name": token_data.get("name"),
-                            "website": token_data.get("website"),
-                            "twitter": token_data.get("twitter"),
-                            "telegram": token_data.get("telegram"),
-                            "discord": token_data.get("discord"),
-                            "liquidity": token_data.get("liquidity", 0)
-                        }
-            return {}
-        except Exception:
-            return {}
+            client = self.http.get_client(url)
+            response = await client.get(url, headers=headers)
+            breaker.record_response(response.status_code)
+            if response.status_code == 404:
+                return {}  # The source does not know the token: an answer, not a failure
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("success", False):
+                    token_data = data.get("data", {})
+                    return {
+                        "symbol": token_data.get("symbol"),
+                        "name": token_data.get("name"),
+                        "website": token_data.get("website"),
+                        "twitter": token_data.get("twitter"),
+                        "telegram": token_data.get("telegram"),
+                        "discord": token_data.get("discord"),
+                        "liquidity": token_data.get("liquidity", 0)
+                    }
+                return {}
+            return None
+        except asyncio.CancelledError:
+            # Dropped because another source already answered
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            return None
 
     async def _get_metadata_from_solscan(self, token_address):
-        """Get token metadata from Solscan API"""
+        """Get token metadata from Solscan API ({} when it has none, None when the lookup failed)"""
+        breaker = self.breakers["solscan"]
+        if not breaker.allow():
+            return None
+
         try:
             url = f"https://api.solscan.io/token/meta?token={token_address}"
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success", False):
-                        token_data = data.get("data", {})
-                        socials = token_data.get("socials", {})
-                        return {
-                            "symbol": token_data.get("symbol"),
-                            "name": token_data.get("name"),
-                            "website": socials.get("website"),
-                            "twitter": socials.get("twitter"),
-                            "telegram": socials.get("telegram"),
-                            "discord": socials.get("discord")
-                        }
-            return {}
-        except Exception:
-            return {}
+            client = self.http.get_client(url)
+            response = await client.get(url)
+            breaker.record_response(response.status_code)
+            if response.status_code == 404:
+                return {}
+            if response.status_code == 200:
+                data = response.json()
+                if data.get("success", False):
+                    token_data = data.get("data", {})
+                    socials = token_data.get("socials", {})
+                    return {
+                        "symbol": token_data.get("symbol"),
+                        "name": token_data.get("name"),
+                        "website": socials.get("website"),
+                        "twitter": socials.get("twitter"),
+                        "telegram": socials.get("telegram"),
+                        "discord": socials.get("discord")
+                    }
+                return {}
+            return None
+        except asyncio.CancelledError:
+            # Dropped because another source already answered
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            return None
 
     async def _get_metadata_from_pump_fun(self, token_address):
-        """Get token metadata from pump.fun API"""
+        """Get token metadata from pump.fun API ({} when it has none, None when the lookup failed)"""
+        breaker = self.breakers["pump.fun"]
+        if not breaker.allow():
+            return None
+
         try:
             url = f"https://api.pump.fun/token/{token_address}"
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
             }
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    token_data = data.get("token", {})
-                    return {
-                        "symbol": token_data.get("symbol"),
-                        "name": token_data.get("name"),
-                        "website": token_data.get("websiteUrl"),
-                        "twitter": token_data.get("twitterUrl"),
-                        "telegram": token_data.get("telegramUrl"),
-                        "discord": token_data.get("discordUrl")
-                    }
-            return {}
-        except Exception:
-            return {}
+            client = self.http.get_client(url)
+            response = await client.get(url, headers=headers)
+            breaker.record_response(response.status_code)
+            if response.status_code == 404:
+                return {}
+            if response.status_code == 200:
+                data = response.json()
+                token_data = data.get("token", {})
+                return {
+                    "symbol": token_data.get("symbol"),
+                    "name": token_data.get("name"),
+                    "website": token_data.get("websiteUrl"),
+                    "twitter": token_data.get("twitterUrl"),
+                    "telegram": token_data.get("telegramUrl"),
+                    "discord": token_data.get("discordUrl")
+                }
+            return None
+        except asyncio.CancelledError:
+            # Dropped because another source already answered
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            return None
 
     async def update_simulated_balance(self, username, amount_change):
         """Update the simulated balance for a user (for testing)"""
         if not hasattr(self, 'user_balances'):
             self.user_balances = {}
 
-        # Get current balance or initialize it
-        current_balance = self.user_balances.get(username, await self.get_balance(username))
+        # Get current balance (get_balance caches {"balance", "timestamp"} dicts) or fetch it
+        cached_data = self.user_balances.get(username)
+        if isinstance(cached_data, dict) and "balance" in cached_data:
+            current_balance = cached_data["balance"]
+        elif isinstance(cached_data, (int, float)):
+            current_balance = cached_data
+        else:
+            current_balance = await self.get_balance(username)
 
-        # Update balance
+        # Update balance in the same shape get_balance caches it
         new_balance = max(0, current_balance + amount_change)
-        self.user_balances[username] = round(new_balance, 3)
+        self.user_balances[username] = {
+            "balance": round(new_balance, 9),
+            "timestamp": time.time()
+        }
 
         return new_balance
 